@@ -0,0 +1,89 @@
+"""
+Compares two benchmark reports and fails on regressions.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+
+import argparse
+import json
+import sys
+
+# relative slowdown tolerated before a run counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+# stages faster than this in both runs are too noisy to compare
+MIN_SECONDS = 0.5
+
+# configuration that has to match for timings to be comparable
+COMPARED_CONFIG = [
+    "whisper_model",
+    "whisper_compute_type",
+    "batch_size",
+    "vad",
+    "transcript_output",
+    "chunk_duration",
+]
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns `(rows, regressions)`, one row per measurement as
+    `(name, before, after, change)`, and the names of those that got slower
+    or bigger by more than `tolerance`.
+    """
+
+    measurements = [
+        ("wall_time", baseline["wall_time"], current["wall_time"]),
+        ("peak_rss_mb", baseline["peak_rss_mb"], current["peak_rss_mb"]),
+    ]
+    for stage in sorted(set(baseline["stages"]) | set(current["stages"])):
+        before = baseline["stages"].get(stage, {}).get("seconds", 0.0)
+        after = current["stages"].get(stage, {}).get("seconds", 0.0)
+        measurements.append((stage, before, after))
+
+    rows = []
+    regressions = []
+    for name, before, after in measurements:
+        change = (after - before) / before if before else None
+        rows.append((name, before, after, change))
+
+        if name != "peak_rss_mb" and max(before, after) < MIN_SECONDS:
+            continue
+        if change is not None and change > tolerance:
+            regressions.append(name)
+
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    if baseline["fixture"]["duration"] != current["fixture"]["duration"]:
+        print("warning: the reports are for different fixtures")
+    for key in COMPARED_CONFIG:
+        if baseline["config"].get(key) != current["config"].get(key):
+            print(
+                f"warning: {key} differs, {baseline['config'].get(key)} "
+                f"vs {current['config'].get(key)}"
+            )
+
+    rows, regressions = compare(baseline, current, args.tolerance)
+    for name, before, after, change in rows:
+        change = f"{change:+.1%}" if change is not None else "new"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<28} {before:>10.2f} {after:>10.2f} {change:>8}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import logging
+import os
+import subprocess
+import wave
+
+import numpy as np
+
+from scribe_agent.encoding import AUDIO_FORMATS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SAMPLE_RATE = 16000
+
+# the standard fixtures, in seconds
+DURATIONS = {"5m": 300, "30m": 1800, "2h": 7200}
+
+# fixtures are generated from a fixed seed, so every run measures the same audio
+SEED = 20240115
+
+# pitch of the synthetic speakers, in Hz
+SPEAKER_PITCHES = [110.0, 165.0, 220.0]
+
+# first and second formants of a few vowels, in Hz
+VOWELS = [(730, 1090), (270, 2290), (300, 870), (530, 1840), (640, 1190)]
+
+HARMONICS = 12
+
+# audio is synthesized and written in blocks of this many seconds
+BLOCK_SECONDS = 60
+
+
+def _syllable(rng, pitch, sample_rate):
+    length = int(rng.uniform(0.12, 0.3) * sample_rate)
+    t = np.arange(length) / sample_rate
+
+    # a little intonation, so the pitch is never flat
+    contour = pitch * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+    phase = 2 * np.pi * np.cumsum(contour) / sample_rate
+
+    f1, f2 = VOWELS[rng.integers(len(VOWELS))]
+    audio = np.zeros(length)
+    for k in range(1, HARMONICS + 1):
+        f = k * pitch
+        gain = np.exp(-(((f - f1) / 120) ** 2)) + 0.5 * np.exp(-(((f - f2) / 150) ** 2))
+        audio += (gain + 0.05) / k * np.sin(k * phase)
+
+    # some syllables start with a fricative
+    if rng.random() < 0.3:
+        burst = min(length, int(0.05 * sample_rate))
+        audio[:burst] += rng.normal(0, 0.3, burst)
+
+    return audio * np.hanning(length)
+
+
+def _speech(rng, duration, sample_rate):
+    """
+    Yields blocks of synthetic speech: utterances of voiced syllables from
+    alternating speakers, separated by pauses and the occasional long
+    silence. It is not intelligible, but has the energy and pitch structure
+    VAD and diarization react to.
+    """
+
+    total = int(duration * sample_rate)
+    produced = 0
+    speaker = 0
+
+    while produced < total:
+        parts = []
+        pitch = SPEAKER_PITCHES[speaker] * rng.uniform(0.95, 1.05)
+        for _ in range(rng.integers(8, 40)):
+            parts.append(_syllable(rng, pitch, sample_rate))
+            parts.append(np.zeros(int(rng.uniform(0.02, 0.15) * sample_rate)))
+
+        if rng.random() < 0.05:
+            pause = rng.uniform(10, 40)
+        else:
+            pause = rng.uniform(0.3, 3)
+        parts.append(rng.normal(0, 0.001, int(pause * sample_rate)))
+
+        block = np.concatenate(parts)[: total - produced]
+        produced += len(block)
+        yield block
+
+        if rng.random() < 0.6:
+            speaker = (speaker + 1) % len(SPEAKER_PITCHES)
+
+
+def synthesize(path, duration, sample_rate=SAMPLE_RATE, seed=SEED):
+    """
+    Writes `duration` seconds of synthetic speech as a 16 bit mono WAV file.
+    """
+
+    rng = np.random.default_rng(seed)
+    pending = []
+    pending_size = 0
+
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+
+        def flush():
+            audio = np.concatenate(pending)
+            out.writeframes((np.clip(audio * 0.3, -1, 1) * 32767).astype("<i2"))
+
+        for block in _speech(rng, duration, sample_rate):
+            pending.append(block)
+            pending_size += len(block)
+            if pending_size >= BLOCK_SECONDS * sample_rate:
+                flush()
+                pending, pending_size = [], 0
+
+        if pending:
+            flush()
+
+
+def encode(source, path, audio_format):
+    """
+    Encodes a fixture the way the agent encodes recordings.
+    """
+
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            source,
+            *AUDIO_FORMATS[audio_format]["ffmpeg"],
+            path,
+        ],
+        check=True,
+    )
+
+
+def fixture(name, audio_format="wav"):
+    """
+    Returns the path of a standard fixture, generating it on first use.
+    """
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    wav_path = os.path.join(FIXTURES_DIR, f"speech-{name}.wav")
+    if not os.path.exists(wav_path):
+        logging.info(f"generating fixture {wav_path}")
+        synthesize(wav_path + ".part", DURATIONS[name])
+        os.replace(wav_path + ".part", wav_path)
+
+    if audio_format == "wav":
+        return wav_path
+
+    extension = AUDIO_FORMATS[audio_format]["extension"]
+    path = os.path.join(FIXTURES_DIR, f"speech-{name}.{extension}")
+    if not os.path.exists(path):
+        logging.info(f"encoding fixture {path}")
+        encode(wav_path, path, audio_format)
+
+    return path
+
+
+def probe(path) -> float:
+    """Returns the duration of an encoded file, in seconds."""
+
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "csv=p=0",
+            path,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(result.stdout.strip())
+
+
+def metadata_for(path) -> dict:
+    """
+    Builds the GridFS metadata the agent would have stored with a recording.
+    """
+
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension != "wav":
+        for audio_format in AUDIO_FORMATS.values():
+            if audio_format["extension"] == extension:
+                return {"format": audio_format["format"], "duration": probe(path)}
+
+        raise ValueError(f"unsupported fixture format: {extension}")
+
+    with wave.open(path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path} is not 16 bit mono audio")
+        if f.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path} is not sampled at {SAMPLE_RATE} Hz")
+
+        return {
+            "format": "WAV",
+            "sample_rate": f.getframerate(),
+            "channels": 1,
+            "duration": f.getnframes() / f.getframerate(),
+        }
@@ -0,0 +1,54 @@
+# chunk size of the recordings the agent stores
+CHUNK_SIZE = 255 * 1024
+
+
+class MemoryGridOut:
+    """
+    The parts of `AsyncIOMotorGridOut` the pipeline reads recordings with.
+    Chunks are served with the same boundaries as GridFS, without a database
+    round trip, so only the pipeline itself is measured.
+    """
+
+    def __init__(self, file_id, data, metadata, chunk_size):
+        self._id = file_id
+        self._data = data
+        self._position = 0
+
+        self.metadata = metadata
+        self.length = len(data)
+        self.chunk_size = chunk_size
+
+    def seek(self, position):
+        self._position = position
+
+    async def readchunk(self) -> bytes:
+        chunk_end = (self._position // self.chunk_size + 1) * self.chunk_size
+        end = min(chunk_end, self.length)
+
+        data = self._data[self._position : end]
+        self._position = end
+        return data
+
+    async def read(self) -> bytes:
+        data = self._data[self._position :]
+        self._position = self.length
+        return data
+
+
+class MemoryBucket:
+    """
+    Stands in for `AsyncIOMotorGridFSBucket`, with files held in memory.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._files = {}
+
+    def put(self, data: bytes, metadata=None):
+        file_id = len(self._files) + 1
+        self._files[file_id] = (data, metadata or {})
+        return file_id
+
+    async def open_download_stream(self, file_id) -> MemoryGridOut:
+        data, metadata = self._files[file_id]
+        return MemoryGridOut(file_id, data, metadata, self.chunk_size)
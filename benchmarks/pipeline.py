@@ -0,0 +1,234 @@
+"""
+Runs `transcribe_from_gridfs` over fixed audio fixtures and saves the
+timings as JSON.
+
+    python -m benchmarks.pipeline --duration 5m --duration 30m
+    python -m benchmarks.pipeline --audio meeting.flac
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fixtures import DURATIONS, SAMPLE_RATE, fixture, metadata_for
+from benchmarks.gridfs import MemoryBucket
+from benchmarks.stages import StageTimer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# seconds between two samples of the resident set size
+RSS_INTERVAL = 0.05
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples the resident set size of the process while a run is going on.
+    `ru_maxrss` only holds the peak of the whole process, which would carry
+    the peak of one run over into the next.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return max(self.peak, current_rss())
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # no procfs, fall back on the peak of the whole process
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def configuration(chunk_duration) -> dict:
+    from scribe_agent.batching import BATCH_SIZE
+    from scribe_agent.decoding import TRANSCRIPT_OUTPUT
+    from scribe_agent.models import WHISPER_COMPUTE_TYPE, WHISPER_MODEL
+    from scribe_agent.vad import VAD_ENABLED
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "whisper_model": WHISPER_MODEL,
+        "whisper_compute_type": WHISPER_COMPUTE_TYPE,
+        "batch_size": BATCH_SIZE,
+        "vad": VAD_ENABLED,
+        "transcript_output": TRANSCRIPT_OUTPUT,
+        "chunk_duration": chunk_duration,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+async def run(path, chunk_duration) -> dict:
+    """
+    Transcribes one fixture from an in-memory bucket and returns the report.
+    """
+
+    from scribe_agent.models import registry
+    from scribe_agent.transcription import transcribe_from_gridfs
+
+    metadata = metadata_for(path)
+    bucket = MemoryBucket()
+    with open(path, "rb") as f:
+        file_id = bucket.put(f.read(), metadata)
+
+    baseline = current_rss()
+    sampler = RSSSampler()
+    segments = 0
+
+    with StageTimer() as timer:
+        sampler.start()
+        started = time.perf_counter()
+        async for _, _, window in transcribe_from_gridfs(
+            bucket,
+            file_id,
+            sample_rate=SAMPLE_RATE,
+            chunk_duration=chunk_duration,
+        ):
+            segments += len(window)
+        wall_time = time.perf_counter() - started
+        peak = sampler.stop()
+
+    duration = metadata["duration"]
+    return {
+        "fixture": {
+            "path": os.path.relpath(path),
+            "format": metadata["format"],
+            "duration": round(duration, 3),
+            "bytes": os.path.getsize(path),
+        },
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": configuration(chunk_duration),
+        "wall_time": round(wall_time, 3),
+        "real_time_factor": round(wall_time / duration, 5),
+        "segments": segments,
+        "baseline_rss_mb": round(baseline / 2**20, 1),
+        "peak_rss_mb": round(peak / 2**20, 1),
+        "children_peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1
+        ),
+        "models": [
+            {"name": m["name"], "size": m["size"], "load_time": m["load_time"]}
+            for m in registry.stats()
+        ],
+        "stages": timer.report(duration),
+    }
+
+
+def warm_up():
+    """
+    Loads the models before anything is timed, so model loading shows up in
+    `models` rather than in the first run.
+    """
+
+    from scribe_agent.models import registry
+
+    registry.whisper()
+    registry.diarization()
+
+
+def save(report, output_dir) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+
+    name = os.path.splitext(os.path.basename(report["fixture"]["path"]))[0]
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(output_dir, f"{stamp}-{name}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    return path
+
+
+def summary(report) -> str:
+    lines = [
+        f"{report['fixture']['path']}: {report['wall_time']:.1f}s for "
+        f"{report['fixture']['duration']:.0f}s of audio, "
+        f"RTF {report['real_time_factor']:.4f}, "
+        f"peak RSS {report['peak_rss_mb']:.0f} MB, {report['segments']} segments",
+    ]
+    for stage, stats in report["stages"].items():
+        lines.append(
+            f"  {stage:<28} {stats['seconds']:>10.2f}s {stats['calls']:>8} calls"
+        )
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--duration",
+        action="append",
+        choices=list(DURATIONS),
+        help="standard fixture to run, can be repeated (default: 5m)",
+    )
+    parser.add_argument(
+        "--audio", action="append", help="audio file to run instead of a fixture"
+    )
+    parser.add_argument(
+        "--format",
+        default="wav",
+        choices=["wav", "flac", "opus"],
+        help="format the standard fixtures are stored in",
+    )
+    parser.add_argument("--chunk-duration", type=int, default=30)
+    parser.add_argument("--output", default=RESULTS_DIR)
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="time model loading as part of the first run",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    paths = list(args.audio or [])
+    if not paths or args.duration:
+        paths += [fixture(name, args.format) for name in args.duration or ["5m"]]
+
+    if not args.no_warm_up:
+        warm_up()
+
+    # one event loop for all runs, the batcher stays bound to the first one
+    async def run_all():
+        for path in paths:
+            report = await run(path, args.chunk_duration)
+            print(summary(report))
+            print(f"saved {save(report, args.output)}")
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import contextvars
+import functools
+import importlib
+import inspect
+import threading
+import time
+
+# pipeline stages and the functions they are timed by, as "module:attribute".
+# Functions are patched where the pipeline looks them up, so names imported
+# into several modules are listed once per module.
+STAGES = {
+    "read": ["scribe_agent.pcm:_pcm_chunks"],
+    "windows": ["scribe_agent.transcription:read_windows"],
+    "vad": ["scribe_agent.transcription:speech_chunks"],
+    "diarization": [
+        "scribe_agent.transcription:diarize_window",
+        "scribe_agent.batching:diarize_window",
+    ],
+    "whisper.encode": ["scribe_agent.decoding:encode"],
+    "whisper.decode": ["scribe_agent.decoding:decode"],
+    "whisper.batch": ["scribe_agent.batching:transcribe_batch"],
+    "speakers": ["scribe_agent.diarization:SpeakerClusterer.assign"],
+    "attribution": ["scribe_agent.transcription:attribute_speakers"],
+    "models": ["scribe_agent.models:ModelRegistry.get"],
+}
+
+# the Whisper passes are told apart by their task
+LABELS = {
+    "whisper.decode": lambda args, kwargs: "whisper.decode."
+    + kwargs.get("task", args[4] if len(args) > 4 else "unknown")
+}
+
+_current = contextvars.ContextVar("benchmark_span", default=None)
+
+
+class _Span:
+    __slots__ = ("started", "parent", "children")
+
+    def __init__(self, parent):
+        self.started = time.perf_counter()
+        self.parent = parent
+        self.children = 0.0
+
+
+class StageTimer:
+    """
+    Times the stages of the pipeline by wrapping the functions listed in
+    `STAGES`. Times are exclusive: a stage that calls into another, like
+    `windows` reading from `read`, is only charged for its own work. Async
+    generators are charged for the time spent producing each item.
+
+    Stages running on different threads overlap, so the stage times can add
+    up to more than the wall time.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.stages = stages
+        self.results = {}
+
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def install(self):
+        for stage, targets in self.stages.items():
+            for target in targets:
+                owner, name = _resolve(target)
+                original = getattr(owner, name)
+                setattr(owner, name, self._wrap(stage, original))
+                self._patched.append((owner, name, original))
+
+    def uninstall(self):
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+
+    def report(self, audio_duration) -> dict:
+        return {
+            stage: {
+                "calls": calls,
+                "seconds": round(seconds, 4),
+                "real_time_factor": round(seconds / audio_duration, 5),
+            }
+            for stage, (calls, seconds) in sorted(self.results.items())
+        }
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def _enter(self):
+        span = _Span(_current.get())
+        return span, _current.set(span)
+
+    def _exit(self, stage, span, token):
+        elapsed = time.perf_counter() - span.started
+        _current.reset(token)
+        if span.parent:
+            span.parent.children += elapsed
+
+        with self._lock:
+            calls, seconds = self.results.get(stage, (0, 0.0))
+            self.results[stage] = (calls + 1, seconds + elapsed - span.children)
+
+    def _wrap(self, stage, fn):
+        label = LABELS.get(stage)
+
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                name = label(args, kwargs) if label else stage
+                gen = fn(*args, **kwargs)
+                try:
+                    while True:
+                        span, token = self._enter()
+                        try:
+                            item = await gen.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            self._exit(name, span, token)
+                        yield item
+                finally:
+                    await gen.aclose()
+
+            return wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            name = label(args, kwargs) if label else stage
+            span, token = self._enter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._exit(name, span, token)
+
+        return wrapper
+
+
+def _resolve(target):
+    module, _, path = target.partition(":")
+    owner = importlib.import_module(module)
+
+    *parents, name = path.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+
+    return owner, name
@@ -1,21 +1,24 @@
 import React, { useState, useEffect } from 'react';
 import { BrowserRouter as Router, Routes, Route, Link } from 'react-router-dom';
-import { meetingsApi } from './services/api';
+import { meetingsApi, subscribeToEvents } from './services/api';
 import ErrorAlert from './components/ErrorAlert';
 import CreateMeeting from './components/CreateMeeting';
 import MeetingList from './components/MeetingList';
+import SearchTranscripts from './components/SearchTranscripts';
 import TranscriptPage from './components/MeetingTranscriptPage';
 
 function App() {
     const [meetings, setMeetings] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
 
     const fetchMeetings = async () => {
         try {
             setLoading(true);
-            const data = await meetingsApi.getAllMeetings();
-            setMeetings(data);
+            const page = await meetingsApi.getMeetings();
+            setMeetings(page.meetings);
+            setNextCursor(page.nextCursor);
             setError('');
         } catch (err) {
             setError(err.response?.data?.detail || err.message || 'Failed to fetch meetings');
@@ -24,6 +27,21 @@ function App() {
         }
     };
 
+    const loadMoreMeetings = async () => {
+        if (!nextCursor) return;
+
+        try {
+            setLoading(true);
+            const page = await meetingsApi.getMeetings(nextCursor);
+            setMeetings(prev => [...prev, ...page.meetings]);
+            setNextCursor(page.nextCursor);
+        } catch (err) {
+            setError(err.response?.data?.detail || err.message || 'Failed to fetch meetings');
+        } finally {
+            setLoading(false);
+        }
+    };
+
     const handleMeetingAction = async (action) => {
         try {
             await action();
@@ -33,14 +51,21 @@ function App() {
         }
     };
 
+    // The list is reloaded when the server reports a change, and on every
+    // (re)connect to catch up with anything missed while disconnected
     useEffect(() => {
-        fetchMeetings();
-        const interval = setInterval(fetchMeetings, 30000);
-        return () => clearInterval(interval);
+        const reload = () => fetchMeetings();
+        return subscribeToEvents({
+            'open': reload,
+            'meeting.created': reload,
+            'meeting.started': reload,
+            'meeting.stopped': reload,
+            'meeting.deleted': reload,
+            'transcription.ready': reload,
+            'resync': reload,
+        });
     }, []);
 
-    const activeMeeting = meetings.find(m => !m.stoppedAt);
-
     return (
         <Router>
             <div className="app">
@@ -75,13 +100,16 @@ function App() {
 
                                     <CreateMeeting
                                         onMeetingCreated={() => handleMeetingAction(() => Promise.resolve())}
-                                        activeMeeting={activeMeeting}
+                                        meetings={meetings}
                                     />
 
+                                    <SearchTranscripts />
+
                                     <MeetingList
                                         meetings={meetings}
                                         loading={loading}
                                         onRefresh={fetchMeetings}
+                                        onLoadMore={nextCursor ? loadMoreMeetings : null}
                                         onMeetingUpdated={() => handleMeetingAction(() => Promise.resolve())}
                                     />
                                 </>
@@ -1,9 +1,28 @@
-import React, { useState } from "react";
+import React, { useState, useEffect } from "react";
 import { meetingsApi } from "../services/api";
 
-const CreateMeeting = ({ onMeetingCreated, activeMeeting }) => {
+const CreateMeeting = ({ onMeetingCreated, meetings }) => {
     const [title, setTitle] = useState("");
+    const [agents, setAgents] = useState([]);
+    const [agentId, setAgentId] = useState("");
     const [isCreating, setIsCreating] = useState(false);
+    const [error, setError] = useState("");
+
+    // Agents are reloaded whenever the meetings change, which is when one
+    // of them may have become busy or idle
+    useEffect(() => {
+        meetingsApi.getAgents()
+            .then(setAgents)
+            .catch(err => console.error("Failed to fetch agents", err));
+    }, [meetings]);
+
+    const idleAgents = agents.filter(a => a.status === "idle");
+
+    useEffect(() => {
+        if (agentId && !idleAgents.some(a => a.id === agentId)) {
+            setAgentId("");
+        }
+    }, [agents]);
 
     const handleSubmit = async (e) => {
         e.preventDefault();
@@ -11,17 +30,20 @@ const CreateMeeting = ({ onMeetingCreated, activeMeeting }) => {
 
         try {
             setIsCreating(true);
-            await meetingsApi.createMeeting(title);
+            await meetingsApi.createMeeting(title, agentId || null);
             setTitle("");
+            setError("");
             onMeetingCreated();
         } catch (error) {
             console.error("Failed to create meeting", error);
+            setError(error.response?.data?.detail || error.message);
         } finally {
             setIsCreating(false);
         }
     };
 
-    const isDisabled = isCreating || !!activeMeeting || !title.trim();
+    const noAgent = idleAgents.length === 0;
+    const isDisabled = isCreating || noAgent || !title.trim();
 
     return (
         <div className="card">
@@ -36,10 +58,24 @@ const CreateMeeting = ({ onMeetingCreated, activeMeeting }) => {
                         placeholder="Enter meeting title..."
                         value={title}
                         onChange={(e) => setTitle(e.target.value)}
-                        disabled={isCreating || !!activeMeeting}
+                        disabled={isCreating || noAgent}
                         maxLength={100}
                         style={{ flex: 1 }}
                     />
+                    <select
+                        className="form-control"
+                        value={agentId}
+                        onChange={(e) => setAgentId(e.target.value)}
+                        disabled={isCreating || noAgent}
+                        style={{ width: 'auto' }}
+                    >
+                        <option value="">Any room</option>
+                        {idleAgents.map(agent => (
+                            <option key={agent.id} value={agent.id}>
+                                {agent.room || agent.id}
+                            </option>
+                        ))}
+                    </select>
                     <button
                         type="submit"
                         className="btn btn-primary"
@@ -49,7 +85,7 @@ const CreateMeeting = ({ onMeetingCreated, activeMeeting }) => {
                     </button>
                 </form>
 
-                {activeMeeting && (
+                {(noAgent || error) && (
                     <div className="mt-3 p-3" style={{
                         backgroundColor: '#fff3cd',
                         border: '1px solid #ffeaa7',
@@ -57,7 +93,11 @@ const CreateMeeting = ({ onMeetingCreated, activeMeeting }) => {
                         fontSize: '0.875rem',
                         color: '#856404'
                     }}>
-                        <strong>Active Meeting:</strong> Cannot start a new meeting while "{activeMeeting.title}" is running.
+                        {error || (
+                            <>
+                                <strong>No agent available:</strong> every agent is recording a meeting or offline.
+                            </>
+                        )}
                     </div>
                 )}
             </div>
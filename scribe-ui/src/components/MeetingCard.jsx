@@ -186,6 +186,20 @@ const MeetingCard = ({meeting, onMeetingUpdated}) => {
                                     }}
                                 >
                   Transcripts Ready
+                </span>
+                            )}
+
+                            {meeting.agentLost && (
+                                <span
+                                    className="badge badge-agent-lost"
+                                    title="The agent recording this meeting stopped responding"
+                                    style={{
+                                        backgroundColor: '#e06c75',
+                                        color: '#282c34',
+                                        border: '1px solid #a8444c',
+                                    }}
+                                >
+                  Agent Lost
                 </span>
                             )}
                         </div>
@@ -196,6 +210,12 @@ const MeetingCard = ({meeting, onMeetingUpdated}) => {
                             <span className="fw-medium">Started:</span>{' '}
                             {new Date(meeting.startedAt).toLocaleString()}
                         </div>
+                        {meeting.agentId && (
+                            <div className="mb-1">
+                                <span className="fw-medium">Agent:</span>{' '}
+                                {meeting.agentId}
+                            </div>
+                        )}
                         {meeting.stoppedAt && (
                             <div>
                                 <span className="fw-medium">Stopped:</span>{' '}
@@ -1,7 +1,7 @@
 import React from 'react';
 import MeetingCard from './MeetingCard';
 
-const MeetingList = ({ meetings, loading, onRefresh, onMeetingUpdated }) => {
+const MeetingList = ({ meetings, loading, onRefresh, onLoadMore, onMeetingUpdated }) => {
     const completedMeetings = meetings.filter(m => m.stoppedAt);
     const activeMeetings = meetings.filter(m => !m.stoppedAt);
 
@@ -67,6 +67,18 @@ const MeetingList = ({ meetings, loading, onRefresh, onMeetingUpdated }) => {
                                 </div>
                             </div>
                         )}
+
+                        {onLoadMore && (
+                            <div className="text-center">
+                                <button
+                                    className="btn btn-secondary btn-sm"
+                                    onClick={onLoadMore}
+                                    disabled={loading}
+                                >
+                                    {loading ? 'Loading...' : 'Load older meetings'}
+                                </button>
+                            </div>
+                        )}
                     </>
                 )}
             </div>
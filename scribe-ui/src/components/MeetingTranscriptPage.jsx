@@ -1,6 +1,6 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { useLocation, useParams } from 'react-router-dom';
-import { meetingsApi } from '../services/api';
+import { meetingsApi, subscribeToEvents } from '../services/api';
 
 const speakerColors = [
   '#4f8cc9',
@@ -22,6 +22,9 @@ const MeetingTranscriptPage = () => {
   const [showTimestamps, setShowTimestamps] = useState(false);
   const [playingSegmentIndex, setPlayingSegmentIndex] = useState(null);
   const [showTranslated, setShowTranslated] = useState(false);
+  const [segments, setSegments] = useState([]);
+  const [nextFrom, setNextFrom] = useState(0);
+  const loadingSegments = useRef(false);
 
   const handleLanguageToggle = () => {
     setShowTranslated(prev => !prev);
@@ -39,27 +42,92 @@ const MeetingTranscriptPage = () => {
     }
   }, [id, meeting]);
 
-  // Build speaker to index map for coloring badges
+  // Load the next page of the transcript, pages are requested as the user
+  // scrolls or the recording plays towards the end of what is loaded
+  const loadMoreSegments = async () => {
+    if (nextFrom === null || loadingSegments.current) return;
+
+    loadingSegments.current = true;
+    try {
+      const page = await meetingsApi.getSegments(id, nextFrom);
+      setSegments(prev => [...prev, ...page.segments]);
+      setNextFrom(page.nextFrom);
+    } catch (err) {
+      console.error('Failed to load transcript', err);
+    } finally {
+      loadingSegments.current = false;
+    }
+  };
+
   useEffect(() => {
-    if (meeting?.transcriptionSegments) {
-      const uniqueSpeakers = [...new Set(meeting.transcriptionSegments.map(s => s.speaker))];
-      const map = {};
-      uniqueSpeakers.forEach((speaker, idx) => { map[speaker] = idx; });
-      setSpeakerMap(map);
+    if (meeting && segments.length === 0) {
+      loadMoreSegments();
     }
   }, [meeting]);
 
-  // Fetch audio blob and create URL
-  const fetchAudio = async () => {
-    try {
-      const blob = await meetingsApi.getRecording(id);
-      const audioUrl = URL.createObjectURL(blob);
-      setAudio(audioUrl);
-    } catch (err) {
-      console.error('Failed to load audio', err);
+  // New segments are appended as they are transcribed once the transcript is
+  // loaded up to its end, otherwise paging picks them up
+  const nextFromRef = useRef(nextFrom);
+  nextFromRef.current = nextFrom;
+
+  useEffect(() => {
+    const reloadMeeting = () => meetingsApi.getMeeting(id).then(setMeeting).catch(() => {});
+    const reloadSegments = () => {
+      setSegments([]);
+      setNextFrom(0);
+      meetingsApi.getSegments(id, 0).then(page => {
+        setSegments(page.segments);
+        setNextFrom(page.nextFrom);
+      }).catch(err => console.error('Failed to load transcript', err));
+    };
+
+    return subscribeToEvents({
+      'meeting.stopped': reloadMeeting,
+      'transcription.ready': reloadMeeting,
+      'segments.added': event => {
+        if (nextFromRef.current === null) {
+          setSegments(prev => [...prev, ...event.segments]);
+        }
+      },
+      // Refined segments replace the draft ones of their time range, as far
+      // as the transcript is loaded
+      'segments.refined': event => {
+        const loadedTo = nextFromRef.current === null ? Infinity : nextFromRef.current;
+        setSegments(prev => [
+          ...prev.filter(s => s.start < event.start || s.start >= event.end),
+          ...event.segments.filter(s => s.start < loadedTo),
+        ].sort((a, b) => a.start - b.start));
+      },
+      'transcription.refined': () => {
+        reloadMeeting();
+        reloadSegments();
+      },
+      'resync': () => {
+        reloadMeeting();
+        reloadSegments();
+      },
+    }, id);
+  }, [id]);
+
+  const handleTranscriptScroll = (e) => {
+    const el = e.currentTarget;
+    if (el.scrollHeight - el.scrollTop - el.clientHeight < 400) {
+      loadMoreSegments();
     }
   };
 
+  // Build speaker to index map for coloring badges
+  useEffect(() => {
+    const map = {};
+    [...new Set(segments.map(s => s.speaker))].forEach((speaker, idx) => { map[speaker] = idx; });
+    setSpeakerMap(map);
+  }, [segments]);
+
+  // Point the audio element at the recording, it requests the ranges it needs
+  const fetchAudio = () => {
+    setAudio(meetingsApi.getRecordingUrl(id));
+  };
+
   // Fetch audio if recording is ready
   useEffect(() => {
     if (meeting?.recordingReady) {
@@ -84,9 +152,14 @@ const MeetingTranscriptPage = () => {
 
   // Update playing segment based on current audio time
   const handleTimeUpdate = () => {
-    if (!audioRef.current || !meeting?.transcriptionSegments) return;
+    if (!audioRef.current) return;
     const currentTime = audioRef.current.currentTime;
-    const segments = meeting.transcriptionSegments;
+
+    // keep the transcript loaded a little ahead of playback
+    const loadedUntil = segments.length ? segments[segments.length - 1].start : 0;
+    if (currentTime > loadedUntil - 30) {
+      loadMoreSegments();
+    }
 
     let currentIndex = null;
     for (let i = 0; i < segments.length; i++) {
@@ -113,11 +186,10 @@ const MeetingTranscriptPage = () => {
 
   // Group consecutive segments by speaker
   const groupedConsecutiveBySpeaker = () => {
-    if (!meeting?.transcriptionSegments) return [];
     const groups = [];
     let currentGroup = null;
 
-    meeting.transcriptionSegments.forEach((seg, idx) => {
+    segments.forEach((seg, idx) => {
       if (!currentGroup || currentGroup.speaker !== seg.speaker) {
         if (currentGroup) groups.push(currentGroup);
         currentGroup = { speaker: seg.speaker, segments: [] };
@@ -233,14 +305,14 @@ const MeetingTranscriptPage = () => {
                     />
                 )}
 
-                <div style={{
+                <div onScroll={handleTranscriptScroll} style={{
                   maxHeight: '70vh',
                   overflowY: 'auto',
                   border: '1px solid #e9ecef',
                   borderRadius: '4px',
                   padding: '1rem'
                 }}>
-                  {groups.map(({ speaker, segments }, i) => {
+                  {groups.map(({ speaker, segments: groupSegments }, i) => {
                     const speakerNum = speakerMap[speaker] ?? 0;
                     return (
                         <div key={i} style={{ marginBottom: '1.5rem' }}>
@@ -248,12 +320,12 @@ const MeetingTranscriptPage = () => {
                             {renderSpeakerBadge(speaker)}
                             <span className="fw-medium">Speaker {speakerNum + 1}</span>
                           </div>
-                          {segments.map(({ index, start }) => {
+                          {groupSegments.map(({ index, start }) => {
                             const isActive = index === playingSegmentIndex;
                             // Use showTranslated toggle to decide text to show:
                             const displayText = showTranslated
-                                ? meeting.transcriptionSegments[index].trans || ''
-                                : meeting.transcriptionSegments[index].text || '';
+                                ? segments[index].trans || ''
+                                : segments[index].text || '';
 
                             return (
                                 <div
@@ -345,7 +417,9 @@ const MeetingTranscriptPage = () => {
                   <div className="mb-3">
                     <span className="fw-medium text-muted">Transcript:</span><br />
                     <span style={{ color: meeting.transcriptionReady ? '#28a745' : '#6c757d' }}>
-                    {meeting.transcriptionReady ? 'Available' : 'Not Available'}
+                    {meeting.transcriptionReady
+                        ? (meeting.transcriptionRefined ? 'Available (refined)' : 'Available')
+                        : 'Not Available'}
                   </span>
                   </div>
                   {meeting.recordingReady && !audio && (
@@ -0,0 +1,104 @@
+import React, { useState } from "react";
+import { Link } from "react-router-dom";
+import { meetingsApi } from "../services/api";
+
+const formatTime = (seconds) => {
+    const minutes = Math.floor(seconds / 60);
+    const secs = Math.floor(seconds % 60);
+    return `${minutes}:${secs.toString().padStart(2, '0')}`;
+};
+
+const SearchTranscripts = () => {
+    const [query, setQuery] = useState("");
+    const [results, setResults] = useState(null);
+    const [nextOffset, setNextOffset] = useState(null);
+    const [isSearching, setIsSearching] = useState(false);
+
+    const runSearch = async (offset) => {
+        try {
+            setIsSearching(true);
+            const page = await meetingsApi.search(query, offset);
+            setResults(prev => (offset && prev ? [...prev, ...page.results] : page.results));
+            setNextOffset(page.nextOffset);
+        } catch (error) {
+            console.error("Failed to search transcripts", error);
+        } finally {
+            setIsSearching(false);
+        }
+    };
+
+    const handleSubmit = (e) => {
+        e.preventDefault();
+        if (!query.trim()) return;
+        runSearch(0);
+    };
+
+    return (
+        <div className="card">
+            <div className="card-header">
+                <span className="fw-medium">Search Transcripts</span>
+            </div>
+            <div className="card-body">
+                <form onSubmit={handleSubmit} className="d-flex gap-3">
+                    <input
+                        type="search"
+                        className="form-control"
+                        placeholder="Find what was said..."
+                        value={query}
+                        onChange={(e) => setQuery(e.target.value)}
+                        maxLength={200}
+                        style={{ flex: 1 }}
+                    />
+                    <button
+                        type="submit"
+                        className="btn btn-secondary"
+                        disabled={isSearching || !query.trim()}
+                    >
+                        {isSearching ? "Searching..." : "Search"}
+                    </button>
+                </form>
+
+                {results && results.length === 0 && (
+                    <div className="text-center py-4 text-muted">No matches</div>
+                )}
+
+                {results && results.length > 0 && (
+                    <div className="mt-3">
+                        {results.map((result, i) => (
+                            <div key={i} className="mb-3">
+                                <div className="text-sm">
+                                    <Link to={`/transcript/${result.meetingId}`} className="fw-medium">
+                                        {result.meetingTitle || result.meetingId}
+                                    </Link>
+                                    <span className="text-muted">
+                                        {' '}at {formatTime(result.start)}
+                                        {result.speaker ? ` · ${result.speaker}` : ''}
+                                    </span>
+                                </div>
+                                {/* snippets are escaped by the server, only <mark> is added */}
+                                <div
+                                    className="text-sm"
+                                    dangerouslySetInnerHTML={{ __html: result.snippet }}
+                                />
+                            </div>
+                        ))}
+
+                        {nextOffset !== null && (
+                            <div className="text-center">
+                                <button
+                                    className="btn btn-secondary btn-sm"
+                                    onClick={() => runSearch(nextOffset)}
+                                    disabled={isSearching}
+                                >
+                                    More results
+                                </button>
+                            </div>
+                        )}
+                    </div>
+                )}
+            </div>
+        </div>
+    );
+};
+
+export default SearchTranscripts;
@@ -9,6 +9,24 @@ const api = axios.create({
     },
 });
 
+// Subscribes to meeting events pushed by the server, optionally for a single meeting.
+// `handlers` maps event types to callbacks; `open` is called on every (re)connect.
+export function subscribeToEvents(handlers, meetingId = null) {
+    const url = new URL(`${API_BASE_URL}/events`);
+    if (meetingId) url.searchParams.set('meeting_id', meetingId);
+
+    const source = new EventSource(url);
+    Object.entries(handlers).forEach(([type, handler]) => {
+        if (type === 'open') {
+            source.onopen = handler;
+        } else {
+            source.addEventListener(type, e => handler(JSON.parse(e.data)));
+        }
+    });
+
+    return () => source.close();
+}
+
 function getFilenameFromHeader(header) {
     if (!header) return null;
 
@@ -17,10 +35,10 @@ function getFilenameFromHeader(header) {
 }
 
 export const meetingsApi = {
-    // Get all meetings
-    getAllMeetings: async () => {
-        const response = await api.get('/meetings');
-        return response.data;
+    // Get a page of meetings, newest first. Pass the returned cursor to get the next page.
+    getMeetings: async (before = null) => {
+        const response = await api.get('/meetings', {params: before ? {before} : {}});
+        return {meetings: response.data, nextCursor: response.headers['x-next-cursor'] || null};
     },
 
     getMeeting: async (meetingId) => {
@@ -28,9 +46,29 @@ export const meetingsApi = {
         return response.data;
     },
 
-    // Create a new meeting
-    createMeeting: async (title) => {
-        const response = await api.post('/meetings', {title});
+    // Get a page of transcript segments starting at `from` seconds
+    getSegments: async (meetingId, from = 0, limit = 200) => {
+        const response = await api.get(`/meetings/${meetingId}/segments`, {params: {from, limit}});
+        const nextFrom = response.headers['x-next-from'];
+        return {segments: response.data, nextFrom: nextFrom === undefined ? null : Number(nextFrom)};
+    },
+
+    // Search the transcripts of all meetings
+    search: async (q, offset = 0) => {
+        const response = await api.get('/search', {params: {q, offset}});
+        const nextOffset = response.headers['x-next-offset'];
+        return {results: response.data, nextOffset: nextOffset === undefined ? null : Number(nextOffset)};
+    },
+
+    // Create a new meeting, recorded by the given agent or any idle one
+    createMeeting: async (title, agentId = null) => {
+        const response = await api.post('/meetings', agentId ? {title, agentId} : {title});
+        return response.data;
+    },
+
+    // Get the registered agents and whether they are idle, busy or offline
+    getAgents: async () => {
+        const response = await api.get('/agents');
         return response.data;
     },
 
@@ -58,10 +96,9 @@ export const meetingsApi = {
         link.click();
         link.remove();
     },
-    getRecording: async (meetingId) => {
-        const response = await api.get(`/meetings/${meetingId}/recording`, {responseType: "blob"});
-        return new Blob([response.data], {type: response.headers['content-type']})
-    }
+    // The recording is streamed by the audio element itself, which fetches byte ranges as it
+    // plays and seeks instead of downloading the whole file first.
+    getRecordingUrl: (meetingId) => `${API_BASE_URL}/meetings/${meetingId}/recording`
 };
 
 export default api;
\ No newline at end of file
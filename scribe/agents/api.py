@@ -0,0 +1,41 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from scribe.agents.registry import AGENTS_COLLECTION, agent_status
+from scribe.agents.schema import AgentResponse
+from scribe.dependencies import get_database
+
+router = APIRouter(prefix="/agents", tags=["agents"])
+
+
+def agent_helper(agent) -> AgentResponse:
+    meeting_id = agent.get("meetingId")
+
+    return AgentResponse(
+        id=agent["_id"],
+        room=agent.get("room"),
+        host=agent.get("host"),
+        status=agent_status(agent),
+        capabilities=agent.get("capabilities", {}),
+        load=agent.get("load", {}),
+        meetingId=str(meeting_id) if meeting_id else None,
+        startedAt=agent.get("startedAt"),
+        heartbeatAt=agent["heartbeatAt"],
+    )
+
+
+@router.get("", response_model=List[AgentResponse])
+async def list_agents(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    Get the registered agents, by room.
+
+    An agent is `idle` when it can record a meeting, `busy` while it records
+    one and `offline` once it stopped sending heartbeats.
+    """
+
+    agents = (
+        await db[AGENTS_COLLECTION].find().sort([("room", 1), ("_id", 1)]).to_list(None)
+    )
+    return [agent_helper(agent) for agent in agents]
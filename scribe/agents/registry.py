@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from aio_pika.abc import AbstractRobustChannel
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from scribe.events.hub import publish_event
+from scribe.meetings.cache import response_cache
+
+AGENTS_COLLECTION = "agents"
+
+# seconds without a heartbeat after which an agent is taken for dead
+AGENT_TIMEOUT = float(os.environ.get("SCRIBE_AGENT_TIMEOUT", "20"))
+
+# commands of meetings from before agents registered went to every agent
+LEGACY_ROUTING_KEY = "commands"
+
+
+def routing_key(agent_id: str | None) -> str:
+    return f"agents.{agent_id}" if agent_id else LEGACY_ROUTING_KEY
+
+
+def alive_since() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=AGENT_TIMEOUT)
+
+
+def agent_status(agent) -> str:
+    """
+    Returns "idle", "busy" or "offline". An agent that stopped sending
+    heartbeats is offline before the failover has caught up with it.
+    """
+
+    if agent.get("status") != "online" or agent["heartbeatAt"] < alive_since():
+        return "offline"
+
+    if agent.get("meetingId") or agent.get("load", {}).get("recording"):
+        return "busy"
+
+    return "idle"
+
+
+async def reserve_agent(
+    collection: AsyncIOMotorCollection,
+    meeting_id,
+    agent_id: str | None = None,
+    room: str | None = None,
+):
+    """
+    Assigns a meeting to an idle agent and returns the agent, or None when
+    none is available. The reservation is a single conditional update, so
+    two meetings created at once never get the same agent. Without a choice
+    of agent, the one with the least transcription work is taken.
+    """
+
+    query = {
+        "status": "online",
+        "heartbeatAt": {"$gte": alive_since()},
+        "meetingId": None,
+        "load.recording": None,
+    }
+    if agent_id:
+        query["_id"] = agent_id
+    if room:
+        query["room"] = room
+
+    return await collection.find_one_and_update(
+        query,
+        {"$set": {"meetingId": meeting_id, "assignedAt": datetime.utcnow()}},
+        sort=[("load.transcribing", ASCENDING), ("heartbeatAt", DESCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def release_agent(collection: AsyncIOMotorCollection, agent_id: str, meeting_id):
+    await collection.update_one(
+        {"_id": agent_id, "meetingId": meeting_id}, {"$set": {"meetingId": None}}
+    )
+
+
+async def fail_over(db: AsyncIOMotorDatabase, channel: AbstractRobustChannel) -> int:
+    """
+    Takes agents that stopped sending heartbeats offline and stops the
+    meetings they were recording, flagged with `agentLost`, so they do not
+    stay in progress forever. Returns the number of agents taken offline.
+
+    Every server runs this; the updates are conditional on the heartbeat that
+    was found stale, so an agent is only failed over once, and not at all if
+    it came back in between.
+    """
+
+    agents = db[AGENTS_COLLECTION]
+    lost = 0
+
+    async for agent in agents.find(
+        {"status": "online", "heartbeatAt": {"$lt": alive_since()}}
+    ):
+        result = await agents.update_one(
+            {"_id": agent["_id"], "heartbeatAt": agent["heartbeatAt"]},
+            {"$set": {"status": "offline", "meetingId": None}},
+        )
+        if not result.modified_count:
+            continue
+
+        lost += 1
+        logging.warning(
+            f"agent {agent['_id']} missed its heartbeats since {agent['heartbeatAt']}"
+        )
+
+        meeting_id = agent.get("meetingId")
+        if not meeting_id:
+            continue
+
+        result = await db["meetings"].update_one(
+            {"_id": meeting_id, "stoppedAt": None},
+            {"$set": {"stoppedAt": agent["heartbeatAt"], "agentLost": True}},
+        )
+        if result.modified_count:
+            logging.warning(f"stopped meeting {meeting_id}, its agent is gone")
+            response_cache.invalidate_meeting(str(meeting_id))
+            await publish_event(
+                channel,
+                "meeting.stopped",
+                meeting_id,
+                stoppedAt=agent["heartbeatAt"].isoformat(),
+                agentLost=True,
+            )
+
+    return lost
+
+
+async def watch_agents(db: AsyncIOMotorDatabase, channel: AbstractRobustChannel):
+    while True:
+        await asyncio.sleep(AGENT_TIMEOUT / 4)
+        try:
+            await fail_over(db, channel)
+        except Exception as e:
+            logging.warning(f"agent failover failed: {e}")
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class AgentResponse(BaseModel):
+    id: str
+    room: str | None = None
+    host: str | None = None
+    status: str
+    capabilities: dict = {}
+    load: dict = {}
+    meetingId: str | None = None
+    startedAt: datetime | None = None
+    heartbeatAt: datetime
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "room-4b",
+                "room": "4B",
+                "host": "scribe-4b",
+                "status": "busy",
+                "capabilities": {
+                    "transcription": "live",
+                    "audioFormat": "flac",
+                    "maxMeetings": 1,
+                },
+                "load": {"recording": "507f1f77bcf86cd799439011", "transcribing": 0},
+                "meetingId": "507f1f77bcf86cd799439011",
+                "startedAt": "2024-01-15T08:00:00Z",
+                "heartbeatAt": "2024-01-15T10:12:05Z",
+            }
+        }
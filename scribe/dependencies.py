@@ -3,6 +3,8 @@ from aio_pika.abc import AbstractRobustChannel
 from fastapi import Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
 
+from scribe.events.hub import EventHub
+
 
 def get_database(request: fastapi.Request) -> AsyncIOMotorDatabase:
     if not request.app.state.mongo_client:
@@ -18,5 +20,12 @@ def get_rabbitmq_channel(request: fastapi.Request) -> AbstractRobustChannel:
     return request.app.state.rabbitmq_chan
 
 
+def get_event_hub(request: fastapi.Request) -> EventHub:
+    if not request.app.state.events:
+        raise RuntimeError("event hub not started")
+
+    return request.app.state.events
+
+
 async def get_audio_bucket(db: AsyncIOMotorDatabase = Depends(get_database)):
     return AsyncIOMotorGridFSBucket(db, bucket_name="scribe.audios")
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from starlette.responses import StreamingResponse
+
+from scribe.dependencies import get_event_hub
+from scribe.events.hub import EventHub
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+
+@router.get("")
+async def stream_events(
+    meeting_id: Optional[str] = None,
+    hub: EventHub = Depends(get_event_hub),
+):
+    """
+    Stream meeting events as server-sent events.
+
+    - **meeting_id**: Only stream the events of this meeting
+
+    Events are `meeting.created`, `meeting.started`, `meeting.stopped`,
+    `meeting.deleted`, `segments.added`, `transcription.ready`,
+    `segments.refined` and `transcription.refined`, each with the `meetingId`
+    it is about. `segments.refined` replaces the segments from `start` to
+    `end` with its `segments`. `resync` is sent when the client fell behind
+    and should reload what it shows.
+    """
+
+    queue = hub.subscribe(meeting_id)
+
+    async def stream():
+        try:
+            # tells EventSource to wait a few seconds before reconnecting
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(queue)
+
+    headers = {"cache-control": "no-cache", "x-accel-buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage, AbstractRobustChannel
+
+from scribe.metrics.collectors import AMQP_PUBLISH_FAILURES, AMQP_PUBLISH_SECONDS
+
+# meeting and transcript updates from the agents and the server itself
+EVENTS_EXCHANGE = "scribe-events"
+
+# events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+async def publish_event(
+    channel: AbstractRobustChannel, event_type: str, meeting_id, **data
+):
+    """
+    Publishes an event about a meeting. Events only drive UI updates, so a
+    failure to publish is logged and otherwise ignored.
+    """
+
+    body = {"type": event_type, "meetingId": str(meeting_id), **data}
+    try:
+        with AMQP_PUBLISH_SECONDS.labels("event").time():
+            exchange = await channel.get_exchange(EVENTS_EXCHANGE, ensure=False)
+            await exchange.publish(
+                aio_pika.Message(
+                    json.dumps(body, default=str).encode(),
+                    content_type="application/json",
+                ),
+                routing_key=event_type,
+            )
+    except Exception as e:
+        AMQP_PUBLISH_FAILURES.labels("event").inc()
+        logging.warning(f"cannot publish {event_type} event: {e}")
+
+
+class EventHub:
+    """
+    Fans events out to every connected client of this server process.
+
+    The hub holds a single exclusive queue bound to the events exchange,
+    however many clients are subscribed. Each subscriber gets its own bounded
+    queue; a subscriber that falls too far behind loses its pending events and
+    is sent a single "resync" event instead, so it can reload rather than
+    hold memory.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._listeners = []
+
+    async def start(self, channel: AbstractRobustChannel):
+        exchange = await channel.declare_exchange(
+            EVENTS_EXCHANGE, "topic", durable=True, auto_delete=False
+        )
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange, "#")
+        await queue.consume(self._on_message, no_ack=True)
+
+        logging.info("listening for meeting events")
+
+    def subscribe(self, meeting_id: str | None = None) -> asyncio.Queue:
+        """
+        Returns a queue receiving every event, or only the events of one
+        meeting. It has to be passed to `unsubscribe` once the client is gone.
+        """
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[queue] = meeting_id
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def add_listener(self, listener):
+        """
+        Calls `listener` with every event, before it reaches the subscribers.
+        """
+
+        self._listeners.append(listener)
+
+    def publish(self, event: dict):
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.error(f"event listener failed: {e}", exc_info=e)
+
+        for queue, meeting_id in self._subscribers.items():
+            if meeting_id and event.get("meetingId") != meeting_id:
+                continue
+
+            if queue.full():
+                # the client reloads on resync, what it has not read is moot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+                continue
+
+            queue.put_nowait(event)
+
+    async def _on_message(self, message: AbstractIncomingMessage):
+        try:
+            event = json.loads(message.body.decode())
+        except ValueError as e:
+            logging.warning(f"dropping malformed event: {e}")
+            return
+
+        self.publish(event)
@@ -2,21 +2,52 @@ import json
 import logging
 import time
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import aio_pika
 from aio_pika.abc import AbstractRobustChannel
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
 from motor.motor_asyncio import (
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection,
     AsyncIOMotorGridFSBucket,
 )
-from starlette.responses import StreamingResponse
+from starlette.responses import Response, StreamingResponse
 
+from scribe.agents.registry import (
+    AGENTS_COLLECTION,
+    release_agent,
+    reserve_agent,
+    routing_key,
+)
 from scribe.dependencies import get_database, get_rabbitmq_channel, get_audio_bucket
-from scribe.meetings.schema import MeetingResponse, MeetingCreate, MeetingModel
+from scribe.events.hub import publish_event
+from scribe.meetings.audio import (
+    DOWNLOAD_FORMATS,
+    clip,
+    negotiate,
+    recording_duration,
+    stored_media_type,
+    transcode,
+)
+from scribe.meetings.cache import response_cache
+from scribe.meetings.ranges import (
+    RangeNotSatisfiable,
+    etag_matches,
+    if_range_matches,
+    parse_ranges,
+    range_response,
+    recording_etag,
+)
+from scribe.meetings.schema import (
+    MeetingResponse,
+    MeetingCreate,
+    MeetingModel,
+    SegmentResponse,
+)
+from scribe.metrics.collectors import AMQP_PUBLISH_FAILURES, AMQP_PUBLISH_SECONDS
+from scribe.serialization import dumps, json_array
 
 # Create router for meetings
 router = APIRouter(
@@ -28,6 +59,42 @@ router = APIRouter(
 # Database configuration
 COLLECTION_NAME = "meetings"
 
+# longest clip that can be cut out of a recording, in seconds
+CLIP_MAX_DURATION = 600
+
+# fields the meeting list needs, transcripts are only loaded for single meetings
+LIST_PROJECTION = {
+    "title": 1,
+    "startedAt": 1,
+    "stoppedAt": 1,
+    "recordingReady": 1,
+    "transcriptionReady": 1,
+    "transcriptionRefined": 1,
+    "agentId": 1,
+    "agentLost": 1,
+}
+
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+
+SEGMENTS_COLLECTION = "segments"
+
+SEGMENTS_DEFAULT_LIMIT = 200
+SEGMENTS_MAX_LIMIT = 1000
+
+# fields of a stored segment that are returned
+SEGMENT_PROJECTION = {
+    "_id": 0,
+    "start": 1,
+    "end": 1,
+    "text": 1,
+    "trans": 1,
+    "speaker": 1,
+    "lang": 1,
+    "version": 1,
+}
+SEGMENT_FIELDS = [field for field, shown in SEGMENT_PROJECTION.items() if shown]
+
 
 # Dependency to get meetings collection
 async def get_meetings_collection(db: AsyncIOMotorDatabase = Depends(get_database)):
@@ -36,108 +103,217 @@ async def get_meetings_collection(db: AsyncIOMotorDatabase = Depends(get_databas
 
 
 # Helper function to convert MongoDB document to response model
-def meeting_helper(meeting, full_model=False) -> MeetingResponse:
+def meeting_helper(meeting) -> MeetingResponse:
     """Convert MongoDB document to MeetingResponse model."""
 
-    resp = MeetingResponse(
+    return MeetingResponse(
         id=str(meeting["_id"]),
         title=meeting["title"],
         startedAt=meeting["startedAt"],
         stoppedAt=meeting.get("stoppedAt"),
         recordingReady=meeting.get("recordingReady", False),
         transcriptionReady=meeting.get("transcriptionReady", False),
+        transcriptionRefined=meeting.get("transcriptionRefined", False),
+        agentId=meeting.get("agentId"),
+        agentLost=meeting.get("agentLost", False),
     )
 
-    if full_model:
-        resp.transcriptionSegments = meeting.get("transcriptionSegments", [])
 
-    return resp
+def meeting_document(meeting) -> dict:
+    """
+    Shapes a MongoDB document like MeetingResponse, without building the
+    model, for responses serialized with `dumps`.
+    """
+
+    return {
+        "id": str(meeting["_id"]),
+        "title": meeting["title"],
+        "startedAt": meeting["startedAt"],
+        "stoppedAt": meeting.get("stoppedAt"),
+        "recordingReady": meeting.get("recordingReady", False),
+        "transcriptionReady": meeting.get("transcriptionReady", False),
+        "transcriptionRefined": meeting.get("transcriptionRefined", False),
+        "agentId": meeting.get("agentId"),
+        "agentLost": meeting.get("agentLost", False),
+    }
+
+
+def segment_document(segment) -> dict:
+    """Shapes a stored segment like SegmentResponse."""
+
+    return {field: segment.get(field) for field in SEGMENT_FIELDS}
+
+
+async def publish_command(
+    channel: AbstractRobustChannel, cmd: str, meeting_id, agent_id=None, **data
+):
+    """
+    Sends a command to the agent the meeting is assigned to. The time it was
+    sent goes along, for the agent to measure how long commands take to
+    reach it.
+    """
+
+    command = {"meeting_id": str(meeting_id), "cmd": cmd, "sentAt": time.time(), **data}
+    try:
+        with AMQP_PUBLISH_SECONDS.labels("command").time():
+            exchange = await channel.get_exchange("scribe-commands")
+            await exchange.publish(
+                aio_pika.Message(json.dumps(command).encode()),
+                routing_key=routing_key(agent_id),
+            )
+    except Exception:
+        AMQP_PUBLISH_FAILURES.labels("command").inc()
+        raise
+
+
+def encode_cursor(meeting) -> str:
+    return f"{meeting['startedAt'].isoformat()}_{meeting['_id']}"
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Turns a cursor into the filter for the meetings that come after it, in
+    (startedAt, _id) descending order.
+    """
+
+    started_at, _, meeting_id = cursor.rpartition("_")
+    try:
+        started_at = datetime.fromisoformat(started_at)
+    except ValueError:
+        started_at = None
+
+    if started_at is None or not ObjectId.is_valid(meeting_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    return {
+        "$or": [
+            {"startedAt": {"$lt": started_at}},
+            {"startedAt": started_at, "_id": {"$lt": ObjectId(meeting_id)}},
+        ]
+    }
 
 
 # Routes
 @router.get("", response_model=List[MeetingResponse])
 async def list_meetings(
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    before: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
     collection: AsyncIOMotorCollection = Depends(get_meetings_collection),
 ):
     """
-    Get all meetings.
+    Get meetings, ordered by startedAt descending.
+
+    - **limit**: Number of meetings to return
+    - **before**: Cursor of the last meeting of the previous page
 
-    Returns a list of all meetings in the database, ordered by startedAt descending.
+    When there are more meetings, the cursor of the next page is returned in
+    the `X-Next-Cursor` header.
     """
+    key = ("list", None, limit, before)
+    cached = response_cache.get(key)
+    if cached:
+        return cached.respond(if_none_match)
+
+    generation = response_cache.generation
+    query = decode_cursor(before) if before else {}
+
     try:
-        cursor = collection.find().sort("startedAt", -1)
-        meetings = await cursor.to_list(length=None)
-        return [meeting_helper(meeting) for meeting in meetings]
+        cursor = (
+            collection.find(query, LIST_PROJECTION)
+            .sort([("startedAt", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        meetings = await cursor.to_list(length=limit + 1)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve meetings: {str(e)}",
         )
 
+    headers = {}
+    if len(meetings) > limit:
+        meetings = meetings[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(meetings[-1])
+
+    body = dumps([meeting_document(meeting) for meeting in meetings])
+    return response_cache.put(key, body, headers, generation).respond(if_none_match)
+
 
 @router.post("", response_model=MeetingResponse, status_code=status.HTTP_201_CREATED)
 async def create_meeting(
     meeting_data: MeetingCreate,
     collection=Depends(get_meetings_collection),
+    db: AsyncIOMotorDatabase = Depends(get_database),
     channel: AbstractRobustChannel = Depends(get_rabbitmq_channel),
 ):
     """
     Create a new meeting and start recording immediately.
 
     - **title**: The meeting title (required)
+    - **agentId**: The agent to record the meeting, optional
+    - **room**: The room to record the meeting in, optional
     - **startedAt**: Set to current time automatically
     - **stoppedAt**: Initially null (meeting is active)
     - **recordingReady**: Initially false
     - **transcriptionReady**: Initially false
 
-    Returns the created meeting with its ID.
+    The meeting is assigned to an idle agent, the requested one or one in the
+    requested room if given. Returns the created meeting with its ID, or 409
+    when no agent is available.
     """
+    agents = db[AGENTS_COLLECTION]
     try:
-        active_meeting = await collection.find_one({"stoppedAt": None})
-        if active_meeting:
+        meeting_id = ObjectId()
+        agent = await reserve_agent(
+            agents, meeting_id, meeting_data.agentId, meeting_data.room
+        )
+        if not agent:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail="Cannot start a new meeting while another meeting is in progress",
+                detail="No agent is available to record the meeting",
             )
 
         # Create meeting document
         meeting_dict = {
+            "_id": meeting_id,
             "title": meeting_data.title,
             "startedAt": datetime.utcnow(),
             "stoppedAt": None,
             "recordingReady": False,
             "transcriptionReady": False,
+            "agentId": agent["_id"],
         }
 
         # Insert into database
-        result = await collection.insert_one(meeting_dict)
-
-        # Get the created meeting
-        created_meeting = await collection.find_one({"_id": result.inserted_id})
-
-        if not created_meeting:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to retrieve created meeting",
-            )
+        try:
+            await collection.insert_one(meeting_dict)
+        except Exception:
+            await release_agent(agents, agent["_id"], meeting_id)
+            raise
 
-        new_meeting = meeting_helper(created_meeting)
+        new_meeting = meeting_helper(meeting_dict)
 
         try:
-            command = json.dumps({"meeting_id": new_meeting.id, "cmd": "start"})
-            exchange = await channel.get_exchange("scribe-commands")
-            await exchange.publish(
-                aio_pika.Message(command.encode()),
-                routing_key="commands",
-            )
+            await publish_command(channel, "start", meeting_id, agent["_id"])
         except Exception as e:
-            await collection.delete_one({"_id": new_meeting.id})
+            await collection.delete_one({"_id": meeting_id})
+            await release_agent(agents, agent["_id"], meeting_id)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
             )
 
+        response_cache.invalidate_meeting(new_meeting.id)
+        await publish_event(
+            channel, "meeting.created", new_meeting.id, agentId=agent["_id"]
+        )
+
         return new_meeting
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -179,13 +355,9 @@ async def stop_meeting(
             )
 
         meeting = meeting_helper(meeting)
+        response_cache.invalidate_meeting(meeting.id)
         try:
-            command = json.dumps({"meeting_id": meeting.id, "cmd": "stop"})
-            exchange = await channel.get_exchange("scribe-commands")
-            await exchange.publish(
-                aio_pika.Message(command.encode()),
-                routing_key="commands",
-            )
+            await publish_command(channel, "stop", meeting.id, meeting.agentId)
         except Exception as e:
             logging.error(f"cannot emit stop command: {e}")
             raise HTTPException(
@@ -203,8 +375,53 @@ async def stop_meeting(
         )
 
 
+@router.post("/{meeting_id}/profile", status_code=status.HTTP_202_ACCEPTED)
+async def profile_meeting(
+    meeting_id: str,
+    enabled: bool = True,
+    collection=Depends(get_meetings_collection),
+    channel: AbstractRobustChannel = Depends(get_rabbitmq_channel),
+):
+    """
+    Switch the sampling profiler of the agent on or off for a meeting.
+
+    - **enabled**: Whether to profile the meeting
+
+    The agent samples its threads while the meeting is recorded and
+    transcribed, including when profiling is switched on halfway, and writes
+    the profile into its `SCRIBE_PROFILE_DIR` once done.
+    """
+    if not ObjectId.is_valid(meeting_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meeting ID format"
+        )
+
+    meeting = await collection.find_one({"_id": ObjectId(meeting_id)}, {"agentId": 1})
+    if not meeting:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
+        )
+
+    try:
+        await publish_command(
+            channel, "profile", meeting_id, meeting.get("agentId"), enabled=enabled
+        )
+    except Exception as e:
+        logging.error(f"cannot emit profile command: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+    return {"meetingId": meeting_id, "profiling": enabled}
+
+
 @router.delete("/{meeting_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_meeting(meeting_id: str, collection=Depends(get_meetings_collection)):
+async def delete_meeting(
+    meeting_id: str,
+    collection=Depends(get_meetings_collection),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    channel: AbstractRobustChannel = Depends(get_rabbitmq_channel),
+):
     """
     Delete a meeting.
 
@@ -226,6 +443,10 @@ async def delete_meeting(meeting_id: str, collection=Depends(get_meetings_collec
                 status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
             )
 
+        await db[SEGMENTS_COLLECTION].delete_many({"meeting_id": ObjectId(meeting_id)})
+        response_cache.invalidate_meeting(meeting_id)
+        await publish_event(channel, "meeting.deleted", meeting_id)
+
         # Return 204 No Content (successful deletion)
         return None
 
@@ -240,11 +461,16 @@ async def delete_meeting(meeting_id: str, collection=Depends(get_meetings_collec
 
 # Additional utility endpoints
 @router.get("/{meeting_id}", response_model=MeetingResponse)
-async def get_meeting(meeting_id: str, collection=Depends(get_meetings_collection)):
+async def get_meeting(
+    meeting_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    collection=Depends(get_meetings_collection),
+):
     """
     Get a specific meeting by ID.
 
-    Returns the meeting details if found.
+    Returns the meeting details if found. The transcript is served by
+    `/meetings/{id}/segments`.
     """
     # Validate ObjectId
     if not ObjectId.is_valid(meeting_id):
@@ -252,15 +478,25 @@ async def get_meeting(meeting_id: str, collection=Depends(get_meetings_collectio
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meeting ID format"
         )
 
+    key = ("meeting", meeting_id)
+    cached = response_cache.get(key)
+    if cached:
+        return cached.respond(if_none_match)
+
+    generation = response_cache.generation
     try:
-        meeting = await collection.find_one({"_id": ObjectId(meeting_id)})
+        meeting = await collection.find_one(
+            {"_id": ObjectId(meeting_id)}, LIST_PROJECTION
+        )
 
         if not meeting:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
             )
 
-        return meeting_helper(meeting, full_model=True)
+        body = dumps(meeting_document(meeting))
+        entry = response_cache.put(key, body, generation=generation)
+        return entry.respond(if_none_match)
 
     except HTTPException:
         raise
@@ -271,12 +507,152 @@ async def get_meeting(meeting_id: str, collection=Depends(get_meetings_collectio
         )
 
 
+@router.get("/{meeting_id}/segments", response_model=List[SegmentResponse])
+async def get_segments(
+    meeting_id: str,
+    start: float = Query(0.0, alias="from", ge=0),
+    to: Optional[float] = Query(None, gt=0),
+    limit: int = Query(SEGMENTS_DEFAULT_LIMIT, ge=1, le=SEGMENTS_MAX_LIMIT),
+    if_none_match: Optional[str] = Header(default=None),
+    collection=Depends(get_meetings_collection),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Get the transcript segments of a meeting that start in a time window.
+
+    - **from**: Segments starting at or after this many seconds
+    - **to**: Segments starting before this many seconds
+    - **limit**: Number of segments to return
+
+    Segments are ordered by start time. When the window holds more segments,
+    the `from` of the next page is returned in the `X-Next-From` header.
+    """
+    if not ObjectId.is_valid(meeting_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meeting ID format"
+        )
+
+    key = ("segments", meeting_id, start, to, limit)
+    cached = response_cache.get(key)
+    if cached:
+        return cached.respond(if_none_match)
+
+    generation = response_cache.generation
+
+    # an empty slice tells whether the meeting still has an embedded transcript
+    # without loading it
+    meeting = await collection.find_one(
+        {"_id": ObjectId(meeting_id)}, {"transcriptionSegments": {"$slice": 0}}
+    )
+    if not meeting:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
+        )
+
+    if "transcriptionSegments" in meeting:
+        segments = await legacy_segments(collection, meeting["_id"], start, to)
+        segments = segments[: limit + 1]
+    else:
+        query = {"meeting_id": meeting["_id"], "start": {"$gte": start}}
+        if to is not None:
+            query["start"]["$lt"] = to
+
+        cursor = (
+            db[SEGMENTS_COLLECTION]
+            .find(query, SEGMENT_PROJECTION)
+            .sort("start", 1)
+            .limit(limit + 1)
+        )
+        segments = await cursor.to_list(length=limit + 1)
+
+    headers = {}
+    if len(segments) > limit:
+        headers["X-Next-From"] = str(segments[limit]["start"])
+        segments = segments[:limit]
+
+    body = dumps([segment_document(segment) for segment in segments])
+    return response_cache.put(key, body, headers, generation).respond(if_none_match)
+
+
+@router.get("/{meeting_id}/transcript", response_model=List[SegmentResponse])
+async def get_transcript(
+    meeting_id: str,
+    collection=Depends(get_meetings_collection),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Get every transcript segment of a meeting, ordered by start time.
+
+    The segments are streamed from the database as a JSON array while they
+    are read, for exports of long meetings.
+    """
+    if not ObjectId.is_valid(meeting_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meeting ID format"
+        )
+
+    meeting = await collection.find_one(
+        {"_id": ObjectId(meeting_id)}, {"transcriptionSegments": {"$slice": 0}}
+    )
+    if not meeting:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
+        )
+
+    if "transcriptionSegments" in meeting:
+        legacy = await legacy_segments(collection, meeting["_id"], 0.0, None)
+
+        async def stored():
+            for segment in legacy:
+                yield segment
+
+        segments = stored()
+    else:
+        segments = (
+            db[SEGMENTS_COLLECTION]
+            .find({"meeting_id": meeting["_id"]}, SEGMENT_PROJECTION)
+            .sort("start", 1)
+        )
+
+    return StreamingResponse(
+        json_array(segments, segment_document), media_type="application/json"
+    )
+
+
+async def legacy_segments(collection, meeting_id, start, to):
+    """
+    Reads segments from the array meetings stored before segments had their
+    own collection.
+    """
+
+    meeting = await collection.find_one(
+        {"_id": meeting_id}, {"transcriptionSegments": 1}
+    )
+    return [
+        seg
+        for seg in meeting.get("transcriptionSegments") or []
+        if seg["start"] >= start and (to is None or seg["start"] < to)
+    ]
+
+
 @router.get("/{meeting_id}/recording")
 async def download_recording(
     meeting_id: str,
+    accept: Optional[str] = Header(default=None),
+    range_header: Optional[str] = Header(default=None, alias="range"),
+    if_range: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
     bucket: AsyncIOMotorGridFSBucket = Depends(get_audio_bucket),
     collection=Depends(get_meetings_collection),
 ):
+    """
+    Download a meeting recording.
+
+    The recording is served in the format it is stored in, unless the `Accept`
+    header prefers WAV, FLAC or Ogg/Opus, in which case it is transcoded while
+    it is streamed. Stored recordings support single and multiple byte ranges,
+    `If-Range` and `If-None-Match`; transcoded ones are always sent whole.
+    """
 
     meeting = await collection.find_one({"_id": ObjectId(meeting_id)})
     if not meeting:
@@ -296,9 +672,99 @@ async def download_recording(
         logging.error(f"failed to download recording: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR) from e
 
+    stored = stored_media_type(grid_out.metadata)
+    media_type = negotiate(accept, stored)
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Recording is available as {', '.join(DOWNLOAD_FORMATS)}",
+        )
+
+    etag = recording_etag(grid_out, media_type)
+    headers = {"etag": etag, "vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    extension = DOWNLOAD_FORMATS.get(media_type, {}).get("extension", "bin")
+    headers["content-disposition"] = (
+        f'attachment; filename="meeting_{meeting.title}_{int(time.time())}.{extension}"'
+    )
+
+    if media_type != stored:
+        headers["accept-ranges"] = "none"
+        headers["content-type"] = media_type
+        return StreamingResponse(transcode(grid_out, media_type), headers=headers)
+
+    headers["accept-ranges"] = "bytes"
+    if if_range_matches(if_range, etag):
+        try:
+            ranges = parse_ranges(range_header, grid_out.length)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"content-range": f"bytes */{grid_out.length}", **headers},
+            )
+
+        if ranges:
+            return range_response(grid_out, ranges, media_type, headers)
+
+    headers["content-type"] = media_type
+    headers["content-length"] = str(grid_out.length)
+    return StreamingResponse(grid_out, headers=headers)
+
+
+@router.get("/{meeting_id}/recording/clip")
+async def download_clip(
+    meeting_id: str,
+    start: float = Query(..., ge=0),
+    end: float = Query(..., gt=0),
+    bucket: AsyncIOMotorGridFSBucket = Depends(get_audio_bucket),
+    collection=Depends(get_meetings_collection),
+):
+    """
+    Download `start` to `end` seconds of a meeting recording as a WAV file.
+
+    Only the part of the recording that covers the clip is read.
+    """
+
+    if end <= start or end - start > CLIP_MAX_DURATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Clips must end after they start and be at most {CLIP_MAX_DURATION} seconds long",
+        )
+
+    if not ObjectId.is_valid(meeting_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meeting ID format"
+        )
+
+    meeting = await collection.find_one(
+        {"_id": ObjectId(meeting_id)},
+        {"title": 1, "recordingReady": 1, "recordingFile": 1},
+    )
+    if not meeting or not meeting.get("recordingReady"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Meeting recording not found"
+        )
+
+    try:
+        grid_out = await bucket.open_download_stream(meeting["recordingFile"])
+    except Exception as e:
+        logging.error(f"failed to download recording: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR) from e
+
+    end = min(end, recording_duration(grid_out))
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Clip starts after the end of the recording",
+        )
+
+    size, body = clip(grid_out, start, end)
     headers = {
-        "content-disposition": f'attachment; filename="meeting_{meeting.title}_{int(time.time())}.wav"',
+        "content-disposition": f'attachment; filename="meeting_{meeting["title"]}_{start:g}-{end:g}.wav"',
         "content-type": "audio/wav",
+        "content-length": str(size),
     }
 
-    return StreamingResponse(grid_out, headers=headers)
+    return StreamingResponse(body, headers=headers)
@@ -0,0 +1,282 @@
+import asyncio
+import bisect
+import logging
+import struct
+
+from scribe.meetings.ranges import read_range
+
+WAV_HEADER_SIZE = 44
+
+# decoding starts this many seconds before a clip, lossy decoders need a few
+# packets to converge
+DECODER_PREROLL = 0.1
+
+# formats a recording can be downloaded in, with the ffmpeg output arguments
+# used to transcode into them
+DOWNLOAD_FORMATS = {
+    "audio/wav": {
+        "format": "WAV",
+        "extension": "wav",
+        "ffmpeg": ["-c:a", "pcm_s16le", "-f", "wav"],
+    },
+    "audio/flac": {
+        "format": "FLAC",
+        "extension": "flac",
+        "ffmpeg": ["-c:a", "flac", "-f", "flac"],
+    },
+    "audio/ogg": {
+        "format": "OPUS",
+        "extension": "opus",
+        "ffmpeg": ["-c:a", "libopus", "-b:a", "32k", "-f", "ogg"],
+    },
+}
+
+# other names clients use for the same formats
+MEDIA_TYPE_ALIASES = {
+    "audio/x-wav": "audio/wav",
+    "audio/wave": "audio/wav",
+    "audio/vnd.wave": "audio/wav",
+    "audio/x-flac": "audio/flac",
+    "audio/opus": "audio/ogg",
+}
+
+READ_SIZE = 255 * 1024
+
+
+def stored_media_type(metadata) -> str:
+    """
+    Returns the media type of a stored recording. Recordings from before
+    compression was supported have no format in their metadata and are WAV.
+    """
+
+    stored = (metadata or {}).get("format", "WAV")
+    for media_type, download in DOWNLOAD_FORMATS.items():
+        if download["format"] == stored:
+            return media_type
+
+    return "application/octet-stream"
+
+
+def negotiate(accept: str | None, stored: str) -> str | None:
+    """
+    Picks the media type a recording is served in from an `Accept` header.
+    The stored format is served whenever it is acceptable, so it can be
+    seeked into with ranges, unless the client names it and names another
+    format with a higher quality. Browsers accept `audio/*` below the types
+    they list, which does not count. Returns None if no acceptable format can
+    be produced.
+    """
+
+    if not accept:
+        return stored
+
+    preferences = {}
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        media_type = MEDIA_TYPE_ALIASES.get(media_type.lower(), media_type.lower())
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        preferences[media_type] = max(quality, preferences.get(media_type, 0.0))
+
+    def quality_of(media_type):
+        for candidate in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+            if candidate in preferences:
+                return preferences[candidate]
+        return 0.0
+
+    quality = quality_of(stored)
+    if quality > 0:
+        if stored not in preferences:
+            return stored
+
+        preferred = [t for t in DOWNLOAD_FORMATS if preferences.get(t, 0.0) > quality]
+        return max(preferred, key=preferences.get) if preferred else stored
+
+    others = [t for t in DOWNLOAD_FORMATS if t != stored]
+    best = max(others, key=quality_of)
+    if quality_of(best) <= 0:
+        return None
+
+    return best
+
+
+async def transcode(grid_out, media_type):
+    """
+    Streams a recording converted to `media_type`. GridFS chunks are piped
+    into ffmpeg while its output is yielded, so neither side of the
+    conversion is ever held in memory.
+    """
+
+    async for data in ffmpeg_pipe(
+        _read_chunks(grid_out), DOWNLOAD_FORMATS[media_type]["ffmpeg"]
+    ):
+        yield data
+
+
+def wav_header(data_size, sample_rate, channels, sample_width=2) -> bytes:
+    byte_rate = sample_rate * channels * sample_width
+
+    header = struct.pack("<4sL4s", b"RIFF", 36 + data_size, b"WAVE")
+    header += struct.pack("<4sL", b"fmt ", 16)
+    header += struct.pack(
+        "<HHLLHH",
+        1,
+        channels,
+        sample_rate,
+        byte_rate,
+        channels * sample_width,
+        sample_width * 8,
+    )
+    header += struct.pack("<4sL", b"data", data_size)
+
+    return header
+
+
+def recording_duration(grid_out) -> float:
+    metadata = grid_out.metadata or {}
+    if metadata.get("duration") is not None:
+        return metadata["duration"]
+
+    # WAV recordings from before the duration was stored
+    byte_rate = metadata.get("sample_rate", 16000) * metadata.get("channels", 1) * 2
+    return (grid_out.length - metadata.get("data_offset", WAV_HEADER_SIZE)) / byte_rate
+
+
+def clip(grid_out, start, end):
+    """
+    Cuts `start` to `end` seconds out of a recording as a standalone WAV file
+    and returns its size and an iterator over its bytes.
+
+    WAV recordings map times straight to byte offsets. Compressed recordings
+    use the seek index stored with them: only the stream headers and the
+    frames between the index entries around the clip are read and decoded,
+    and the decoded audio is trimmed to the exact sample.
+    """
+
+    metadata = grid_out.metadata or {}
+    sample_rate = metadata.get("sample_rate", 16000)
+    channels = metadata.get("channels", 1)
+    block_align = channels * 2
+
+    samples = max(round((end - start) * sample_rate), 0)
+    data_size = samples * block_align
+    header = wav_header(data_size, sample_rate, channels)
+
+    if metadata.get("format", "WAV") == "WAV":
+        first = metadata.get("data_offset", WAV_HEADER_SIZE)
+        first += round(start * sample_rate) * block_align
+        audio = read_range(grid_out, first, first + data_size - 1)
+    else:
+        # recordings that were never finalized have no index, and are decoded
+        # from the start
+        index = metadata.get("seek_index") or [[0.0, 0]]
+        header_size = metadata.get("header_size") or 0
+        times = [seconds for seconds, _ in index]
+
+        i = max(bisect.bisect_right(times, start - DECODER_PREROLL) - 1, 0)
+        j = bisect.bisect_left(times, end)
+        first_time, first = index[i]
+        last = index[j][1] - 1 if j < len(index) else grid_out.length - 1
+
+        async def source():
+            if header_size and first > 0:
+                async for data in read_range(grid_out, 0, header_size - 1):
+                    yield data
+            async for data in read_range(grid_out, first, last):
+                yield data
+
+        decoded = ffmpeg_pipe(
+            source(),
+            ["-f", "s16le", "-ac", str(channels), "-ar", str(sample_rate)],
+        )
+        skip = round((start - first_time) * sample_rate) * block_align
+        audio = _slice(decoded, skip, data_size)
+
+    async def body():
+        yield header
+        sent = 0
+        async for data in audio:
+            sent += len(data)
+            yield data
+
+        # keep the body as long as its header says, should decoding come short
+        if sent < data_size:
+            yield bytes(data_size - sent)
+
+    return len(header) + data_size, body()
+
+
+async def _slice(stream, skip, size):
+    try:
+        async for data in stream:
+            if skip >= len(data):
+                skip -= len(data)
+                continue
+
+            data = data[skip : skip + size]
+            skip = 0
+            size -= len(data)
+            yield data
+
+            if size <= 0:
+                break
+    finally:
+        await stream.aclose()
+
+
+async def _read_chunks(grid_out):
+    while chunk := await grid_out.readchunk():
+        yield chunk
+
+
+async def ffmpeg_pipe(source, output_args):
+    """
+    Pipes the bytes of an async iterator through ffmpeg and yields its output
+    as it is produced.
+    """
+
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        *output_args,
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+    async def feed():
+        try:
+            async for chunk in source:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while data := await process.stdout.read(READ_SIZE):
+            yield data
+
+        await feeder
+        code = await process.wait()
+        if code != 0:
+            logging.error(f"ffmpeg {' '.join(output_args)} exited with {code}")
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
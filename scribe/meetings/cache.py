@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+from starlette.responses import Response
+
+from scribe.meetings.ranges import etag_matches
+
+# memory bound of the cached response bodies
+RESPONSE_CACHE_MB = int(os.environ.get("SCRIBE_RESPONSE_CACHE_MB", "64"))
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, headers: dict):
+        self.body = body
+        self.headers = headers
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def respond(self, if_none_match: str | None = None) -> Response:
+        """
+        Returns the cached body, or 304 if the client already has it.
+        """
+
+        headers = {"etag": self.etag, "cache-control": "no-cache", **self.headers}
+        if etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized meeting responses, bounded by the size of the
+    cached bodies.
+
+    Keys are tuples starting with the kind of response and the meeting it is
+    about, or None for meeting lists. Changing a meeting drops its entries
+    and every list. Entries are only stored if nothing was invalidated while
+    they were being built, so a slow read can never put stale data back.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, body: bytes, headers=None, generation=None) -> CachedResponse:
+        """
+        Caches a body and returns it as a response. `generation` is the value
+        of `self.generation` from before the body was read.
+        """
+
+        entry = CachedResponse(body, headers or {})
+        if generation != self.generation or len(body) > self.max_bytes:
+            return entry
+
+        self._drop(key)
+        self._entries[key] = entry
+        self._size += len(body)
+
+        while self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+        return entry
+
+    def invalidate_meeting(self, meeting_id: str):
+        self.generation += 1
+        for key in list(self._entries):
+            if key[1] is None or key[1] == meeting_id:
+                self._drop(key)
+
+    def on_event(self, event: dict):
+        meeting_id = event.get("meetingId")
+        if meeting_id:
+            self.invalidate_meeting(meeting_id)
+        elif event.get("type") == "resync":
+            self.clear()
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._size = 0
+        logging.info("response cache cleared")
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._size -= len(entry.body)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,35 @@
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT
+
+
+async def create_indexes(db: AsyncIOMotorDatabase):
+    """
+    Creates the indexes the meeting endpoints rely on. Creating an index that
+    already exists is a no-op, so this runs on every startup.
+    """
+
+    meetings = db["meetings"]
+
+    # keyset pagination of the meeting list
+    await meetings.create_index([("startedAt", DESCENDING), ("_id", DESCENDING)])
+
+    # meetings in progress, which are stopped when their agent is lost
+    await meetings.create_index([("stoppedAt", ASCENDING)])
+
+    # time window queries on the transcript of a meeting
+    await db["segments"].create_index([("meeting_id", ASCENDING), ("start", ASCENDING)])
+
+    # full-text search over the original text and the translation. Transcripts
+    # are in any language, so words are not stemmed, and the per-document
+    # language field is pointed away from `lang`, whose values MongoDB would
+    # otherwise reject for languages it cannot stem
+    await db["segments"].create_index(
+        [("text", TEXT), ("trans", TEXT)],
+        name="segments_text",
+        default_language="none",
+        language_override="textLanguage",
+    )
+
+    logging.info("meeting indexes are in place")
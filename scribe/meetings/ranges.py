@@ -0,0 +1,162 @@
+import secrets
+
+from starlette.responses import Response, StreamingResponse
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def recording_etag(grid_out, media_type) -> str:
+    """
+    Recordings never change once stored, so the file id, its length and the
+    format it is served in identify a representation.
+    """
+
+    return f'"{grid_out._id}-{grid_out.length}-{media_type.replace("/", "-")}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    # weak comparison, as If-None-Match asks for
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+def if_range_matches(header: str | None, etag: str) -> bool:
+    """
+    Tells whether a `Range` header applies: with an `If-Range` header, only if
+    it names the current representation. If-Range needs a strong match, so
+    weak tags never do.
+    """
+
+    if header is None:
+        return True
+
+    return header.strip() == etag
+
+
+def parse_ranges(header: str | None, length: int):
+    """
+    Parses a `Range` header into a sorted list of inclusive `(start, end)`
+    byte ranges, with overlapping or adjacent ranges merged. Returns None when
+    the header should be ignored and the whole file served, and raises
+    `RangeNotSatisfiable` when none of the ranges overlap the file.
+    """
+
+    if not header:
+        return None
+
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, sep, last = spec.strip().partition("-")
+        if not sep:
+            return None
+
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else length - 1
+            else:
+                # suffix range, the last N bytes
+                start = max(length - int(last), 0)
+                end = length - 1
+        except ValueError:
+            return None
+
+        if start > end and last and first:
+            return None
+        if start >= length or start > end:
+            continue
+
+        ranges.append((start, min(end, length - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+async def read_range(grid_out, start, end):
+    """
+    Yields bytes `start` to `end` of a GridFS file. Seeking only moves the
+    read position, so the chunks before `start` are never fetched, and every
+    chunk that is needed is fetched exactly once.
+    """
+
+    grid_out.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = await grid_out.readchunk()
+        if not chunk:
+            break
+
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+
+def range_response(grid_out, ranges, media_type, headers) -> Response:
+    """
+    Builds the 206 response for one or several byte ranges of a GridFS file.
+    Several ranges are sent as `multipart/byteranges`.
+    """
+
+    length = grid_out.length
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["content-range"] = f"bytes {start}-{end}/{length}"
+        headers["content-length"] = str(end - start + 1)
+        headers["content-type"] = media_type
+
+        return StreamingResponse(
+            read_range(grid_out, start, end), status_code=206, headers=headers
+        )
+
+    boundary = secrets.token_hex(16)
+    parts = [
+        (
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{length}\r\n\r\n"
+            ).encode(),
+            start,
+            end,
+        )
+        for start, end in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+
+    # every part but the first is preceded by the CRLF ending the previous one
+    size = sum(len(head) + end - start + 1 for head, start, end in parts)
+    size += 2 * (len(parts) - 1) + len(closing)
+
+    async def body():
+        for i, (head, start, end) in enumerate(parts):
+            yield head if i == 0 else b"\r\n" + head
+            async for data in read_range(grid_out, start, end):
+                yield data
+        yield closing
+
+    headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+    headers["content-length"] = str(size)
+
+    return StreamingResponse(body(), status_code=206, headers=headers)
@@ -33,6 +33,9 @@ class MeetingModel(BaseModel):
     stoppedAt: Optional[datetime] = None
     recordingReady: bool = False
     transcriptionReady: bool = False
+    transcriptionRefined: bool = False
+    agentId: Optional[str] = None
+    agentLost: bool = False
 
     recordingFile: Optional[PyObjectId] = Field(default=None, exclude=True)
     transcriptionSegments: Optional[List[dict]] = Field(default=None, exclude=True)
@@ -55,9 +58,11 @@ class MeetingModel(BaseModel):
 
 class MeetingCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
+    agentId: Optional[str] = None
+    room: Optional[str] = None
 
     class Config:
-        schema_extra = {"example": {"title": "Weekly Team Standup"}}
+        schema_extra = {"example": {"title": "Weekly Team Standup", "room": "4B"}}
 
 
 class MeetingResponse(BaseModel):
@@ -67,7 +72,9 @@ class MeetingResponse(BaseModel):
     stoppedAt: Optional[datetime] = None
     recordingReady: bool
     transcriptionReady: bool
-    transcriptionSegments: Optional[List[dict]] = None
+    transcriptionRefined: bool = False
+    agentId: Optional[str] = None
+    agentLost: bool = False
 
     class Config:
         schema_extra = {
@@ -78,17 +85,30 @@ class MeetingResponse(BaseModel):
                 "stoppedAt": "2024-01-15T10:30:00Z",
                 "recordingReady": True,
                 "transcriptionReady": False,
-                "transcriptionSegments": [
-                    {
-                        "start": 0,
-                        "end": 5.0,
-                        "text": "Some Text",
-                    },
-                    {
-                        "start": 5.0,
-                        "end": 7.1,
-                        "text": "Some Text",
-                    },
-                ],
+                "agentId": "room-4b",
+                "agentLost": False,
+            }
+        }
+
+
+class SegmentResponse(BaseModel):
+    start: float
+    end: float
+    text: Optional[str] = None
+    trans: Optional[str] = None
+    speaker: Optional[str] = None
+    lang: Optional[str] = None
+    version: Optional[int] = None
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "start": 5.0,
+                "end": 7.1,
+                "text": "Some Text",
+                "trans": "Some Text",
+                "speaker": "SPEAKER_00",
+                "lang": "en",
+                "version": 2,
             }
         }
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.responses import Response
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Metrics of this server process in the Prometheus text format.
+    """
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
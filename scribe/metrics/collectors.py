@@ -0,0 +1,62 @@
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "scribe_http_request_duration_seconds",
+    "Time from a request arriving to its response starting, by route",
+    ["method", "route", "status"],
+)
+
+AMQP_PUBLISH_SECONDS = Histogram(
+    "scribe_amqp_publish_duration_seconds",
+    "Time taken to publish a message to RabbitMQ",
+    ["kind"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+AMQP_PUBLISH_FAILURES = Counter(
+    "scribe_amqp_publish_failures",
+    "Messages that could not be published to RabbitMQ",
+    ["kind"],
+)
+
+
+class StateCollector:
+    """
+    Exposes counters that live on objects of the server, read when scraped.
+    """
+
+    def __init__(self):
+        self.event_hub = None
+
+    def collect(self):
+        from scribe.meetings.cache import response_cache
+
+        hits = CounterMetricFamily(
+            "scribe_response_cache_hits", "Meeting responses served from the cache"
+        )
+        hits.add_metric([], response_cache.hits)
+        yield hits
+
+        misses = CounterMetricFamily(
+            "scribe_response_cache_misses", "Meeting responses read from MongoDB"
+        )
+        misses.add_metric([], response_cache.misses)
+        yield misses
+
+        size = GaugeMetricFamily(
+            "scribe_response_cache_bytes", "Size of the cached response bodies"
+        )
+        size.add_metric([], response_cache.size)
+        yield size
+
+        if self.event_hub:
+            subscribers = GaugeMetricFamily(
+                "scribe_event_subscribers", "Clients connected to the event stream"
+            )
+            subscribers.add_metric([], self.event_hub.subscriber_count)
+            yield subscribers
+
+
+state = StateCollector()
+REGISTRY.register(state)
@@ -0,0 +1,46 @@
+import time
+
+from scribe.metrics.collectors import HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every HTTP request, labelled with the template of
+    the route it matched rather than its path, so meeting ids do not become
+    label values. Latency is measured up to the start of the response:
+    recordings and event streams would otherwise be timed by how long the
+    client kept reading.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        responded = False
+
+        async def send_wrapper(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                self._observe(scope, str(message["status"]), started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not responded:
+                self._observe(scope, "500", started)
+            raise
+
+    @staticmethod
+    def _observe(scope, status, started):
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "static"
+
+        HTTP_REQUEST_SECONDS.labels(scope["method"], path, status).observe(
+            time.perf_counter() - started
+        )
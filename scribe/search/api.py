@@ -0,0 +1,151 @@
+import html
+import re
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from scribe.dependencies import get_database
+from scribe.search.schema import SearchResult
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SEGMENTS_COLLECTION = "segments"
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# characters of context kept on each side of the first match in a snippet
+SNIPPET_CONTEXT = 80
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Returns the words and phrases of a `$text` query that should be
+    highlighted, leaving out negated ones.
+    """
+
+    phrases = re.findall(r'"([^"]+)"', q)
+    words = re.sub(r'"[^"]*"', " ", q).split()
+
+    terms = [p.strip() for p in phrases if p.strip()]
+    terms += [w for w in words if not w.startswith("-")]
+    return terms
+
+
+def highlight(text: str, terms: List[str]) -> str | None:
+    """
+    Cuts a snippet around the first match of any term and wraps every match
+    in <mark>. The text is HTML-escaped. Returns None if no term matches.
+    """
+
+    if not text or not terms:
+        return None
+
+    pattern = re.compile(
+        "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)),
+        re.IGNORECASE,
+    )
+    first = pattern.search(text)
+    if not first:
+        return None
+
+    start = max(first.start() - SNIPPET_CONTEXT, 0)
+    end = min(first.end() + SNIPPET_CONTEXT, len(text))
+    snippet = text[start:end]
+
+    parts = []
+    pos = 0
+    for match in pattern.finditer(snippet):
+        parts.append(html.escape(snippet[pos : match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        pos = match.end()
+    parts.append(html.escape(snippet[pos:]))
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+@router.get("", response_model=List[SearchResult])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Search the transcripts of all meetings.
+
+    - **q**: Words to look for, `"quoted phrases"` must match exactly and
+      `-words` must not appear
+    - **offset**: Number of results to skip
+    - **limit**: Number of results to return
+
+    Both the original text and the translation of every segment are searched.
+    Results are ranked by relevance. When there are more results, the offset
+    of the next page is returned in the `X-Next-Offset` header.
+    """
+
+    projection = {
+        "meeting_id": 1,
+        "start": 1,
+        "end": 1,
+        "speaker": 1,
+        "text": 1,
+        "trans": 1,
+        "score": {"$meta": "textScore"},
+    }
+
+    try:
+        cursor = (
+            db[SEGMENTS_COLLECTION]
+            .find({"$text": {"$search": q}}, projection)
+            .sort([("score", {"$meta": "textScore"})])
+            .skip(offset)
+            .limit(limit + 1)
+        )
+        segments = await cursor.to_list(length=limit + 1)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search transcripts: {str(e)}",
+        )
+
+    if len(segments) > limit:
+        segments = segments[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+
+    meeting_ids = list({seg["meeting_id"] for seg in segments})
+    titles = {
+        meeting["_id"]: meeting["title"]
+        async for meeting in db["meetings"].find(
+            {"_id": {"$in": meeting_ids}}, {"title": 1}
+        )
+    }
+
+    terms = search_terms(q)
+    results = []
+    for seg in segments:
+        field, snippet = "text", highlight(seg.get("text"), terms)
+        if snippet is None and seg.get("trans"):
+            field, snippet = "trans", highlight(seg["trans"], terms)
+        if snippet is None:
+            # matched on a stemmed or differently cased form only
+            snippet = html.escape(seg.get("text") or seg.get("trans") or "")
+
+        results.append(
+            SearchResult(
+                meetingId=str(seg["meeting_id"]),
+                meetingTitle=titles.get(seg["meeting_id"]),
+                start=seg["start"],
+                end=seg["end"],
+                speaker=seg.get("speaker"),
+                field=field,
+                snippet=snippet,
+                score=seg["score"],
+            )
+        )
+
+    return results
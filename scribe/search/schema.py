@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    meetingId: str
+    meetingTitle: str | None = None
+    start: float
+    end: float
+    speaker: str | None = None
+    field: str
+    snippet: str
+    score: float
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "meetingId": "507f1f77bcf86cd799439011",
+                "meetingTitle": "Weekly Team Standup",
+                "start": 125.4,
+                "end": 131.0,
+                "speaker": "SPEAKER_01",
+                "field": "text",
+                "snippet": "…we should move the <mark>release</mark> to Friday…",
+                "score": 1.5,
+            }
+        }
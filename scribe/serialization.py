@@ -0,0 +1,45 @@
+import orjson
+from bson import ObjectId
+
+# size of the blocks streamed JSON arrays are written out in
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"cannot serialize {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """
+    Serializes Mongo documents, or anything made of dicts, lists and scalars,
+    straight to JSON bytes. ObjectIds become strings and datetimes ISO 8601
+    strings, the same as the pydantic response models produce.
+    """
+
+    return orjson.dumps(obj, default=_default)
+
+
+async def json_array(items, transform=None):
+    """
+    Yields an async iterator of documents as a JSON array, in blocks of about
+    `STREAM_BLOCK_SIZE` bytes, so the array is never built up in memory.
+    """
+
+    block = bytearray(b"[")
+    first = True
+    async for item in items:
+        if transform:
+            item = transform(item)
+        if not first:
+            block += b","
+        block += dumps(item)
+        first = False
+
+        if len(block) >= STREAM_BLOCK_SIZE:
+            yield bytes(block)
+            block.clear()
+
+    block += b"]"
+    yield bytes(block)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -7,6 +8,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import FileResponse
 from starlette.staticfiles import StaticFiles
 
+from scribe.agents.registry import watch_agents
+from scribe.events.hub import EventHub
+from scribe.meetings.cache import response_cache
+from scribe.meetings.indexes import create_indexes
+from scribe.metrics.collectors import state as metrics_state
+from scribe.metrics.middleware import MetricsMiddleware
 from scribe_config import create_mongo_connection, create_rabbit_connection
 
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +31,14 @@ async def init_rabbitmq_connection(a: FastAPI):
         exchange_name, "topic", durable=True, auto_delete=False
     )
 
+    a.state.events = EventHub()
+    a.state.events.add_listener(response_cache.on_event)
+    await a.state.events.start(a.state.rabbitmq_chan)
+    metrics_state.event_hub = a.state.events
+
+    # events published while disconnected are lost, nothing cached can be trusted
+    a.state.rabbitmq_conn.reconnect_callbacks.add(lambda *_: response_cache.clear())
+
 
 async def init_mongodb_connection(a: FastAPI):
     try:
@@ -32,11 +47,20 @@ async def init_mongodb_connection(a: FastAPI):
 
         logger.info("connected to mongodb")
         a.state.mongo_client = mongo_client
+
+        await create_indexes(mongo_client["scribe"])
+
+        a.state.agent_watcher = asyncio.create_task(
+            watch_agents(mongo_client["scribe"], a.state.rabbitmq_chan)
+        )
     except Exception as error:
         logger.error(f"mongodb connection failed: {error}")
 
 
 async def close_connections(a: FastAPI):
+    if getattr(a.state, "agent_watcher", None):
+        a.state.agent_watcher.cancel()
+
     await a.state.rabbitmq_conn.close()
     a.state.mongo_client.close()
 
@@ -51,6 +75,10 @@ async def lifespan(a: FastAPI):
 
 
 from scribe.meetings.api import router as meetings_router
+from scribe.agents.api import router as agents_router
+from scribe.search.api import router as search_router
+from scribe.events.api import router as events_router
+from scribe.metrics.api import router as metrics_router
 
 app = FastAPI(title="Scribe Master Server", lifespan=lifespan, redirect_slashes=False)
 
@@ -60,9 +88,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-From", "X-Next-Offset"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(meetings_router)
+app.include_router(agents_router)
+app.include_router(search_router)
+app.include_router(events_router)
+app.include_router(metrics_router)
 
 frontend_path = os.path.join(os.path.dirname(__name__), "scribe-ui", "build")
 app.mount(
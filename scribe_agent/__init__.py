@@ -9,3 +9,9 @@ def run_agent():
     import scribe_agent.agent
 
     scribe_agent.agent.main()
+
+
+def run_transcriber():
+    import scribe_agent.transcriber
+
+    scribe_agent.transcriber.main()
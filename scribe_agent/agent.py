@@ -1,50 +1,77 @@
 import asyncio
 import json
 import logging
-import signal
+import time
 
 from aio_pika import IncomingMessage
 
-from scribe_agent.recorder import Recorder
+from scribe_agent.checkpoints import sweep_periodically
+from scribe_agent.events import declare_events_exchange
+from scribe_agent.jobs import declare_transcription_queue
+from scribe_agent.metrics import (
+    COMMAND_LATENCY_SECONDS,
+    METRICS_PORT,
+    start_metrics_server,
+)
+from scribe_agent.models import registry
+from scribe_agent.profiler import profiler
+from scribe_agent.recorder import TRANSCRIPTION_MODE, Recorder
+from scribe_agent.refinement import refiner
+from scribe_agent.registration import (
+    AGENT_ID,
+    Registration,
+    agent_queue,
+    agent_routing_key,
+)
+from scribe_agent.shutdown import wait_for_shutdown
 from scribe_config import create_rabbit_connection
 
 logging.basicConfig(level=logging.INFO)
 
 
 async def listen_for_commands():
+    start_metrics_server(METRICS_PORT)
+
     connection = await create_rabbit_connection()
     channel = await connection.channel()
     await channel.set_qos(prefetch_count=1)
 
-    queue = await channel.declare_queue("scribe-agent", durable=True)
+    # every agent has a queue of its own, the server sends the commands of a
+    # meeting to the agent it was assigned to
+    queue = await channel.declare_queue(agent_queue(AGENT_ID), durable=True)
     exchange = await channel.get_exchange("scribe-commands")
 
-    await queue.bind(exchange, "commands")
-
-    recorder = Recorder()
-    await queue.consume(_handle_message(recorder))
-
-    logging.info("Waiting for messages. Press Ctrl+C to exit.")
-    loop = asyncio.get_running_loop()
-
-    stop_event = asyncio.Event()
+    await queue.bind(exchange, agent_routing_key(AGENT_ID))
+    await declare_events_exchange(channel)
 
-    def stop_signal(*_):
-        logging.info("Shutting down...")
-        stop_event.set()
+    if TRANSCRIPTION_MODE == "queue":
+        await declare_transcription_queue(channel)
 
-    for sig in (signal.SIGINT, signal.SIGTERM):
-        try:
-            loop.add_signal_handler(sig, stop_signal)
-        except NotImplementedError:
+    recorder = Recorder(channel)
+    registration = Registration(recorder.db, recorder, TRANSCRIPTION_MODE, channel)
+    recorder.registration = registration
+    await registration.register()
 
-            def windows_handler():
-                logging.info("shutting down (windows fallback)")
-                stop_event.set()
-
-            signal.signal(sig, lambda *_: windows_handler())
+    await queue.consume(_handle_message(recorder))
 
-    await stop_event.wait()
+    logging.info("Waiting for messages. Press Ctrl+C to exit.")
+    if TRANSCRIPTION_MODE == "live":
+        asyncio.create_task(registry.warm_up(registry.whisper, registry.diarization))
+    asyncio.create_task(registry.evict_idle_periodically())
+    heartbeat = asyncio.create_task(registration.heartbeat_periodically())
+
+    # with a queue, transcribers pick up where other transcribers stopped
+    if TRANSCRIPTION_MODE != "queue":
+        asyncio.create_task(
+            sweep_periodically(recorder.db, recorder.resume_transcription)
+        )
+        if refiner:
+            asyncio.create_task(refiner.run(recorder.db, recorder.fs_bucket, channel))
+
+    await wait_for_shutdown()
+
+    heartbeat.cancel()
+    await registration.deregister()
     await connection.close()
 
 
@@ -54,15 +81,22 @@ def _handle_message(recorder):
             try:
                 msg = json.loads(message.body.decode())
                 command = msg.get("cmd")
+                meeting_id = msg.get("meeting_id")
+
+                # commands from servers older than the metrics have no time
+                if msg.get("sentAt"):
+                    COMMAND_LATENCY_SECONDS.labels(command).observe(
+                        max(time.time() - msg["sentAt"], 0)
+                    )
 
                 logging.info(f"handling command: {command}")
                 match command:
                     case "start":
-                        asyncio.create_task(
-                            recorder.start_recording(msg.get("meeting_id"))
-                        )
+                        asyncio.create_task(_record(recorder, meeting_id))
                     case "stop":
-                        await recorder.stop_recording()
+                        await recorder.stop_recording(meeting_id)
+                    case "profile":
+                        profiler.request(meeting_id, msg.get("enabled", True))
                     case "cancel":
                         pass
 
@@ -72,5 +106,10 @@ def _handle_message(recorder):
     return _handle_message_internal
 
 
+async def _record(recorder, meeting_id):
+    with profiler.session(meeting_id):
+        await recorder.start_recording(meeting_id)
+
+
 def main():
     asyncio.run(listen_for_commands())
@@ -0,0 +1,141 @@
+UNKNOWN_SPEAKER = "UNKNOWN"
+
+# speaker runs of fewer words than this are merged into the run before them,
+# so a word at a turn boundary does not become a segment of its own
+MIN_RUN_WORDS = 2
+
+
+def best_speakers(items, turns) -> list:
+    """
+    Returns the speaker that overlaps each item the most, or None, for items
+    with `start` and `end` sorted by start.
+
+    Both timelines are swept once: turns are taken in order of their start
+    and dropped as soon as they end before the current item starts, so only
+    the turns around an item are ever looked at. This is linear in the length
+    of both timelines, however long the meeting.
+    """
+
+    turns = sorted(turns, key=lambda turn: turn["start"])
+    speakers = []
+    active = []
+    upcoming = 0
+
+    for item in items:
+        start, end = item["start"], item["end"]
+
+        while upcoming < len(turns) and turns[upcoming]["start"] <= end:
+            active.append(turns[upcoming])
+            upcoming += 1
+        active = [turn for turn in active if turn["end"] > start]
+
+        overlaps = {}
+        for turn in active:
+            if end > start:
+                overlap = min(end, turn["end"]) - max(start, turn["start"])
+            else:
+                # zero length items, like some words, count where they are
+                overlap = 1.0 if turn["start"] <= start < turn["end"] else 0.0
+
+            if overlap > 0:
+                overlaps[turn["speaker"]] = overlaps.get(turn["speaker"], 0) + overlap
+
+        speakers.append(max(overlaps, key=overlaps.get) if overlaps else None)
+
+    return speakers
+
+
+def attribute_speakers(segments, turns) -> list:
+    """
+    Sets the speaker of every segment from the diarization turns and returns
+    the segments. Segments that carry word timestamps, in `words`, are split
+    where the speaker changes between their words; the words themselves are
+    not kept.
+
+    Segments must be sorted by start, turns can come in any order.
+    """
+
+    speakers = best_speakers(segments, turns)
+    words = [word for seg in segments for word in seg.get("words") or []]
+    word_speakers = best_speakers(words, turns)
+
+    attributed = []
+    position = 0
+    for seg, speaker in zip(segments, speakers):
+        seg_words = seg.pop("words", None) or []
+        labels = word_speakers[position : position + len(seg_words)]
+        position += len(seg_words)
+
+        speaker = speaker or UNKNOWN_SPEAKER
+        runs = _speaker_runs(labels, speaker)
+        if len(runs) <= 1:
+            seg["speaker"] = runs[0][0] if runs else speaker
+            attributed.append(seg)
+            continue
+
+        attributed.extend(_split(seg, seg_words, runs))
+
+    return attributed
+
+
+def _speaker_runs(labels, fallback):
+    """
+    Groups consecutive word labels into `(speaker, first, last)` runs. Words
+    without a speaker take the one before them, too short runs are merged.
+    """
+
+    filled = []
+    for label in labels:
+        filled.append(label or (filled[-1] if filled else None))
+
+    first_known = next((label for label in filled if label), fallback)
+    filled = [label or first_known for label in filled]
+
+    runs = []
+    for i, label in enumerate(filled):
+        if runs and runs[-1][0] == label:
+            runs[-1][2] = i
+        else:
+            runs.append([label, i, i])
+
+    merged = []
+    for run in runs:
+        if merged and (run[0] == merged[-1][0] or run[2] - run[1] + 1 < MIN_RUN_WORDS):
+            merged[-1][2] = run[2]
+        elif merged and merged[-1][2] - merged[-1][1] + 1 < MIN_RUN_WORDS:
+            merged[-1] = [run[0], merged[-1][1], run[2]]
+        else:
+            merged.append(run)
+
+    return merged
+
+
+def _split(seg, words, runs):
+    """
+    Cuts a segment into one segment per speaker run. A translation that is
+    the text itself is cut along; any other goes with the longest run, as
+    it cannot be aligned with the words.
+    """
+
+    same_translation = seg.get("trans") == seg.get("text")
+    longest = max(range(len(runs)), key=lambda i: runs[i][2] - runs[i][1])
+
+    pieces = []
+    for i, (speaker, first, last) in enumerate(runs):
+        text = "".join(word["word"] for word in words[first : last + 1]).strip()
+        piece = {
+            **seg,
+            "start": seg["start"] if i == 0 else words[first]["start"],
+            "end": seg["end"] if i == len(runs) - 1 else words[last]["end"],
+            "text": text,
+            "speaker": speaker,
+        }
+        if "trans" in seg:
+            if same_translation:
+                piece["trans"] = text
+            elif i != longest:
+                piece["trans"] = ""
+
+        pieces.append(piece)
+
+    return pieces
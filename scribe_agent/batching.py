@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from scribe_agent.decoding import (
+    TRANSCRIPT_OUTPUT,
+    TRANSLATION_LANGUAGE,
+    attach_translations,
+)
+from scribe_agent.diarization import diarize_window
+from scribe_agent.metrics import STAGE_SECONDS
+from scribe_agent.models import registry
+
+# number of windows decoded in one forward pass, 0 or 1 disables batching
+BATCH_SIZE = int(os.environ.get("SCRIBE_BATCH_SIZE", "0"))
+
+# longest time a window waits for a batch to fill up, in seconds
+BATCH_MAX_WAIT = float(os.environ.get("SCRIBE_BATCH_MAX_WAIT", "2.0"))
+
+# decoding thresholds matching the defaults of `WhisperModel.transcribe`
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+
+# windows of the same batch are diarized one after the other
+_diarization_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def transcribe_batch(whisper_model, waveforms, output=TRANSCRIPT_OUTPUT):
+    """
+    Transcribes several windows of at most 30 seconds with one encoder pass
+    and one decoder pass per task over the whole batch.
+
+    Returns a `(language, segments)` pair per waveform, in the same shape as
+    `transcribe_once`. Each window keeps its own detected language, since
+    every item of a batch gets its own prompt.
+    """
+
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.transcribe import get_ctranslate2_storage
+
+    extractor = whisper_model.feature_extractor
+    # windows of any length are padded to the full window the encoder takes,
+    # so they stack into one batch
+    features = np.stack(
+        [
+            pad_or_trim(extractor(waveform), extractor.nb_max_frames)
+            for waveform in waveforms
+        ]
+    )
+    # `WhisperModel.encode` only takes a single window
+    encoder_output = whisper_model.model.encode(get_ctranslate2_storage(features))
+    durations = [len(waveform) / extractor.sampling_rate for waveform in waveforms]
+
+    if whisper_model.model.is_multilingual:
+        languages = [
+            results[0][0][2:-2]
+            for results in whisper_model.model.detect_language(encoder_output)
+        ]
+    else:
+        languages = ["en"] * len(waveforms)
+
+    def tokenizer(language, task):
+        return Tokenizer(
+            whisper_model.hf_tokenizer,
+            whisper_model.model.is_multilingual,
+            task=task,
+            language=language,
+        )
+
+    def generate(task, items):
+        if len(items) == len(waveforms):
+            encoded = encoder_output
+        else:
+            import ctranslate2
+
+            encoded = ctranslate2.StorageView.from_array(
+                np.ascontiguousarray(np.asarray(encoder_output)[items])
+            )
+
+        tokenizers = [tokenizer(languages[i], task) for i in items]
+        results = whisper_model.model.generate(
+            encoded,
+            [list(tok.sot_sequence) for tok in tokenizers],
+            beam_size=5,
+            patience=1,
+            length_penalty=1,
+            max_length=448,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+            return_scores=True,
+            return_no_speech_prob=True,
+        )
+
+        return {
+            i: _split_segments(tok, result, durations[i])
+            for i, tok, result in zip(items, tokenizers, results)
+        }
+
+    everything = list(range(len(waveforms)))
+    original = {} if output == "translation" else generate("transcribe", everything)
+
+    translate = everything
+    if output == "both":
+        translate = [i for i in everything if languages[i] != TRANSLATION_LANGUAGE]
+    translated = generate("translate", translate) if translate else {}
+
+    transcripts = []
+    for i in everything:
+        if output == "translation":
+            segments = [
+                {"start": seg["start"], "end": seg["end"], "trans": seg["text"]}
+                for seg in translated[i]
+            ]
+        elif output == "original":
+            segments = original[i]
+        elif i in translated and original[i]:
+            segments = original[i]
+            attach_translations(segments, translated[i])
+        else:
+            segments = original[i]
+            for seg in segments:
+                seg["trans"] = seg["text"]
+
+        transcripts.append((languages[i], segments))
+
+    return transcripts
+
+
+def _split_segments(tokenizer, result, duration):
+    """
+    Splits a decoded token sequence into segments at its timestamp tokens.
+    """
+
+    tokens = result.sequences_ids[0]
+    avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOG_PROB_THRESHOLD:
+        return []
+
+    segments = []
+    start = None
+    text_tokens = []
+
+    def close(end):
+        text = tokenizer.decode(text_tokens).strip()
+        if text:
+            segments.append(
+                {"start": start or 0.0, "end": min(end, duration), "text": text}
+            )
+
+    for token in tokens:
+        if token < tokenizer.eot:
+            text_tokens.append(token)
+        elif token >= tokenizer.timestamp_begin:
+            timestamp = (token - tokenizer.timestamp_begin) * 0.02
+            if start is None:
+                start = timestamp
+            else:
+                close(timestamp)
+                start = None
+                text_tokens = []
+
+    if text_tokens:
+        close(duration)
+
+    return segments
+
+
+class BatchTranscriber:
+    """
+    Collects windows from any number of meetings and decodes them together.
+
+    A batch is decoded as soon as `batch_size` windows are waiting, or once the
+    oldest waiting window has waited `max_wait` seconds. Larger batches and
+    longer waits trade latency for throughput on backlogs.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, max_wait=BATCH_MAX_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self._pending = []
+        self._filled = asyncio.Event()
+        self._worker = None
+
+    async def transcribe(self, waveform_np):
+        """
+        Queues a window for the next batch and returns its language and
+        segments once the batch has been decoded.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((waveform_np, time.monotonic(), future))
+
+        if len(self._pending) >= self.batch_size:
+            self._filled.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        return await future
+
+    async def analyze(self, waveform_np, sample_rate):
+        """
+        Diarizes a window and decodes it as part of a batch. Returns the same
+        analysis as `analyze_window`.
+        """
+
+        loop = asyncio.get_running_loop()
+        diarization = loop.run_in_executor(
+            _diarization_executor, _diarize_window, waveform_np, sample_rate
+        )
+        (turns, embeddings), (language, segments) = await asyncio.gather(
+            diarization, self.transcribe(waveform_np)
+        )
+
+        return turns, embeddings, language, segments
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while self._pending:
+            waited = time.monotonic() - self._pending[0][1]
+            if len(self._pending) < self.batch_size and waited < self.max_wait:
+                self._filled.clear()
+                try:
+                    await asyncio.wait_for(self._filled.wait(), self.max_wait - waited)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+
+            logging.info(f"decoding a batch of {len(batch)} windows")
+            try:
+                transcripts = await loop.run_in_executor(
+                    None, _transcribe_batch, [waveform for waveform, _, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), transcript in zip(batch, transcripts):
+                if not future.done():
+                    future.set_result(transcript)
+
+
+def _diarize_window(waveform_np, sample_rate):
+    with STAGE_SECONDS.labels("diarization").time():
+        return diarize_window(waveform_np, sample_rate)
+
+
+def _transcribe_batch(waveforms):
+    with STAGE_SECONDS.labels("whisper.batch").time():
+        return transcribe_batch(registry.whisper(), waveforms)
+
+
+batcher = BatchTranscriber() if BATCH_SIZE > 1 else None
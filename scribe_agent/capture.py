@@ -0,0 +1,72 @@
+import threading
+
+
+class RingBuffer:
+    """
+    Preallocated byte ring between the audio capture thread and the event loop.
+
+    The capture thread only ever copies into the ring and never waits on the
+    loop. If the loop falls so far behind that the ring is full, the incoming
+    audio is dropped and counted rather than blocking the capture thread.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+
+        self._data = bytearray(capacity)
+        self._view = memoryview(self._data)
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # counters, read by the loop for logging and metrics
+        self.written = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.peak = 0
+
+    @property
+    def available(self) -> int:
+        return self._size
+
+    def write(self, data) -> int:
+        """
+        Copies `data` into the ring and returns the number of bytes buffered
+        afterwards. Whatever does not fit is dropped.
+        """
+
+        with self._lock:
+            size = min(len(data), self.capacity - self._size)
+            if size < len(data):
+                self.dropped += len(data) - size
+                self.overflows += 1
+
+            end = (self._start + self._size) % self.capacity
+            first = min(size, self.capacity - end)
+            self._view[end : end + first] = data[:first]
+            self._view[: size - first] = data[first:size]
+
+            self._size += size
+            self.written += size
+            self.peak = max(self.peak, self._size)
+
+            return self._size
+
+    def read(self, size: int) -> bytes:
+        """
+        Takes up to `size` bytes out of the ring.
+        """
+
+        with self._lock:
+            size = min(size, self._size)
+            first = min(size, self.capacity - self._start)
+
+            if first == size:
+                data = bytes(self._view[self._start : self._start + size])
+            else:
+                data = b"".join((self._view[self._start :], self._view[: size - first]))
+
+            self._start = (self._start + size) % self.capacity
+            self._size -= size
+
+            return data
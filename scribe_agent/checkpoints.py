@@ -0,0 +1,267 @@
+import asyncio
+import datetime
+import logging
+import os
+import socket
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from scribe_agent.jobs import MAX_ATTEMPTS
+
+# one checkpoint per meeting whose transcription is under way
+CHECKPOINTS_COLLECTION = "checkpoints"
+
+# seconds a transcription stays claimed without its lease being renewed, after
+# which another process takes it over
+LEASE_SECONDS = float(os.environ.get("SCRIBE_TRANSCRIPTION_LEASE", "60"))
+
+# window length of recordings no transcription was started for, the agent's
+# default
+DEFAULT_CHUNK_DURATION = 30
+
+# identifies this process as the holder of a lease
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+class Checkpoint:
+    """
+    The progress of a meeting's transcription, claimed by one process at a
+    time with a lease.
+
+    `offset` is where the audio that is not transcribed yet starts, in
+    seconds, and `speakers` the state of the meeting's speaker clustering at
+    that point. Both are saved after every window is stored, so an
+    interrupted transcription continues from its last window with the same
+    speaker labels.
+    """
+
+    def __init__(self, db, meeting_id, document, collection, ready_field):
+        self.collection = db[collection]
+        self.meetings = db["meetings"]
+        self.meeting_id = ObjectId(meeting_id)
+        self.ready_field = ready_field
+
+        self.offset = document.get("offset", 0.0)
+        self.speakers = document.get("speakers")
+        self.attempts = document.get("attempts", 1)
+
+    async def save(self, offset, speakers=None):
+        self.offset = offset
+        fields = {"offset": offset}
+        if speakers is not None:
+            fields["speakers"] = speakers.state()
+
+        await self._update(fields)
+
+    async def renew(self):
+        await self._update({})
+
+    async def renew_periodically(self):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                await self.renew()
+            except LeaseLost:
+                raise
+            except Exception as e:
+                logging.warning(f"cannot renew lease of meeting {self.meeting_id}: {e}")
+
+    async def complete(self):
+        """
+        Marks the transcript as ready, or refined, and drops the checkpoint,
+        in this order, so a crash in between leaves a checkpoint that is found
+        finished.
+        """
+
+        await self.meetings.update_one(
+            {"_id": self.meeting_id}, {"$set": {self.ready_field: True}}
+        )
+        await self.collection.delete_one({"_id": self.meeting_id, "owner": OWNER})
+
+    async def release(self):
+        """
+        Gives the lease up after a failure, for a retry to resume right away.
+        """
+
+        await self.collection.update_one(
+            {"_id": self.meeting_id, "owner": OWNER},
+            {"$set": {"leaseExpiresAt": _now()}},
+        )
+
+    async def _update(self, fields):
+        now = _now()
+        result = await self.collection.update_one(
+            {"_id": self.meeting_id, "owner": OWNER},
+            {
+                "$set": {
+                    **fields,
+                    "updatedAt": now,
+                    "leaseExpiresAt": now + datetime.timedelta(seconds=LEASE_SECONDS),
+                }
+            },
+        )
+        if not result.matched_count:
+            raise LeaseLost(f"meeting {self.meeting_id} is transcribed elsewhere")
+
+
+async def claim(
+    db,
+    meeting_id,
+    file_id,
+    sample_rate,
+    chunk_duration,
+    collection=CHECKPOINTS_COLLECTION,
+    ready_field="transcriptionReady",
+):
+    """
+    Takes the lease of a meeting's transcription, creating its checkpoint if
+    it has none yet. Returns the checkpoint, or None while another process
+    holds the lease or once the meeting's `ready_field` is set, so a job
+    that is delivered again is a no-op. Passes over the same recording, like
+    refinement, keep their checkpoints in a `collection` of their own.
+    """
+
+    now = _now()
+    try:
+        document = await db[collection].find_one_and_update(
+            {
+                "_id": ObjectId(meeting_id),
+                "$or": [{"owner": OWNER}, {"leaseExpiresAt": {"$lt": now}}],
+            },
+            {
+                "$set": {
+                    "owner": OWNER,
+                    "leaseExpiresAt": now + datetime.timedelta(seconds=LEASE_SECONDS),
+                },
+                "$setOnInsert": {
+                    "fileId": file_id,
+                    "sampleRate": sample_rate,
+                    "chunkDuration": chunk_duration,
+                    "offset": 0.0,
+                    "speakers": None,
+                    "startedAt": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return None
+
+    # checked once the lease is held: `complete` marks the meeting before it
+    # drops the checkpoint, so a finished meeting is never missed here
+    finished = await db["meetings"].find_one(
+        {"_id": ObjectId(meeting_id), ready_field: True}, {"_id": 1}
+    )
+    if finished:
+        await db[collection].delete_one({"_id": ObjectId(meeting_id), "owner": OWNER})
+        return None
+
+    return Checkpoint(db, meeting_id, document, collection, ready_field)
+
+
+async def unfinished_jobs(db, orphans=True) -> list:
+    """
+    Returns transcription jobs for the meetings whose recording is ready but
+    whose transcript is not, and that nobody works on: those whose lease
+    expired and, with `orphans`, those no transcription was ever started
+    for. Meetings that used up their attempts are left alone.
+    """
+
+    checkpoints = db[CHECKPOINTS_COLLECTION]
+    now = _now()
+    jobs = []
+
+    async for checkpoint in checkpoints.find(
+        {"leaseExpiresAt": {"$lt": now}, "attempts": {"$lt": MAX_ATTEMPTS}}
+    ):
+        meeting = await db["meetings"].find_one(
+            {"_id": checkpoint["_id"]}, {"recordingReady": 1, "transcriptionReady": 1}
+        )
+        if not meeting or meeting.get("transcriptionReady"):
+            await checkpoints.delete_one(
+                {"_id": checkpoint["_id"], "owner": checkpoint["owner"]}
+            )
+            continue
+
+        # recordings of lost agents were never finished, there is nothing to
+        # resume from
+        if not meeting.get("recordingReady"):
+            continue
+
+        jobs.append(
+            {
+                "meeting_id": str(checkpoint["_id"]),
+                "file_id": str(checkpoint["fileId"]),
+                "sample_rate": checkpoint["sampleRate"],
+                "chunk_duration": checkpoint["chunkDuration"],
+            }
+        )
+
+    if not orphans:
+        return jobs
+
+    # meetings stopped just now are about to be claimed by their agent
+    stopped_before = now - datetime.timedelta(seconds=LEASE_SECONDS)
+    async for meeting in db["meetings"].find(
+        {
+            "recordingReady": True,
+            "transcriptionReady": {"$ne": True},
+            "stoppedAt": {"$lt": stopped_before},
+        },
+        {"recordingFile": 1},
+    ):
+        if await checkpoints.find_one({"_id": meeting["_id"]}, {"_id": 1}):
+            continue
+
+        recording = await db["scribe.audios.files"].find_one(
+            {"_id": meeting["recordingFile"]}, {"metadata.sample_rate": 1}
+        )
+        if not recording:
+            continue
+
+        jobs.append(
+            {
+                "meeting_id": str(meeting["_id"]),
+                "file_id": str(meeting["recordingFile"]),
+                "sample_rate": recording["metadata"]["sample_rate"],
+                "chunk_duration": DEFAULT_CHUNK_DURATION,
+            }
+        )
+
+    return jobs
+
+
+async def sweep_periodically(db, transcribe, orphans=True):
+    """
+    Resumes unfinished transcriptions with the `transcribe` coroutine, one
+    at a time, on startup and then whenever leases may have expired.
+    """
+
+    while True:
+        try:
+            for job in await unfinished_jobs(db, orphans):
+                logging.info(f"resuming transcription of meeting {job['meeting_id']}")
+                try:
+                    await transcribe(job)
+                except Exception as e:
+                    logging.error(
+                        f"resumed transcription of meeting {job['meeting_id']} "
+                        f"failed: {e}",
+                        exc_info=e,
+                    )
+        except Exception as e:
+            logging.warning(f"cannot look for unfinished transcriptions: {e}")
+
+        await asyncio.sleep(LEASE_SECONDS)
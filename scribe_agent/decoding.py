@@ -0,0 +1,175 @@
+import os
+
+# "both" keeps the original text and its English translation, "original" and
+# "translation" only decode one of them
+TRANSCRIPT_OUTPUT = os.environ.get("SCRIBE_TRANSCRIPT_OUTPUT", "both")
+
+# whisper can only translate into English
+TRANSLATION_LANGUAGE = "en"
+
+# word timestamps let segments be split where the speaker changes
+WORD_TIMESTAMPS = os.environ.get("SCRIBE_WORD_TIMESTAMPS", "1") != "0"
+
+
+def transcription_options(tokenizer, **overrides):
+    """
+    Builds decoding options matching the defaults of `WhisperModel.transcribe`.
+    The fields follow the faster-whisper version pinned in pyproject.toml.
+    """
+
+    # imported here so the agent does not pay for faster-whisper at startup
+    from faster_whisper.transcribe import TranscriptionOptions, get_suppressed_tokens
+
+    options = dict(
+        beam_size=5,
+        best_of=5,
+        patience=1,
+        length_penalty=1,
+        repetition_penalty=1,
+        no_repeat_ngram_size=0,
+        log_prob_threshold=-1.0,
+        no_speech_threshold=0.6,
+        compression_ratio_threshold=2.4,
+        condition_on_previous_text=True,
+        prompt_reset_on_temperature=0.5,
+        temperatures=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+        initial_prompt=None,
+        prefix=None,
+        suppress_blank=True,
+        suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+        without_timestamps=False,
+        max_initial_timestamp=1.0,
+        word_timestamps=False,
+        prepend_punctuations="\"'“¿([{-",
+        append_punctuations="\"'.。,，!！?？:：”)]}、",
+        max_new_tokens=None,
+        clip_timestamps="0",
+        hallucination_silence_threshold=None,
+        hotwords=None,
+    )
+    options.update(overrides)
+
+    return TranscriptionOptions(**options)
+
+
+def encode(whisper_model, waveform):
+    """
+    Computes the features of a waveform, runs the encoder over its first window
+    and detects the spoken language from the encoder output.
+    """
+
+    from faster_whisper.audio import pad_or_trim
+
+    extractor = whisper_model.feature_extractor
+    features = extractor(waveform)
+    # the encoder only takes full windows, shorter waveforms are padded like
+    # `generate_segments` pads them
+    encoder_output = whisper_model.encode(
+        pad_or_trim(features, extractor.nb_max_frames)
+    )
+
+    if not whisper_model.model.is_multilingual:
+        return features, encoder_output, "en"
+
+    results = whisper_model.model.detect_language(encoder_output)[0]
+    language = results[0][0][2:-2]
+
+    return features, encoder_output, language
+
+
+def decode(
+    whisper_model, features, encoder_output, language, task, word_timestamps=False
+):
+    from faster_whisper.tokenizer import Tokenizer
+
+    tokenizer = Tokenizer(
+        whisper_model.hf_tokenizer,
+        whisper_model.model.is_multilingual,
+        task=task,
+        language=language,
+    )
+    options = transcription_options(tokenizer, word_timestamps=word_timestamps)
+
+    return list(
+        whisper_model.generate_segments(features, tokenizer, options, encoder_output)
+    )
+
+
+def transcribe_once(whisper_model, waveform, output=TRANSCRIPT_OUTPUT):
+    """
+    Encodes the waveform once and decodes the original text and/or its
+    translation from the same encoder output.
+
+    Returns the detected language and a list of segments with `start`, `end`
+    and, depending on `output`, `text` and `trans`. Translations are attached
+    to the original segment their midpoint falls in, since the two decodes do
+    not necessarily agree on segment boundaries.
+    """
+
+    features, encoder_output, language = encode(whisper_model, waveform)
+
+    if output == "translation":
+        translated = decode(
+            whisper_model, features, encoder_output, language, "translate"
+        )
+        return language, [
+            {"start": seg.start, "end": seg.end, "trans": seg.text.strip()}
+            for seg in translated
+        ]
+
+    original = decode(
+        whisper_model,
+        features,
+        encoder_output,
+        language,
+        "transcribe",
+        word_timestamps=WORD_TIMESTAMPS,
+    )
+    segments = [
+        {"start": seg.start, "end": seg.end, "text": seg.text.strip()}
+        for seg in original
+    ]
+    for seg, decoded in zip(segments, original):
+        if decoded.words:
+            seg["words"] = [
+                {"start": word.start, "end": word.end, "word": word.word}
+                for word in decoded.words
+            ]
+
+    if output == "original" or not segments:
+        return language, segments
+
+    if language == TRANSLATION_LANGUAGE:
+        for seg in segments:
+            seg["trans"] = seg["text"]
+        return language, segments
+
+    translated = decode(whisper_model, features, encoder_output, language, "translate")
+    attach_translations(
+        segments,
+        [
+            {"start": seg.start, "end": seg.end, "text": seg.text.strip()}
+            for seg in translated
+        ],
+    )
+
+    return language, segments
+
+
+def attach_translations(segments, translated):
+    """
+    Sets `trans` on every segment from the translated segments whose midpoint
+    falls inside it. Both lists must be sorted by time.
+    """
+
+    for seg in segments:
+        seg["trans"] = ""
+
+    i = 0
+    for trans in translated:
+        middle = (trans["start"] + trans["end"]) / 2
+        while i + 1 < len(segments) and segments[i + 1]["start"] <= middle:
+            i += 1
+
+        seg = segments[i]
+        seg["trans"] = f"{seg['trans']} {trans['text']}".strip()
@@ -0,0 +1,174 @@
+import logging
+import os
+
+import numpy as np
+
+from scribe_agent.models import registry
+
+# cosine distance under which a window's speaker is merged into a known speaker
+SPEAKER_THRESHOLD = float(os.environ.get("SCRIBE_SPEAKER_THRESHOLD", "0.6"))
+
+
+def diarize_window(waveform_np, sample_rate, pipeline=None):
+    """
+    Diarizes a single window of audio.
+
+    Returns the window's speaker turns, labelled with the pipeline's local
+    speaker labels, and one embedding per local speaker.
+    """
+
+    import torch
+
+    if pipeline is None:
+        pipeline = registry.diarization()
+
+    if waveform_np.ndim == 1:
+        waveform_tensor = torch.from_numpy(waveform_np).unsqueeze(0)
+    else:
+        waveform_tensor = torch.from_numpy(waveform_np)
+
+    diarization, embeddings = pipeline(
+        {"waveform": waveform_tensor, "sample_rate": sample_rate},
+        return_embeddings=True,
+    )
+
+    turns = [
+        {"start": turn.start, "end": turn.end, "speaker": speaker}
+        for turn, _, speaker in diarization.itertracks(yield_label=True)
+    ]
+
+    labels = diarization.labels()
+    if embeddings is None or len(labels) == 0:
+        return turns, {}
+
+    return turns, {label: embeddings[i] for i, label in enumerate(labels)}
+
+
+class SpeakerClusterer:
+    """
+    Clusters window-level speaker embeddings across a whole meeting.
+
+    Every known speaker is represented by the running sum of its normalized
+    embeddings. A new window only has to be compared against these centroids,
+    so earlier windows are never recomputed and the cost of a window grows
+    with the number of speakers rather than the length of the meeting.
+    """
+
+    def __init__(self, threshold=SPEAKER_THRESHOLD, capacity=16):
+        self.threshold = threshold
+        self.size = 0
+
+        self._capacity = capacity
+        self._sums = None
+        self._centroids = None
+        self._counts = np.zeros(capacity, dtype=np.int64)
+
+    def assign(self, embeddings: dict) -> dict:
+        """
+        Maps the local speaker labels of a window onto meeting-wide labels.
+
+        Local speakers of the same window are always different people, so each
+        known speaker is matched at most once, closest pairs first. Speakers
+        that are not close enough to any known speaker become new ones.
+        """
+
+        # embeddings of speakers too short to embed come out as NaN or zeros,
+        # which would poison any centroid they are merged into
+        labels = [
+            label
+            for label, emb in embeddings.items()
+            if np.all(np.isfinite(emb)) and np.any(emb)
+        ]
+        mapping = {label: "UNKNOWN" for label in embeddings}
+        if not labels:
+            return mapping
+
+        local = np.stack([embeddings[label] for label in labels]).astype(np.float32)
+        local /= np.linalg.norm(local, axis=1, keepdims=True)
+
+        if self._centroids is None:
+            self._sums = np.zeros((self._capacity, local.shape[1]), dtype=np.float32)
+            self._centroids = np.zeros_like(self._sums)
+
+        assigned = np.full(len(labels), -1)
+        if self.size:
+            distances = 1.0 - local @ self._centroids[: self.size].T
+
+            for _ in range(min(len(labels), self.size)):
+                row, col = np.unravel_index(np.argmin(distances), distances.shape)
+                if distances[row, col] > self.threshold:
+                    break
+
+                assigned[row] = col
+                distances[row, :] = np.inf
+                distances[:, col] = np.inf
+
+        for row, label in enumerate(labels):
+            speaker = assigned[row] if assigned[row] >= 0 else self._add()
+            self._update(speaker, local[row])
+            mapping[label] = f"SPEAKER_{speaker:02d}"
+
+        logging.debug(f"speaker mapping: {mapping}")
+        return mapping
+
+    def state(self) -> dict:
+        """
+        Returns the known speakers in a form that can be stored, for the
+        clustering to be picked up again with `from_state`.
+        """
+
+        if not self.size:
+            return {"threshold": self.threshold, "size": 0}
+
+        return {
+            "threshold": self.threshold,
+            "size": self.size,
+            "dimension": self._sums.shape[1],
+            "sums": self._sums[: self.size].astype("<f4").tobytes(),
+            "counts": self._counts[: self.size].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict | None) -> "SpeakerClusterer":
+        if not state:
+            return cls()
+
+        size = state["size"]
+        clusterer = cls(state["threshold"], capacity=max(16, size))
+        if not size:
+            return clusterer
+
+        sums = np.frombuffer(state["sums"], dtype="<f4").reshape(size, -1)
+        clusterer._sums = np.zeros(
+            (clusterer._capacity, state["dimension"]), dtype=np.float32
+        )
+        clusterer._sums[:size] = sums
+        clusterer._centroids = np.zeros_like(clusterer._sums)
+        clusterer._centroids[:size] = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        clusterer._counts[:size] = state["counts"]
+        clusterer.size = size
+
+        return clusterer
+
+    def _add(self) -> int:
+        if self.size == self._capacity:
+            self._capacity *= 2
+            self._sums = np.resize(self._sums, (self._capacity, self._sums.shape[1]))
+            self._centroids = np.resize(
+                self._centroids, (self._capacity, self._centroids.shape[1])
+            )
+            self._counts = np.resize(self._counts, self._capacity)
+
+        speaker = self.size
+        self._sums[speaker] = 0.0
+        self._counts[speaker] = 0
+        self.size += 1
+
+        return speaker
+
+    def _update(self, speaker: int, embedding):
+        self._sums[speaker] += embedding
+        self._counts[speaker] += 1
+        self._centroids[speaker] = self._sums[speaker] / np.linalg.norm(
+            self._sums[speaker]
+        )
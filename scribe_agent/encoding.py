@@ -0,0 +1,198 @@
+import asyncio
+import bisect
+import logging
+import os
+
+from scribe_agent.metrics import GRIDFS_WRITE_SECONDS
+from scribe_agent.seekindex import INDEXERS
+
+# "wav" stores raw PCM, "flac" and "opus" are encoded with ffmpeg while recording
+AUDIO_FORMAT = os.environ.get("SCRIBE_AUDIO_FORMAT", "flac").lower()
+
+# bitrate of opus recordings, plenty for speech
+OPUS_BITRATE = os.environ.get("SCRIBE_OPUS_BITRATE", "32k")
+
+# metadata, file extension and ffmpeg output arguments per stored format
+AUDIO_FORMATS = {
+    "wav": {"format": "WAV", "extension": "wav", "content_type": "audio/wav"},
+    "flac": {
+        "format": "FLAC",
+        "extension": "flac",
+        "content_type": "audio/flac",
+        "ffmpeg": ["-c:a", "flac", "-f", "flac"],
+    },
+    "opus": {
+        "format": "OPUS",
+        "extension": "opus",
+        "content_type": "audio/ogg",
+        "ffmpeg": ["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-f", "ogg"],
+    },
+}
+
+# size of the blocks read from ffmpeg, matches the GridFS chunk size
+READ_SIZE = 255 * 1024
+
+# decoding from the middle of a recording starts this many seconds early, lossy
+# decoders need a few packets to converge
+DECODER_PREROLL = 0.1
+
+
+def is_raw_pcm(metadata) -> bool:
+    """
+    Recordings stored before compression was supported have no format, or
+    "WAV", in their metadata.
+    """
+
+    return (metadata or {}).get("format", "WAV") == "WAV"
+
+
+async def ffmpeg(*args):
+    return await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+
+class StreamingEncoder:
+    """
+    Encodes raw PCM into the configured format with one ffmpeg process per
+    recording, as the audio is captured. Encoded output is written to the
+    GridFS upload stream as soon as ffmpeg produces it, so the recording is
+    never held in memory. A seek index of the encoded stream is built on the
+    way through.
+    """
+
+    def __init__(self, grid_in, audio_format, sample_rate, channels):
+        self.grid_in = grid_in
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        self.encoded_size = 0
+        self.indexer = INDEXERS[audio_format](sample_rate)
+        self._process = None
+        self._drain = None
+
+    async def start(self):
+        self._process = await ffmpeg(
+            "-f",
+            "s16le",
+            "-ar",
+            str(self.sample_rate),
+            "-ac",
+            str(self.channels),
+            "-i",
+            "pipe:0",
+            *AUDIO_FORMATS[self.audio_format]["ffmpeg"],
+            "pipe:1",
+        )
+        self._drain = asyncio.create_task(self._write_encoded())
+
+    async def write(self, data):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        """
+        Flushes the encoder and waits until everything it produced is stored.
+        """
+
+        self._process.stdin.close()
+        await self._drain
+
+        code = await self._process.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with {code}")
+
+        logging.info(
+            f"encoded recording as {self.audio_format}: {self.encoded_size} bytes"
+        )
+
+    async def abort(self):
+        if self._drain:
+            self._drain.cancel()
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+
+    async def _write_encoded(self):
+        while data := await self._process.stdout.read(READ_SIZE):
+            with GRIDFS_WRITE_SECONDS.time():
+                await self.grid_in.write(data)
+            self.indexer.feed(data)
+            self.encoded_size += len(data)
+
+
+async def decode_to_pcm(grid_out, sample_rate, first_sample=0):
+    """
+    Decodes a compressed recording to mono s16le PCM at `sample_rate` with a
+    single ffmpeg process. GridFS chunks are piped in while the decoded audio
+    is read out, and the PCM is yielded in blocks as it is produced.
+
+    Decoding from `first_sample` on starts at the seek index entry before it,
+    behind the stream headers, and drops the audio decoded up to the sample.
+    Recordings without an index are decoded from the start.
+    """
+
+    metadata = grid_out.metadata or {}
+    index = metadata.get("seek_index") if first_sample else None
+    first_time, first = 0.0, 0
+    if index:
+        times = [seconds for seconds, _ in index]
+        start = first_sample / sample_rate
+        first_time, first = index[
+            max(bisect.bisect_right(times, start - DECODER_PREROLL) - 1, 0)
+        ]
+    header_size = (metadata.get("header_size") or 0) if first else 0
+    skip = max(first_sample - round(first_time * sample_rate), 0) * 2
+
+    process = await ffmpeg(
+        "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"
+    )
+
+    async def feed():
+        try:
+            if header_size:
+                grid_out.seek(0)
+                remaining = header_size
+                while remaining > 0 and (chunk := await grid_out.readchunk()):
+                    process.stdin.write(chunk[:remaining])
+                    await process.stdin.drain()
+                    remaining -= len(chunk)
+            if first:
+                grid_out.seek(first)
+
+            while chunk := await grid_out.readchunk():
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while data := await process.stdout.read(READ_SIZE):
+            if skip:
+                dropped = min(skip, len(data))
+                data = data[dropped:]
+                skip -= dropped
+                if not data:
+                    continue
+
+            yield data
+
+        await feeder
+        code = await process.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with {code}")
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
@@ -0,0 +1,37 @@
+import json
+import logging
+
+import aio_pika
+
+# meeting and transcript updates are published here for the server to push to
+# the UI, routed by event type
+EVENTS_EXCHANGE = "scribe-events"
+
+
+async def declare_events_exchange(channel):
+    return await channel.declare_exchange(
+        EVENTS_EXCHANGE, "topic", durable=True, auto_delete=False
+    )
+
+
+async def publish_event(channel, event_type: str, meeting_id, **data):
+    """
+    Publishes an event about a meeting. Events only drive UI updates, so a
+    failure to publish is logged and otherwise ignored.
+    """
+
+    if channel is None:
+        return
+
+    body = {"type": event_type, "meetingId": str(meeting_id), **data}
+    try:
+        exchange = await channel.get_exchange(EVENTS_EXCHANGE, ensure=False)
+        await exchange.publish(
+            aio_pika.Message(
+                json.dumps(body, default=str).encode(),
+                content_type="application/json",
+            ),
+            routing_key=event_type,
+        )
+    except Exception as e:
+        logging.warning(f"cannot publish {event_type} event: {e}")
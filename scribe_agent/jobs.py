@@ -0,0 +1,62 @@
+import json
+import os
+
+import aio_pika
+from aio_pika import DeliveryMode
+
+exchange_name = "scribe-commands"
+
+TRANSCRIPTION_QUEUE = "scribe-transcription"
+FAILED_QUEUE = "scribe-transcription.failed"
+ROUTING_KEY = "transcribe"
+
+MAX_ATTEMPTS = int(os.environ.get("SCRIBE_TRANSCRIPTION_ATTEMPTS", "3"))
+
+
+async def declare_transcription_queue(channel):
+    """
+    Declares the durable transcription job queue, and the queue jobs are moved
+    to once they ran out of attempts.
+    """
+
+    exchange = await channel.get_exchange(exchange_name)
+
+    await channel.declare_queue(FAILED_QUEUE, durable=True)
+    queue = await channel.declare_queue(TRANSCRIPTION_QUEUE, durable=True)
+    await queue.bind(exchange, ROUTING_KEY)
+
+    return queue
+
+
+async def publish_transcription_job(channel, job: dict, attempt=1):
+    exchange = await channel.get_exchange(exchange_name)
+    await exchange.publish(
+        _job_message(job, attempt),
+        routing_key=ROUTING_KEY,
+    )
+
+
+async def retry_transcription_job(channel, job: dict, attempt: int) -> bool:
+    """
+    Publishes the job again for another attempt. Returns False and parks the
+    job on the failed queue once it has been attempted `MAX_ATTEMPTS` times.
+    """
+
+    if attempt < MAX_ATTEMPTS:
+        await publish_transcription_job(channel, job, attempt + 1)
+        return True
+
+    await channel.default_exchange.publish(
+        _job_message(job, attempt),
+        routing_key=FAILED_QUEUE,
+    )
+    return False
+
+
+def _job_message(job: dict, attempt: int):
+    return aio_pika.Message(
+        json.dumps(job).encode(),
+        content_type="application/json",
+        delivery_mode=DeliveryMode.PERSISTENT,
+        headers={"x-attempt": attempt},
+    )
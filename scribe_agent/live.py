@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+
+from bson import ObjectId
+
+from scribe_agent.batching import batcher
+from scribe_agent.checkpoints import claim
+from scribe_agent.diarization import SpeakerClusterer
+from scribe_agent.events import publish_event
+from scribe_agent.metrics import STAGE_SECONDS
+from scribe_agent.pcm import pcm_to_float32
+from scribe_agent.refinement import refiner
+from scribe_agent.segments import store_segments
+from scribe_agent.transcription import (
+    analyze_in_executor,
+    finish_window,
+    observe_window,
+)
+from scribe_agent.vad import VAD_ENABLED, SpeechChunker
+
+
+class LiveTranscriber:
+    """
+    Transcribes a meeting while it is still being recorded.
+
+    Captured PCM is fed in as it arrives; every time a full window has been
+    buffered it is handed to diarization and Whisper on an executor thread, and
+    the resulting segments are written to the segment store. Windows are
+    processed one at a time, in order, so that the inference load is spread
+    across the meeting instead of running in a single burst after it stops.
+    With VAD enabled, windows are cut around speech and silence is skipped.
+
+    Progress is checkpointed after every window like for stored recordings,
+    so a transcription cut short by a crash is resumed from the recording.
+    A window that fails to be analyzed or stored ends the live transcription
+    there: the checkpoint is not moved past it, and the rest is transcribed
+    from the recording.
+    """
+
+    def __init__(
+        self,
+        db,
+        meeting_id: str,
+        file_id,
+        *,
+        sample_rate: int,
+        sample_width: int,
+        window_duration: int,
+        channel=None,
+    ):
+        self.db = db
+        self.channel = channel
+        self.meeting_id = ObjectId(meeting_id)
+        self.file_id = file_id
+        self.sample_rate = sample_rate
+        self.window_duration = window_duration
+        self.window_size = sample_rate * sample_width * window_duration
+
+        self.speakers = SpeakerClusterer()
+
+        self._chunker = None
+        if VAD_ENABLED:
+            self._chunker = SpeechChunker(sample_rate, window_duration)
+
+        self._buffer = bytearray()
+        self._offset = 0.0
+        self._windows = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    def feed(self, data: bytes):
+        if self._chunker:
+            for waveform_np, offset in self._chunker.feed(pcm_to_float32(data)):
+                self._windows.put_nowait((waveform_np.copy(), offset))
+            return
+
+        self._buffer.extend(data)
+
+        while len(self._buffer) >= self.window_size:
+            window = pcm_to_float32(self._buffer[: self.window_size])
+            del self._buffer[: self.window_size]
+
+            self._windows.put_nowait((window, self._offset))
+            self._offset += self.window_duration
+
+    async def finish(self):
+        """
+        Transcribes whatever is left in the buffer, waits for all pending
+        windows to be written and marks the transcript as ready. Returns
+        False when the transcript is not complete, because a window failed
+        or the meeting is transcribed elsewhere.
+        """
+
+        if self._chunker:
+            for waveform_np, offset in self._chunker.flush():
+                self._windows.put_nowait((waveform_np.copy(), offset))
+
+        if len(self._buffer) >= 2:
+            self._windows.put_nowait((pcm_to_float32(self._buffer), self._offset))
+            self._buffer.clear()
+
+        self._windows.put_nowait(None)
+        return await self._worker
+
+    def cancel(self):
+        self._worker.cancel()
+
+    async def _run(self):
+        analyze = batcher.analyze if batcher else analyze_in_executor
+
+        try:
+            checkpoint = await claim(
+                self.db,
+                self.meeting_id,
+                self.file_id,
+                self.sample_rate,
+                self.window_duration,
+            )
+        except Exception as e:
+            logging.error(f"cannot claim meeting {self.meeting_id}: {e}")
+            await self._skip()
+            return False
+
+        if checkpoint is None:
+            logging.info(
+                f"meeting {self.meeting_id} is transcribed already or elsewhere"
+            )
+            await self._skip()
+            return False
+
+        renewal = asyncio.create_task(checkpoint.renew_periodically())
+        try:
+            transcribed = await self._transcribe(analyze, checkpoint)
+        except Exception as e:
+            # storing failed, or the lease was lost
+            logging.error(f"live transcription of {self.meeting_id} failed: {e}")
+            transcribed = False
+        finally:
+            renewal.cancel()
+
+        try:
+            if not transcribed:
+                await self._skip()
+                await checkpoint.release()
+                return False
+
+            await checkpoint.complete()
+        except Exception as e:
+            logging.error(f"cannot update checkpoint of {self.meeting_id}: {e}")
+            return False
+
+        if refiner:
+            refiner.schedule(
+                {
+                    "meeting_id": str(self.meeting_id),
+                    "file_id": str(self.file_id),
+                    "sample_rate": self.sample_rate,
+                    "chunk_duration": self.window_duration,
+                }
+            )
+        return True
+
+    async def _transcribe(self, analyze, checkpoint):
+        while True:
+            window = await self._windows.get()
+            if window is None:
+                return True
+
+            waveform_np, offset = window
+            started = time.perf_counter()
+            try:
+                with refiner.draft() if refiner else nullcontext():
+                    analysis = await analyze(waveform_np, self.sample_rate)
+                segments = finish_window(offset, self.speakers, *analysis)
+            except Exception as e:
+                logging.error(f"live transcription failed at {offset}s: {e}")
+                return False
+
+            observe_window(started, len(waveform_np), self.sample_rate)
+            end = offset + len(waveform_np) / self.sample_rate
+
+            with STAGE_SECONDS.labels("store").time():
+                await store_segments(self.db, self.meeting_id, segments, offset)
+                await checkpoint.save(end, self.speakers)
+            if not segments:
+                continue
+
+            await publish_event(
+                self.channel, "segments.added", self.meeting_id, segments=segments
+            )
+            logging.info(f"stored {len(segments)} segments at {offset}s")
+
+    async def _skip(self):
+        # windows keep coming until the recording stops
+        while await self._windows.get() is not None:
+            pass
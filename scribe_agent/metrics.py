@@ -0,0 +1,90 @@
+import logging
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# port of the agent's metrics listener, 0 disables it
+METRICS_PORT = int(os.environ.get("SCRIBE_METRICS_PORT", "9464"))
+
+# transcribers often share a host with the agent, so they listen elsewhere
+TRANSCRIBER_METRICS_PORT = int(
+    os.environ.get("SCRIBE_TRANSCRIBER_METRICS_PORT", "9465")
+)
+
+CAPTURED_BYTES = Counter(
+    "scribe_agent_captured_bytes", "Audio captured from the microphone"
+)
+DROPPED_BYTES = Counter(
+    "scribe_agent_dropped_bytes",
+    "Captured audio dropped because the capture buffer was full",
+)
+CAPTURE_OVERFLOWS = Counter(
+    "scribe_agent_capture_overflows",
+    "Times audio was lost, by where it was lost",
+    ["source"],
+)
+CAPTURE_BACKLOG = Gauge(
+    "scribe_agent_capture_backlog_bytes",
+    "Captured audio waiting in the capture buffer to be written",
+)
+
+GRIDFS_WRITE_SECONDS = Histogram(
+    "scribe_agent_gridfs_write_seconds",
+    "Time taken to write a block of a recording to GridFS",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+STAGE_SECONDS = Histogram(
+    "scribe_agent_stage_seconds",
+    "Time spent in a stage of the transcription pipeline, per window",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+
+REAL_TIME_FACTOR = Histogram(
+    "scribe_agent_real_time_factor",
+    "Processing time over audio duration, per window and per recording",
+    ["scope"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0),
+)
+
+COMMAND_LATENCY_SECONDS = Histogram(
+    "scribe_agent_command_latency_seconds",
+    "Time from the server sending a command to the agent receiving it",
+    ["command"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class CaptureMetrics:
+    """
+    Reports the counters of a capture ring. The ring is written by the audio
+    thread, so it only counts; the counters are turned into metrics from the
+    event loop, by the difference since the last report.
+    """
+
+    def __init__(self):
+        self._written = 0
+        self._dropped = 0
+        self._overflows = 0
+        self._input_overflows = 0
+
+    def update(self, ring, input_overflows):
+        CAPTURED_BYTES.inc(ring.written - self._written)
+        DROPPED_BYTES.inc(ring.dropped - self._dropped)
+        CAPTURE_OVERFLOWS.labels("ring").inc(ring.overflows - self._overflows)
+        CAPTURE_OVERFLOWS.labels("input").inc(input_overflows - self._input_overflows)
+        CAPTURE_BACKLOG.set(ring.available)
+
+        self._written = ring.written
+        self._dropped = ring.dropped
+        self._overflows = ring.overflows
+        self._input_overflows = input_overflows
+
+
+def start_metrics_server(port):
+    if not port:
+        return
+
+    start_http_server(port)
+    logging.info(f"serving metrics on port {port}")
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from os import getcwd
+
+WHISPER_MODEL = os.environ.get("SCRIBE_WHISPER_MODEL", "base")
+WHISPER_COMPUTE_TYPE = os.environ.get("SCRIBE_WHISPER_COMPUTE_TYPE", "int8")
+
+DIARIZATION_MODEL = os.environ.get(
+    "SCRIBE_DIARIZATION_MODEL", "pyannote/speaker-diarization-3.1"
+)
+
+# loaded models are evicted, least recently used first, to stay under this budget
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("SCRIBE_MODEL_MEMORY_MB", "4096"))
+
+# models that have not been used for this many seconds are unloaded
+MODEL_IDLE_TIMEOUT = float(os.environ.get("SCRIBE_MODEL_IDLE_TIMEOUT", "1800"))
+
+# approximate resident size of a loaded model, in MB
+MODEL_FOOTPRINTS_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 700,
+    "medium": 1800,
+    "large-v2": 3500,
+    "large-v3": 3500,
+    "diarization": 600,
+}
+
+
+class _Entry:
+    def __init__(self, model, footprint, load_time):
+        self.model = model
+        self.footprint = footprint
+        self.load_time = load_time
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+
+class ModelRegistry:
+    """
+    Loads models on first use and keeps them keyed by (name, size, compute_type).
+
+    Loading happens on the calling thread, which is an executor thread for all
+    inference paths, so the event loop never waits on a model. Concurrent
+    requests for the same model wait for a single load. Models that have been
+    idle for too long, or that no longer fit the memory budget, are dropped;
+    callers that still hold a reference keep using it until they are done.
+    """
+
+    def __init__(
+        self, memory_budget_mb=MODEL_MEMORY_BUDGET_MB, idle_timeout=MODEL_IDLE_TIMEOUT
+    ):
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_timeout = idle_timeout
+
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def whisper(
+        self, size=WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE, cpu_threads=0
+    ):
+        def load():
+            from faster_whisper import WhisperModel
+
+            return WhisperModel(
+                size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+            )
+
+        footprint = MODEL_FOOTPRINTS_MB.get(size, MODEL_FOOTPRINTS_MB["base"])
+        return self.get(("whisper", size, compute_type), load, footprint)
+
+    def diarization(self, name=DIARIZATION_MODEL):
+        def load():
+            from pyannote.audio import Pipeline
+
+            return Pipeline.from_pretrained(
+                name,
+                use_auth_token=os.environ.get("HUGGINGFACE_TOKEN"),
+                cache_dir=os.environ.get("HUGGINGFACE_CACHE_DIR", getcwd() + "/.cache"),
+            )
+
+        footprint = MODEL_FOOTPRINTS_MB["diarization"]
+        return self.get(("diarization", name, "float32"), load, footprint)
+
+    def get(self, key, loader, footprint):
+        with self._lock:
+            entry = self._touch(key)
+            if entry:
+                return entry.model
+
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._touch(key)
+                if entry:
+                    return entry.model
+
+            logging.info(f"loading model {key}")
+            started = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - started
+            logging.info(f"loaded model {key} in {load_time:.2f}s")
+
+            with self._lock:
+                self._evict_for(footprint)
+                self._models[key] = _Entry(model, footprint, load_time)
+                self._touch(key)
+                self._loading.pop(key, None)
+
+            return model
+
+    def evict_idle(self):
+        now = time.time()
+        with self._lock:
+            for key in list(self._models):
+                if now - self._models[key].last_used > self.idle_timeout:
+                    self._drop(key, "idle")
+
+    def stats(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "name": key[0],
+                    "size": key[1],
+                    "compute_type": key[2],
+                    "load_time": entry.load_time,
+                    "footprint_mb": entry.footprint,
+                    "uses": entry.uses,
+                    "idle": time.time() - entry.last_used,
+                }
+                for key, entry in self._models.items()
+            ]
+
+    async def warm_up(self, *loaders):
+        """
+        Loads models in the background, e.g. `registry.warm_up(registry.whisper)`.
+        Failures are logged; the model is then loaded again on first use.
+        """
+
+        loop = asyncio.get_running_loop()
+        for loader in loaders:
+            try:
+                await loop.run_in_executor(None, loader)
+            except Exception as e:
+                logging.error(f"model warm-up failed: {e}", exc_info=e)
+
+    async def evict_idle_periodically(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def _touch(self, key):
+        entry = self._models.get(key)
+        if entry:
+            entry.last_used = time.time()
+            entry.uses += 1
+            self._models.move_to_end(key)
+
+        return entry
+
+    def _evict_for(self, footprint):
+        used = sum(entry.footprint for entry in self._models.values())
+        while self._models and used + footprint > self.memory_budget_mb:
+            key = next(iter(self._models))
+            used -= self._models[key].footprint
+            self._drop(key, "memory budget")
+
+    def _drop(self, key, reason):
+        del self._models[key]
+        logging.info(f"unloaded model {key} ({reason})")
+
+
+registry = ModelRegistry()
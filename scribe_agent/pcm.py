@@ -0,0 +1,118 @@
+import numpy as np
+
+from scribe_agent.encoding import decode_to_pcm, is_raw_pcm
+
+WAV_HEADER_SIZE = 44
+
+# int16 samples are scaled into [-1.0, 1.0)
+PCM_SCALE = np.float32(1.0 / 32768.0)
+
+
+def wav_data_offset(header: bytes) -> int:
+    """
+    Returns where the PCM data starts in a WAV stream, or 0 if the stream has
+    no RIFF header.
+    """
+
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return 0
+
+    pos = 12
+    while pos + 8 <= len(header):
+        chunk_id = header[pos : pos + 4]
+        size = int.from_bytes(header[pos + 4 : pos + 8], "little")
+        if chunk_id == b"data":
+            return pos + 8
+
+        pos += 8 + size + (size & 1)
+
+    return WAV_HEADER_SIZE
+
+
+def pcm_to_float32(raw, out=None):
+    """
+    Converts raw s16le PCM to a float32 waveform without intermediate copies.
+    The samples are written into `out` when given.
+    """
+
+    samples = np.frombuffer(raw, dtype="<i2", count=len(raw) // 2)
+    if out is None:
+        out = np.empty(len(samples), dtype=np.float32)
+    else:
+        out = out[: len(samples)]
+
+    np.multiply(samples, PCM_SCALE, out=out, casting="unsafe")
+    return out
+
+
+async def read_windows(bucket, file_id, window_samples, sample_rate, start=0.0):
+    """
+    Reads a recording from GridFS as float32 windows of `window_samples`
+    samples and yields `(waveform, offset)` pairs, the offset being in seconds.
+    Reading begins `start` seconds into the recording, without reading or
+    decoding what comes before.
+
+    PCM is copied straight into one preallocated buffer, so memory stays flat
+    however long the recording is. The yielded waveform is a view into a
+    buffer that is reused for the next window; it has to be consumed or
+    copied before the generator is advanced.
+    """
+
+    grid_out = await bucket.open_download_stream(file_id)
+
+    raw = bytearray(window_samples * 2)
+    view = memoryview(raw)
+    samples = np.frombuffer(raw, dtype="<i2")
+    waveform = np.empty(window_samples, dtype=np.float32)
+
+    filled = 0
+    position = round(start * sample_rate)
+
+    async for chunk in _pcm_chunks(grid_out, sample_rate, position):
+        data = memoryview(chunk)
+        while data:
+            size = min(len(data), len(raw) - filled)
+            view[filled : filled + size] = data[:size]
+            data = data[size:]
+            filled += size
+
+            if filled == len(raw):
+                np.multiply(samples, PCM_SCALE, out=waveform, casting="unsafe")
+                yield waveform, position / sample_rate
+
+                position += window_samples
+                filled = 0
+
+    # final, partial window
+    if filled >= 2:
+        count = filled // 2
+        np.multiply(samples[:count], PCM_SCALE, out=waveform[:count], casting="unsafe")
+        yield waveform[:count], position / sample_rate
+
+
+async def _pcm_chunks(grid_out, sample_rate, first_sample=0):
+    """
+    Yields the raw PCM of a recording from `first_sample` on: GridFS chunks
+    minus the WAV header for uncompressed recordings, ffmpeg output for FLAC
+    and Opus ones. Uncompressed recordings are read from the first chunk
+    holding that sample.
+    """
+
+    if not is_raw_pcm(grid_out.metadata):
+        async for data in decode_to_pcm(grid_out, sample_rate, first_sample):
+            yield data
+        return
+
+    header = None
+    if first_sample:
+        header = (grid_out.metadata or {}).get("data_offset")
+        if header is None:
+            header = wav_data_offset(await grid_out.readchunk())
+        grid_out.seek(header + first_sample * 2)
+
+    while chunk := await grid_out.readchunk():
+        if header is None:
+            header = wav_data_offset(chunk)
+            chunk = memoryview(chunk)[header:]
+
+        yield chunk
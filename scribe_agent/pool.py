@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from scribe_agent.metrics import STAGE_SECONDS
+from scribe_agent.models import registry
+from scribe_agent.transcription import analyze_window
+
+# 0 runs all inference in the agent process
+TRANSCRIBE_WORKERS = int(os.environ.get("SCRIBE_TRANSCRIBE_WORKERS", "0"))
+
+# threads used by each worker for inference, 0 keeps the library defaults
+WORKER_CPU_THREADS = int(os.environ.get("SCRIBE_WORKER_CPU_THREADS", "0"))
+
+_whisper_model = None
+
+
+def _init_worker(cpu_threads):
+    global _whisper_model
+
+    import torch
+
+    if cpu_threads:
+        torch.set_num_threads(cpu_threads)
+
+    _whisper_model = registry.whisper(cpu_threads=cpu_threads)
+    registry.diarization()
+
+    logging.info(f"transcription worker {os.getpid()} ready")
+
+
+def _analyze(waveform_np, sample_rate):
+    # the worker's own metrics are never exported, its stage times are
+    # recorded by the coordinator
+    timings = {}
+    analysis = analyze_window(waveform_np, sample_rate, _whisper_model, timings)
+    return analysis, timings
+
+
+class TranscriptionPool:
+    """
+    Fans windows of a recording out to worker processes.
+
+    Every worker loads its own Whisper model and diarization pipeline once and
+    then analyzes windows independently. The coordinator keeps at most two
+    windows per worker in flight and finishes them in time order, since it owns
+    the meeting-wide speaker clustering.
+    """
+
+    def __init__(self, workers=TRANSCRIBE_WORKERS, cpu_threads=WORKER_CPU_THREADS):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(cpu_threads,),
+        )
+
+    async def analyze(self, waveform_np, sample_rate):
+        loop = asyncio.get_running_loop()
+        analysis, timings = await loop.run_in_executor(
+            self._executor, _analyze, waveform_np, sample_rate
+        )
+        for stage, seconds in timings.items():
+            STAGE_SECONDS.labels(stage).observe(seconds)
+
+        return analysis
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,133 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# profiles are written here, one file per profiled meeting
+PROFILE_DIR = os.environ.get("SCRIBE_PROFILE_DIR", "profiles")
+
+# seconds between two samples
+PROFILE_INTERVAL = float(os.environ.get("SCRIBE_PROFILE_INTERVAL", "0.01"))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval while a meeting it
+    was asked to profile is recorded or transcribed.
+
+    Meetings are profiled on request, at runtime: the request can come before
+    the meeting starts or while it is running. Work on the meeting is wrapped
+    in `session`, and sampling runs while a session of a requested meeting is
+    open. Profiles are written in the collapsed stack format flamegraph.pl and
+    speedscope read. Time spent in native code, like inference, is charged to
+    the Python frame that called into it.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, directory=PROFILE_DIR):
+        self.interval = interval
+        self.directory = directory
+
+        self._requested = set()
+        self._active = set()
+        self._meeting = None
+        self._thread = None
+        self._done = threading.Event()
+        self._stacks = Counter()
+        self._samples = 0
+
+    def request(self, meeting_id: str, enabled=True):
+        if not enabled:
+            self._requested.discard(meeting_id)
+            if self._meeting == meeting_id:
+                self._finish()
+            return
+
+        self._requested.add(meeting_id)
+        if meeting_id in self._active:
+            self._start(meeting_id)
+
+    def is_requested(self, meeting_id: str) -> bool:
+        return meeting_id in self._requested
+
+    @contextmanager
+    def session(self, meeting_id: str):
+        self._active.add(meeting_id)
+        if meeting_id in self._requested:
+            self._start(meeting_id)
+
+        try:
+            yield
+        finally:
+            self._active.discard(meeting_id)
+            if self._meeting == meeting_id:
+                self._finish()
+                self._requested.discard(meeting_id)
+
+    def _start(self, meeting_id):
+        if self._meeting:
+            logging.warning(
+                f"not profiling meeting {meeting_id}, "
+                f"meeting {self._meeting} is being profiled"
+            )
+            return
+
+        logging.info(f"profiling meeting {meeting_id}")
+        self._meeting = meeting_id
+        self._stacks.clear()
+        self._samples = 0
+        self._done.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="profiler", daemon=True
+        )
+        self._thread.start()
+
+    def _finish(self):
+        self._done.set()
+        self._thread.join()
+
+        meeting_id, self._meeting = self._meeting, None
+        try:
+            path = self._write(meeting_id)
+            logging.info(
+                f"wrote profile of meeting {meeting_id} to {path}: "
+                f"{self._samples} samples"
+            )
+        except OSError as e:
+            logging.error(f"cannot write profile of meeting {meeting_id}: {e}")
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._done.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    filename = os.path.basename(code.co_filename)
+                    stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+
+            self._samples += 1
+
+    def _write(self, meeting_id) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory, f"{meeting_id}-{int(time.time())}-{os.getpid()}.folded"
+        )
+        with open(path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        return path
+
+
+profiler = SamplingProfiler()
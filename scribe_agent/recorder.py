@@ -1,23 +1,41 @@
 import asyncio
 import datetime
 import logging
-import queue
+import os
 import struct
-import threading
 import time
 
 import pyaudio
-from bson import ObjectId
-from faster_whisper import WhisperModel
+from bson import Binary, ObjectId
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 
-from scribe_agent.transcription import transcribe_from_gridfs
+from scribe_agent.capture import RingBuffer
+from scribe_agent.encoding import AUDIO_FORMAT, AUDIO_FORMATS, StreamingEncoder
+from scribe_agent.events import publish_event
+from scribe_agent.jobs import publish_transcription_job
+from scribe_agent.live import LiveTranscriber
+from scribe_agent.metrics import GRIDFS_WRITE_SECONDS, CaptureMetrics
+from scribe_agent.pool import TRANSCRIBE_WORKERS, TranscriptionPool
+from scribe_agent.profiler import profiler
+from scribe_agent.transcription import transcribe_job, transcribe_meeting
 from scribe_config import create_mongo_connection
 
+# "live" transcribes while recording, "deferred" transcribes after the stop command
+# and "queue" hands finished recordings to `run-transcriber` workers
+TRANSCRIPTION_MODE = os.environ.get("SCRIBE_TRANSCRIPTION_MODE", "live")
+
+# seconds of audio the capture ring holds while the event loop is busy
+CAPTURE_BUFFER_SECONDS = int(os.environ.get("SCRIBE_CAPTURE_BUFFER_SECONDS", "120"))
+
+# GridFS chunk size, captured audio is written in blocks of this size
+WRITE_SIZE = 255 * 1024
+
 
 class Recorder:
 
-    def __init__(self):
+    def __init__(self, channel=None):
+        self.channel = channel
+
         self.mongo_client = create_mongo_connection()
         self.db = self.mongo_client["scribe"]
         self.fs_bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name="scribe.audios")
@@ -30,15 +48,53 @@ class Recorder:
         self.sample_width = int(2)  # 16-bit = 2 bytes
 
         self.audio = pyaudio.PyAudio()
-        self.stream = True
+        self.stream = None
         self.recording = False
-
-        self.audio_queue = queue.Queue()
-        self.record_thread = None
-
-        self.transcribe_model = WhisperModel("base", device="cpu", compute_type="int8")
-
-        # self._loop = asyncio.get_running_loop()
+        self.meeting_id = None
+        self.transcribing = 0
+
+        # set by the agent, told when the microphone is free again
+        self.registration = None
+
+        self.ring = None
+        self.input_overflows = 0
+        self._loop = None
+        self._data_ready = asyncio.Event()
+
+        self.transcribe_pool = None
+        if TRANSCRIPTION_MODE == "deferred" and TRANSCRIBE_WORKERS:
+            self.transcribe_pool = TranscriptionPool()
+        self.chunk_duration = int(30)
+
+    async def _finalize_recording(self, file_id, encoder, data_size):
+        """
+        Completes the stored recording once it is closed. WAV recordings get
+        the real sizes written into their header, which is the start of the
+        first GridFS chunk; compressed ones get the seek index built while
+        they were encoded. Both are what the clip endpoint uses to read only
+        the part of a recording it needs.
+        """
+
+        duration = data_size / (self.rate * self.channels * self.sample_width)
+        metadata = {"metadata.streaming": False, "metadata.duration": duration}
+
+        if encoder:
+            metadata["metadata.header_size"] = encoder.indexer.header_size
+            metadata["metadata.seek_index"] = encoder.indexer.index
+        else:
+            chunks = self.db["scribe.audios.chunks"]
+            first = await chunks.find_one({"files_id": file_id, "n": 0})
+            if first:
+                header = self.create_wav_header(data_size)
+                patched = header + bytes(first["data"])[len(header) :]
+                await chunks.update_one(
+                    {"_id": first["_id"]}, {"$set": {"data": Binary(patched)}}
+                )
+            metadata["metadata.data_offset"] = len(self.create_wav_header())
+
+        await self.db["scribe.audios.files"].update_one(
+            {"_id": file_id}, {"$set": metadata}
+        )
 
     def create_wav_header(self, data_size=0):
         """Create WAV file header with placeholder or actual data size"""
@@ -67,122 +123,279 @@ class Recorder:
 
         return header
 
-    def _audio_callback(self):
-        while self.recording:
-            try:
-                data = self.stream.read(self.chunk, exception_on_overflow=False)
-                timestamp = time.time()
-                self.audio_queue.put((data, timestamp))
-            except Exception as e:
-                logging.error(f"audio recording error: {e}")
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """
+        Runs on the PortAudio capture thread. Copies the captured frames into
+        the ring and wakes the event loop once a full block is buffered.
+        """
+
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+
+        before = self.ring.available
+        after = self.ring.write(in_data)
+        if before < WRITE_SIZE <= after:
+            self._loop.call_soon_threadsafe(self._data_ready.set)
+
+        return None, pyaudio.paContinue if self.recording else pyaudio.paComplete
+
+    async def _next_block(self) -> bytes:
+        """
+        Waits for the next block of captured audio. Blocks are GridFS chunk
+        sized while recording; when the loop has fallen behind, everything
+        that is buffered is taken at once so the backlog is written in as few
+        round trips as possible. Returns an empty block once recording stopped
+        and the ring is drained.
+        """
+
+        while self.recording and self.ring.available < WRITE_SIZE:
+            self._data_ready.clear()
+            if self.ring.available >= WRITE_SIZE:
                 break
 
+            try:
+                await asyncio.wait_for(self._data_ready.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+
+        if not self.recording:
+            return self.ring.read(self.ring.available)
+
+        backlog = self.ring.available - self.ring.available % WRITE_SIZE
+        if backlog > WRITE_SIZE:
+            logging.warning(f"capture is {backlog} bytes behind, catching up")
+
+        return self.ring.read(backlog)
+
     async def start_recording(self, meeting_id: str):
 
         if self.recording:
-            logging.error("already recording")
+            logging.error(f"already recording meeting {self.meeting_id}")
+            if self.registration:
+                await self.registration.abandon(meeting_id)
             return False
 
-        self.stream = self.audio.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            input=True,
-            frames_per_buffer=self.chunk,
+        self._loop = asyncio.get_running_loop()
+        self._data_ready.clear()
+        self.ring = RingBuffer(
+            self.rate * self.channels * self.sample_width * CAPTURE_BUFFER_SECONDS
         )
-
+        self.input_overflows = 0
+        # set before the stream opens, the callback stops capturing without it
         self.recording = True
+        self.meeting_id = meeting_id
 
-        # start record thread
-        self.record_thread = threading.Thread(target=self._audio_callback)
-        self.record_thread.daemon = True
-        self.record_thread.start()
+        try:
+            self.stream = self.audio.open(
+                format=self.format,
+                channels=self.channels,
+                rate=self.rate,
+                input=True,
+                frames_per_buffer=self.chunk,
+                stream_callback=self._audio_callback,
+            )
+        except Exception as error:
+            logging.error(f"cannot open the audio device: {error}", exc_info=error)
+            self.recording = False
+            await self._release(meeting_id)
+            return False
 
+        stored = AUDIO_FORMATS[AUDIO_FORMAT]
         grid_in = self.fs_bucket.open_upload_stream(
-            f"/recordings/meeting_{meeting_id}_{int(time.time())}.wav",
+            f"/recordings/meeting_{meeting_id}_{int(time.time())}.{stored['extension']}",
             metadata={
-                "content_type": "audio/wav",
+                "content_type": stored["content_type"],
                 "sample_rate": self.rate,
                 "channels": self.channels,
-                "format": "WAV",
+                "format": stored["format"],
                 "streaming": True,
                 "created_at": datetime.datetime.now(),
             },
         )
 
+        live = None
+        if TRANSCRIPTION_MODE == "live":
+            live = LiveTranscriber(
+                self.db,
+                meeting_id,
+                grid_in._id,
+                sample_rate=self.rate,
+                sample_width=self.sample_width,
+                window_duration=self.chunk_duration,
+                channel=self.channel,
+            )
+
+        encoder = None
         try:
-            wav_header = self.create_wav_header()
-            await grid_in.write(wav_header)
-
+            if AUDIO_FORMAT == "wav":
+                wav_header = self.create_wav_header()
+                await grid_in.write(wav_header)
+            else:
+                encoder = StreamingEncoder(
+                    grid_in, AUDIO_FORMAT, self.rate, self.channels
+                )
+                await encoder.start()
+
+            capture_metrics = CaptureMetrics()
             total_data_size = 0
             start_time = time.time()
+            next_log = start_time + 5
 
             logging.info("recording...")
+            await publish_event(self.channel, "meeting.started", meeting_id)
 
-            while self.recording:
-                try:
-                    audio_data, timestamp = self.audio_queue.get(timeout=1)
-
-                    await grid_in.write(audio_data)
-                    total_data_size += len(audio_data)
-
-                    if int(time.time() - start_time) % 5 == 0:
-                        duration = time.time() - start_time
-                        logging.info(
-                            f"streaming: duration = {duration:.1f}s, size = {total_data_size} bytes"
-                        )
-                        await asyncio.sleep(1)  # prevent log spam
-
-                    await asyncio.sleep(0.001)  # prevent CPU block
-
-                except queue.Empty:
-                    continue
-                except Exception as e:
-                    logging.error(f"exception in streaming: {e}")
+            while True:
+                audio_data = await self._next_block()
+                if not audio_data:
                     break
 
+                if encoder:
+                    await encoder.write(audio_data)
+                else:
+                    with GRIDFS_WRITE_SECONDS.time():
+                        await grid_in.write(audio_data)
+                total_data_size += len(audio_data)
+                capture_metrics.update(self.ring, self.input_overflows)
+
+                if live:
+                    live.feed(audio_data)
+
+                if time.time() >= next_log:
+                    next_log += 5
+                    duration = time.time() - start_time
+                    logging.info(
+                        f"streaming: duration = {duration:.1f}s, size = {total_data_size} bytes, "
+                        f"buffered = {self.ring.available} bytes, dropped = {self.ring.dropped} bytes"
+                    )
+
+            self._close_stream()
+            capture_metrics.update(self.ring, self.input_overflows)
+            if encoder:
+                await encoder.close()
+
         except Exception as error:
             logging.error(f"error in recording: {error}", exc_info=error)
+            self.recording = False
+            self._close_stream()
+            if encoder:
+                await encoder.abort()
+            if live:
+                live.cancel()
             await grid_in.abort()
+            await self._release(meeting_id)
             return False
 
+        logging.info(
+            f"capture finished: {self.ring.written} bytes captured, "
+            f"{self.ring.dropped} bytes dropped in {self.ring.overflows} ring overflows, "
+            f"{self.input_overflows} input overflows, peak backlog {self.ring.peak} bytes"
+        )
+
         # close stream
         await grid_in.close()
         file_id = grid_in._id
+        await self._finalize_recording(file_id, encoder, total_data_size)
 
         logging.info(f"saving recording for meeting {meeting_id} ({file_id})")
+        stopped_at = datetime.datetime.utcnow()
         await self.db["meetings"].update_one(
             {"_id": ObjectId(meeting_id)},
             {
                 "$set": {
-                    "stoppedAt": datetime.datetime.utcnow(),
+                    "stoppedAt": stopped_at,
                     "recordingReady": True,
                     "recordingFile": file_id,
                 }
             },
         )
-
-        segments = await transcribe_from_gridfs(
-            self.fs_bucket,
-            file_id,
-            self.transcribe_model,
-            sample_rate=self.rate,
-            chunk_duration=30,
+        await publish_event(
+            self.channel,
+            "meeting.stopped",
+            meeting_id,
+            stoppedAt=stopped_at.isoformat(),
+            recordingReady=True,
         )
+        await self._release(meeting_id)
 
-        await self.db["meetings"].update_one(
-            {"_id": ObjectId(meeting_id)},
-            {"$set": {"transcriptionSegments": segments, "transcriptionReady": True}},
-        )
+        if live:
+            if await live.finish():
+                await publish_event(self.channel, "transcription.ready", meeting_id)
+                return True
+
+            # whatever the live transcription did not get to is picked up from
+            # its checkpoint
+            logging.warning(f"transcribing meeting {meeting_id} from the recording")
+
+        if TRANSCRIPTION_MODE == "queue":
+            job = {
+                "meeting_id": meeting_id,
+                "file_id": str(file_id),
+                "sample_rate": self.rate,
+                "chunk_duration": self.chunk_duration,
+                "profile": profiler.is_requested(meeting_id),
+            }
+            await publish_transcription_job(self.channel, job)
+            logging.info(f"queued transcription of meeting {meeting_id}")
+            return True
+
+        self.transcribing += 1
+        try:
+            await transcribe_meeting(
+                self.db,
+                self.fs_bucket,
+                meeting_id,
+                file_id,
+                sample_rate=self.rate,
+                chunk_duration=self.chunk_duration,
+                pool=self.transcribe_pool,
+                channel=self.channel,
+            )
+        finally:
+            self.transcribing -= 1
 
         return True
 
-    async def stop_recording(self):
+    async def resume_transcription(self, job):
+        """
+        Transcribes a meeting whose transcription was interrupted, from where
+        it stopped.
+        """
+
+        self.transcribing += 1
+        try:
+            with profiler.session(job["meeting_id"]):
+                await transcribe_job(
+                    self.db,
+                    self.fs_bucket,
+                    job,
+                    pool=self.transcribe_pool,
+                    channel=self.channel,
+                )
+        finally:
+            self.transcribing -= 1
+
+    async def _release(self, meeting_id):
+        self.meeting_id = None
+        if self.registration:
+            await self.registration.release(meeting_id)
+
+    async def stop_recording(self, meeting_id: str | None = None):
         if not self.recording:
             logging.info("recorder is already stopped")
             return False
 
+        if meeting_id and meeting_id != self.meeting_id:
+            logging.info(f"not recording meeting {meeting_id}, ignoring stop")
+            return False
+
         logging.info("stopping recording")
         self.recording = False
+        self._data_ready.set()
 
         return True
+
+    def _close_stream(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,292 @@
+import asyncio
+import datetime
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from bson import ObjectId
+
+from scribe_agent.attribution import UNKNOWN_SPEAKER, attribute_speakers
+from scribe_agent.checkpoints import DEFAULT_CHUNK_DURATION, LEASE_SECONDS, claim
+from scribe_agent.decoding import transcribe_once
+from scribe_agent.events import publish_event
+from scribe_agent.jobs import MAX_ATTEMPTS
+from scribe_agent.metrics import STAGE_SECONDS
+from scribe_agent.models import registry
+from scribe_agent.pcm import read_windows
+from scribe_agent.segments import SEGMENTS_COLLECTION, replace_segments
+from scribe_agent.vad import VAD_ENABLED, speech_chunks
+
+# Whisper model the draft transcript is refined with, refinement is off unless
+# it is set
+REFINE_MODEL = os.environ.get("SCRIBE_REFINE_MODEL") or None
+
+# niceness of the thread refinement runs inference on, so drafts, recording
+# and everything else on the host go first
+REFINE_NICENESS = int(os.environ.get("SCRIBE_REFINE_NICENESS", "10"))
+
+# seconds between two looks at whether drafts are still waiting
+IDLE_POLL_INTERVAL = 2.0
+
+REFINEMENTS_COLLECTION = "refinements"
+
+
+def _lower_priority():
+    try:
+        # nice() applies to the calling thread only on Linux
+        os.nice(REFINE_NICENESS)
+    except (AttributeError, OSError) as e:
+        logging.warning(f"cannot lower the priority of refinement: {e}")
+
+
+def refine_window(waveform_np):
+    with STAGE_SECONDS.labels("refine").time():
+        return transcribe_once(registry.whisper(REFINE_MODEL), waveform_np)
+
+
+class RefinementScheduler:
+    """
+    Runs refinement passes over transcribed meetings, one meeting and one
+    window at a time, whenever no draft work is waiting.
+
+    Draft work announces itself with `draft()`. Before every window,
+    refinement waits until no draft is in flight and, when `backlog` is set,
+    until it reports no draft jobs queued either. Windows are transcribed on a
+    single thread of lowered priority, so a window that is already running
+    when drafts come in yields the CPU to them.
+    """
+
+    def __init__(self, backlog=None):
+        self.backlog = backlog
+
+        self._drafts = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._queue = asyncio.Queue()
+        self._scheduled = set()
+        self._executor = None
+
+    @contextmanager
+    def draft(self):
+        self._drafts += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._drafts -= 1
+            if not self._drafts:
+                self._idle.set()
+
+    def schedule(self, job: dict):
+        if job["meeting_id"] in self._scheduled:
+            return
+
+        self._scheduled.add(job["meeting_id"])
+        self._queue.put_nowait(job)
+
+    async def wait_for_idle(self):
+        while True:
+            await self._idle.wait()
+            if not self.backlog or not await self.backlog():
+                return
+
+            await asyncio.sleep(IDLE_POLL_INTERVAL)
+
+    async def run(self, db, bucket, channel=None):
+        """
+        Refines the scheduled meetings in turn. Meetings whose refinement was
+        never scheduled or got interrupted are scheduled on startup, and
+        whenever leases may have expired.
+        """
+
+        self._executor = ThreadPoolExecutor(
+            1, thread_name_prefix="refine", initializer=_lower_priority
+        )
+        sweeper = asyncio.create_task(self._sweep_periodically(db))
+
+        try:
+            while True:
+                job = await self._queue.get()
+                try:
+                    await refine_meeting(db, bucket, job, self, channel)
+                except Exception as e:
+                    logging.error(
+                        f"refinement of meeting {job['meeting_id']} failed: {e}",
+                        exc_info=e,
+                    )
+                finally:
+                    self._scheduled.discard(job["meeting_id"])
+        finally:
+            sweeper.cancel()
+            self._executor.shutdown(wait=False)
+
+    async def _sweep_periodically(self, db):
+        while True:
+            try:
+                for job in await unrefined_jobs(db):
+                    self.schedule(job)
+            except Exception as e:
+                logging.warning(f"cannot look for unrefined meetings: {e}")
+
+            await asyncio.sleep(LEASE_SECONDS)
+
+    async def transcribe(self, waveform_np):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, refine_window, waveform_np)
+
+
+async def draft_turns(db, meeting_id, start, end) -> list:
+    """
+    Returns the draft segments between `start` and `end` seconds as speaker
+    turns, relative to `start`.
+    """
+
+    cursor = db[SEGMENTS_COLLECTION].find(
+        {
+            "meeting_id": ObjectId(meeting_id),
+            "start": {"$lt": end},
+            "end": {"$gt": start},
+        },
+        {"_id": 0, "start": 1, "end": 1, "speaker": 1},
+    )
+    return [
+        {
+            "start": seg["start"] - start,
+            "end": seg["end"] - start,
+            "speaker": seg.get("speaker") or UNKNOWN_SPEAKER,
+        }
+        async for seg in cursor
+    ]
+
+
+async def refine_meeting(db, bucket, job, scheduler, channel=None):
+    """
+    Transcribes a meeting again with the refinement model and replaces its
+    draft segments window by window, in place.
+
+    Speakers are not diarized again: the refined segments are attributed
+    against the draft segments they replace, which keeps the speaker labels
+    of the draft. Progress is checkpointed like drafts are.
+    """
+
+    meeting_id = job["meeting_id"]
+    checkpoint = await claim(
+        db,
+        meeting_id,
+        ObjectId(job["file_id"]),
+        job["sample_rate"],
+        job["chunk_duration"],
+        collection=REFINEMENTS_COLLECTION,
+        ready_field="transcriptionRefined",
+    )
+    if checkpoint is None:
+        logging.info(f"meeting {meeting_id} is refined already or elsewhere")
+        return False
+
+    sample_rate = job["sample_rate"]
+    windows = read_windows(
+        bucket,
+        ObjectId(job["file_id"]),
+        sample_rate * job["chunk_duration"],
+        sample_rate,
+        checkpoint.offset,
+    )
+    if VAD_ENABLED:
+        windows = speech_chunks(windows, sample_rate, job["chunk_duration"])
+
+    logging.info(f"refining meeting {meeting_id} from {checkpoint.offset:.1f}s")
+    renewal = asyncio.create_task(checkpoint.renew_periodically())
+    replaced_until = checkpoint.offset
+    try:
+        async for waveform_np, offset in windows:
+            end = offset + len(waveform_np) / sample_rate
+            waveform_np = waveform_np.copy()
+
+            await scheduler.wait_for_idle()
+            if renewal.done():
+                renewal.result()
+
+            language, segments = await scheduler.transcribe(waveform_np)
+            turns = await draft_turns(db, meeting_id, offset, end)
+            segments = attribute_speakers(segments, turns)
+            for seg in segments:
+                seg["start"] += offset
+                seg["end"] += offset
+                seg["lang"] = language
+
+            # drafts in the silence before the window go too, VAD skips what
+            # the draft model may have heard there
+            await replace_segments(
+                db, meeting_id, replaced_until, end, segments, offset
+            )
+            await checkpoint.save(end)
+            replaced_from, replaced_until = replaced_until, end
+
+            await publish_event(
+                channel,
+                "segments.refined",
+                meeting_id,
+                start=replaced_from,
+                end=end,
+                segments=segments,
+            )
+
+        await replace_segments(db, meeting_id, replaced_until, float("inf"), [], 0.0)
+        await checkpoint.complete()
+    except BaseException:
+        await checkpoint.release()
+        raise
+    finally:
+        renewal.cancel()
+
+    await publish_event(channel, "transcription.refined", meeting_id)
+    logging.info(f"meeting {meeting_id} is refined")
+    return True
+
+
+async def unrefined_jobs(db) -> list:
+    """
+    Returns refinement jobs for the meetings with a draft transcript that
+    nobody is refining.
+    """
+
+    refinements = db[REFINEMENTS_COLLECTION]
+    jobs = []
+
+    async for meeting in db["meetings"].find(
+        {
+            "transcriptionReady": True,
+            "transcriptionRefined": {"$ne": True},
+            "recordingFile": {"$ne": None},
+        },
+        {"recordingFile": 1},
+    ):
+        refinement = await refinements.find_one(
+            {"_id": meeting["_id"]}, {"leaseExpiresAt": 1, "attempts": 1}
+        )
+        if refinement and (
+            refinement["leaseExpiresAt"] >= datetime.datetime.utcnow()
+            or refinement.get("attempts", 0) >= MAX_ATTEMPTS
+        ):
+            continue
+
+        recording = await db["scribe.audios.files"].find_one(
+            {"_id": meeting["recordingFile"]}, {"metadata.sample_rate": 1}
+        )
+        if not recording:
+            continue
+
+        jobs.append(
+            {
+                "meeting_id": str(meeting["_id"]),
+                "file_id": str(meeting["recordingFile"]),
+                "sample_rate": recording["metadata"]["sample_rate"],
+                "chunk_duration": DEFAULT_CHUNK_DURATION,
+            }
+        )
+
+    return jobs
+
+
+refiner = RefinementScheduler() if REFINE_MODEL else None
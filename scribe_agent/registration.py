@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+import logging
+import os
+import socket
+
+from bson import ObjectId
+
+from scribe_agent.encoding import AUDIO_FORMAT
+from scribe_agent.events import publish_event
+
+# identifies the agent to the server, it has to be unique in the deployment
+AGENT_ID = os.environ.get("SCRIBE_AGENT_ID") or socket.gethostname()
+
+# meeting room the agent's microphone is in, meetings can ask for a room
+AGENT_ROOM = os.environ.get("SCRIBE_AGENT_ROOM") or None
+
+# seconds between two heartbeats, the server takes an agent for dead after
+# missing a few of them
+HEARTBEAT_INTERVAL = float(os.environ.get("SCRIBE_HEARTBEAT_INTERVAL", "5"))
+
+AGENTS_COLLECTION = "agents"
+
+
+def agent_queue(agent_id: str) -> str:
+    return f"scribe-agent.{agent_id}"
+
+
+def agent_routing_key(agent_id: str) -> str:
+    return f"agents.{agent_id}"
+
+
+class Registration:
+    """
+    Keeps the agent's entry in the `agents` collection up to date, which is
+    how the server knows which agents are alive and which of them are free
+    to record a meeting.
+
+    The server reserves an agent by setting `meetingId` on its entry before
+    sending it the start command, and the agent clears it once the recording
+    is stored. Everything else in the entry belongs to the agent.
+    """
+
+    def __init__(self, db, recorder, transcription_mode, channel=None):
+        self.collection = db[AGENTS_COLLECTION]
+        self.meetings = db["meetings"]
+        self.recorder = recorder
+        self.channel = channel
+        self.capabilities = {
+            "transcription": transcription_mode,
+            "audioFormat": AUDIO_FORMAT,
+            "maxMeetings": 1,
+        }
+
+    def load(self) -> dict:
+        return {
+            "recording": self.recorder.meeting_id,
+            "transcribing": self.recorder.transcribing,
+        }
+
+    async def register(self):
+        now = datetime.datetime.utcnow()
+        previous = await self.collection.find_one_and_update(
+            {"_id": AGENT_ID},
+            {
+                "$set": {
+                    "room": AGENT_ROOM,
+                    "host": socket.gethostname(),
+                    "capabilities": self.capabilities,
+                    "status": "online",
+                    "startedAt": now,
+                    "heartbeatAt": now,
+                    "load": self.load(),
+                    "meetingId": None,
+                }
+            },
+            upsert=True,
+        )
+
+        # a meeting reserved for the previous run of this agent is not being
+        # recorded by anyone
+        if previous and previous.get("meetingId"):
+            await self.abandon(previous["meetingId"], previous.get("heartbeatAt"))
+
+        logging.info(f"registered as agent {AGENT_ID} (room {AGENT_ROOM})")
+
+    async def heartbeat_periodically(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self.collection.update_one(
+                    {"_id": AGENT_ID},
+                    {
+                        "$set": {
+                            "status": "online",
+                            "heartbeatAt": datetime.datetime.utcnow(),
+                            "load": self.load(),
+                        }
+                    },
+                )
+            except Exception as e:
+                logging.warning(f"cannot send heartbeat: {e}")
+
+    async def release(self, meeting_id: str):
+        """
+        Makes the agent available for the next meeting, once the recording
+        of this one is stored or has failed.
+        """
+
+        await self.collection.update_one(
+            {"_id": AGENT_ID, "meetingId": ObjectId(meeting_id)},
+            {"$set": {"meetingId": None, "load": self.load()}},
+        )
+
+    async def deregister(self):
+        await self.collection.update_one(
+            {"_id": AGENT_ID}, {"$set": {"status": "offline", "load": self.load()}}
+        )
+        logging.info(f"deregistered agent {AGENT_ID}")
+
+    async def abandon(self, meeting_id, last_seen=None):
+        """
+        Stops a meeting nobody records, so it does not stay in progress, and
+        drops the agent's reservation for it.
+        """
+
+        await self.release(meeting_id)
+
+        stopped_at = last_seen or datetime.datetime.utcnow()
+        result = await self.meetings.update_one(
+            {"_id": ObjectId(meeting_id), "stoppedAt": None},
+            {"$set": {"stoppedAt": stopped_at, "agentLost": True}},
+        )
+        if result.modified_count:
+            logging.warning(f"meeting {meeting_id} is not recorded, stopped it")
+            await publish_event(
+                self.channel,
+                "meeting.stopped",
+                meeting_id,
+                stoppedAt=stopped_at.isoformat(),
+                agentLost=True,
+            )
@@ -0,0 +1,236 @@
+import struct
+from abc import ABC, abstractmethod
+
+# seconds between two entries of a seek index
+INDEX_INTERVAL = 1.0
+
+# granule positions of Ogg Opus streams always count 48 kHz samples
+OPUS_GRANULE_RATE = 48000
+
+# longest possible FLAC frame header, sync code to CRC-8 included
+FLAC_MAX_HEADER = 16
+
+
+def _crc8(data) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+class SeekIndexer(ABC):
+    """
+    Builds a time to byte offset index of an encoded stream while it is being
+    written, without ever holding more than a few bytes of it.
+
+    `index` holds `[seconds, offset]` pairs, at most one per `INDEX_INTERVAL`,
+    each pointing at the start of a frame or page that decoding can start
+    from. `header_size` is the size of the stream headers that have to be put
+    in front of any such frame for the result to be a valid stream.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+
+        self.index = []
+        self.header_size = None
+        self.duration = 0.0
+
+        self._buffer = bytearray()
+        self._base = 0
+
+    def feed(self, data):
+        self._buffer += data
+        consumed = self._parse()
+        del self._buffer[:consumed]
+        self._base += consumed
+
+    def _add(self, seconds, offset):
+        if not self.index or seconds - self.index[-1][0] >= INDEX_INTERVAL:
+            self.index.append([round(seconds, 3), offset])
+
+    @abstractmethod
+    def _parse(self) -> int:
+        """
+        Indexes what it can of `_buffer` and returns how many bytes of it are
+        done with, the rest is kept for the next call.
+        """
+
+
+class FlacIndexer(SeekIndexer):
+    """
+    Indexes a FLAC stream by its frame headers. Sync codes are searched for
+    and only accepted when the header checksum and the frame or sample number
+    match, so compressed audio that happens to look like a sync code is
+    skipped.
+    """
+
+    def __init__(self, sample_rate):
+        super().__init__(sample_rate)
+
+        self._frames = 0
+        self._samples = 0
+
+    def _parse(self) -> int:
+        buf = self._buffer
+        pos = 0
+
+        if self.header_size is None:
+            # "fLaC" and the metadata blocks, the last one is flagged
+            pos = 4
+            while True:
+                if len(buf) < pos + 4:
+                    return 0
+
+                last = buf[pos] & 0x80
+                pos += 4 + int.from_bytes(buf[pos + 1 : pos + 4], "big")
+                if last:
+                    break
+
+            if len(buf) < pos:
+                return 0
+            self.header_size = pos
+
+        while True:
+            sync = buf.find(b"\xff", pos)
+            if sync < 0:
+                return len(buf)
+            if len(buf) - sync < FLAC_MAX_HEADER:
+                return sync
+
+            frame = self._frame_header(buf, sync)
+            if frame is None:
+                pos = sync + 1
+                continue
+
+            block_size, header_length = frame
+            self._add(self._samples / self.sample_rate, self._base + sync)
+            self._samples += block_size
+            self._frames += 1
+            self.duration = self._samples / self.sample_rate
+
+            pos = sync + header_length
+
+    def _frame_header(self, buf, pos):
+        if buf[pos + 1] & 0xFE != 0xF8:
+            return None
+
+        variable = buf[pos + 1] & 0x01
+        size_code = buf[pos + 2] >> 4
+        rate_code = buf[pos + 2] & 0x0F
+        if size_code == 0 or rate_code == 15 or buf[pos + 3] >> 4 >= 11:
+            return None
+        if buf[pos + 3] & 0x01:
+            return None
+
+        # the frame or sample number is coded like UTF-8
+        first = buf[pos + 4]
+        for extra, mask, marker in (
+            (0, 0x80, 0x00),
+            (1, 0xE0, 0xC0),
+            (2, 0xF0, 0xE0),
+            (3, 0xF8, 0xF0),
+            (4, 0xFC, 0xF8),
+            (5, 0xFE, 0xFC),
+            (6, 0xFF, 0xFE),
+        ):
+            if first & mask == marker:
+                break
+        else:
+            return None
+
+        number = first & ~mask & 0xFF
+        for byte in buf[pos + 5 : pos + 5 + extra]:
+            if byte & 0xC0 != 0x80:
+                return None
+            number = (number << 6) | (byte & 0x3F)
+
+        end = pos + 5 + extra
+        if size_code == 1:
+            block_size = 192
+        elif size_code <= 5:
+            block_size = 576 << (size_code - 2)
+        elif size_code == 6:
+            block_size = buf[end] + 1
+            end += 1
+        elif size_code == 7:
+            block_size = int.from_bytes(buf[end : end + 2], "big") + 1
+            end += 2
+        else:
+            block_size = 256 << (size_code - 8)
+
+        if rate_code == 12:
+            end += 1
+        elif rate_code in (13, 14):
+            end += 2
+
+        if _crc8(buf[pos:end]) != buf[end]:
+            return None
+
+        expected = self._samples if variable else self._frames
+        if number != expected:
+            return None
+
+        return block_size, end + 1 - pos
+
+
+class OggOpusIndexer(SeekIndexer):
+    """
+    Indexes an Ogg Opus stream by its pages. A page is indexed at the time its
+    first packet starts, which is the granule position of the page before it,
+    and only when it does not begin with the continuation of a packet.
+    """
+
+    def __init__(self, sample_rate):
+        super().__init__(sample_rate)
+
+        self._pre_skip = 0
+        self._granule = 0
+
+    def _parse(self) -> int:
+        buf = self._buffer
+        pos = 0
+
+        while len(buf) - pos >= 27:
+            if buf[pos : pos + 4] != b"OggS":
+                raise ValueError(f"no ogg page at offset {self._base + pos}")
+
+            segments = buf[pos + 26]
+            body = pos + 27 + segments
+            if len(buf) < body:
+                break
+
+            size = body - pos + sum(buf[pos + 27 : body])
+            if len(buf) - pos < size:
+                break
+
+            header_type = buf[pos + 5]
+            (granule,) = struct.unpack_from("<q", buf, pos + 6)
+
+            if buf[body : body + 8] == b"OpusHead":
+                self._pre_skip = int.from_bytes(buf[body + 10 : body + 12], "little")
+
+            # identification and comment headers come before any audio
+            if self.header_size is None and granule == 0:
+                pos += size
+                continue
+
+            if self.header_size is None:
+                self.header_size = self._base + pos
+
+            if not header_type & 0x01:
+                seconds = max(self._granule - self._pre_skip, 0)
+                self._add(seconds / OPUS_GRANULE_RATE, self._base + pos)
+
+            if granule >= 0:
+                self._granule = granule
+                self.duration = max(granule - self._pre_skip, 0) / OPUS_GRANULE_RATE
+
+            pos += size
+
+        return pos
+
+
+INDEXERS = {"flac": FlacIndexer, "opus": OggOpusIndexer}
@@ -0,0 +1,75 @@
+from bson import ObjectId
+from pymongo import ReplaceOne
+
+# transcript segments live in their own collection, one document per segment,
+# instead of in an array on the meeting
+SEGMENTS_COLLECTION = "segments"
+
+# segments are stored as drafts first, and replaced by refined ones when the
+# meeting is transcribed again with a larger model
+DRAFT_VERSION = 1
+REFINED_VERSION = 2
+
+
+def segment_id(meeting_id, window: float, index: int, version=DRAFT_VERSION) -> str:
+    """
+    Segments are identified by their meeting, the offset of the window they
+    were transcribed from, their place in it and their version, so the same
+    window always produces the same ids.
+    """
+
+    suffix = f"@{version}" if version != DRAFT_VERSION else ""
+    return f"{meeting_id}:{round(window * 1000)}:{index}{suffix}"
+
+
+async def store_segments(
+    db, meeting_id, segments, window: float, version=DRAFT_VERSION
+):
+    """
+    Writes the segments of the window at `window` seconds with a single bulk
+    write. Storing a window again, when a transcription is resumed, replaces
+    its segments instead of duplicating them.
+    """
+
+    if not segments:
+        return
+
+    meeting_id = ObjectId(meeting_id)
+    await db[SEGMENTS_COLLECTION].bulk_write(
+        [
+            ReplaceOne(
+                {"_id": segment_id(meeting_id, window, i, version)},
+                {"meeting_id": meeting_id, "window": window, "version": version, **seg},
+                upsert=True,
+            )
+            for i, seg in enumerate(segments)
+        ],
+        ordered=False,
+    )
+
+
+async def clear_segments(db, meeting_id, since: float = 0.0):
+    """
+    Removes the segments of a meeting, or only those of the windows from
+    `since` seconds on, so that transcribing it again, e.g. when a
+    transcription is retried or resumed, does not duplicate them.
+    """
+
+    query = {"meeting_id": ObjectId(meeting_id)}
+    if since:
+        query["window"] = {"$gte": since}
+
+    await db[SEGMENTS_COLLECTION].delete_many(query)
+
+
+async def replace_segments(db, meeting_id, start: float, end: float, segments, window):
+    """
+    Replaces the segments starting between `start` and `end` seconds, of
+    whatever version, with the refined segments of the window at `window`
+    seconds.
+    """
+
+    await db[SEGMENTS_COLLECTION].delete_many(
+        {"meeting_id": ObjectId(meeting_id), "start": {"$gte": start, "$lt": end}}
+    )
+    await store_segments(db, meeting_id, segments, window, REFINED_VERSION)
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+import signal
+
+
+async def wait_for_shutdown():
+    """
+    Waits until the process receives SIGINT or SIGTERM.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    stop_event = asyncio.Event()
+
+    def stop_signal(*_):
+        logging.info("Shutting down...")
+        stop_event.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_signal)
+        except NotImplementedError:
+
+            def windows_handler():
+                logging.info("shutting down (windows fallback)")
+                stop_event.set()
+
+            signal.signal(sig, lambda *_: windows_handler())
+
+    await stop_event.wait()
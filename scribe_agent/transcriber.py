@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import os
+
+from aio_pika import IncomingMessage
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from scribe_agent.checkpoints import sweep_periodically
+from scribe_agent.events import declare_events_exchange
+from scribe_agent.jobs import (
+    TRANSCRIPTION_QUEUE,
+    declare_transcription_queue,
+    retry_transcription_job,
+)
+from scribe_agent.metrics import TRANSCRIBER_METRICS_PORT, start_metrics_server
+from scribe_agent.models import registry
+from scribe_agent.pool import TRANSCRIBE_WORKERS, TranscriptionPool
+from scribe_agent.profiler import profiler
+from scribe_agent.refinement import refiner
+from scribe_agent.shutdown import wait_for_shutdown
+from scribe_agent.transcription import transcribe_job
+from scribe_config import create_mongo_connection, create_rabbit_connection
+
+logging.basicConfig(level=logging.INFO)
+
+# number of unacknowledged jobs a single worker takes from the queue
+PREFETCH_COUNT = int(os.environ.get("SCRIBE_TRANSCRIBER_PREFETCH", "1"))
+
+
+async def consume_transcription_jobs():
+    start_metrics_server(TRANSCRIBER_METRICS_PORT)
+
+    connection = await create_rabbit_connection()
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=PREFETCH_COUNT)
+
+    queue = await declare_transcription_queue(channel)
+    await declare_events_exchange(channel)
+
+    mongo_client = create_mongo_connection()
+    db = mongo_client["scribe"]
+    bucket = AsyncIOMotorGridFSBucket(db, bucket_name="scribe.audios")
+
+    pool = TranscriptionPool() if TRANSCRIBE_WORKERS else None
+
+    await queue.consume(_handle_job(channel, db, bucket, pool))
+
+    # a job redelivered after its worker died is skipped while the dead
+    # worker's lease runs, and resumed from its checkpoint once it expired
+    async def resume(job):
+        with profiler.session(job["meeting_id"]):
+            await transcribe_job(db, bucket, job, pool=pool, channel=channel)
+
+    asyncio.create_task(sweep_periodically(db, resume, orphans=False))
+
+    # refinement waits for the draft jobs queued for any worker, not only this one
+    if refiner:
+
+        async def drafts_waiting():
+            declared = await channel.declare_queue(TRANSCRIPTION_QUEUE, passive=True)
+            return declared.declaration_result.message_count
+
+        refiner.backlog = drafts_waiting
+        asyncio.create_task(refiner.run(db, bucket, channel))
+
+    logging.info("Waiting for transcription jobs. Press Ctrl+C to exit.")
+    if not pool:
+        asyncio.create_task(registry.warm_up(registry.whisper, registry.diarization))
+    asyncio.create_task(registry.evict_idle_periodically())
+
+    await wait_for_shutdown()
+
+    await connection.close()
+    mongo_client.close()
+
+    if pool:
+        pool.shutdown()
+
+
+def _handle_job(channel, db, bucket, pool):
+    async def _handle_job_internal(message: IncomingMessage):
+        async with message.process(requeue=True, ignore_processed=True):
+            job = json.loads(message.body.decode())
+            attempt = int((message.headers or {}).get("x-attempt", 1))
+            meeting_id = job["meeting_id"]
+
+            logging.info(f"transcribing meeting {meeting_id} (attempt {attempt})")
+            if job.get("profile"):
+                profiler.request(meeting_id)
+
+            try:
+                with profiler.session(meeting_id):
+                    await transcribe_job(db, bucket, job, pool=pool, channel=channel)
+            except Exception as e:
+                logging.error(
+                    f"transcription of meeting {meeting_id} failed: {e}", exc_info=e
+                )
+                if not await retry_transcription_job(channel, job, attempt):
+                    logging.error(f"giving up on meeting {meeting_id}")
+
+            await message.ack()
+
+    return _handle_job_internal
+
+
+def main():
+    asyncio.run(consume_transcription_jobs())
@@ -1,131 +1,283 @@
+import asyncio
 import logging
-import subprocess
-import os
-from io import BytesIO
-from os import getcwd
-import torch
-
-import torchaudio
-from pyannote.audio import Pipeline
-
-diar_pipeline = Pipeline.from_pretrained(
-    "pyannote/speaker-diarization",
-    use_auth_token=os.environ.get("HUGGINGFACE_TOKEN"),
-    cache_dir=os.environ.get("HUGGINGFACE_CACHE_DIR", getcwd() + "/.cache"),
-)
-
-
-# UTILS
-async def stream_chunks(bucket, file_id, chunk_duration_s, chunk_duration):
-    grid_out = await bucket.open_download_stream(file_id)
-    buf = bytearray()
-    time_offset = 0.0
-
-    while True:
-        chunk = await grid_out.read(4096)
-        if not chunk:
-            break
-        buf.extend(chunk)
-
-        # check if enough for one chunk
-        if len(buf) >= chunk_duration_s * 2:
-            current_chunk = bytes(buf[: chunk_duration_s * 2])
-            buf = buf[chunk_duration_s * 2 :]
-            yield current_chunk, time_offset
-            time_offset += chunk_duration
-
-    # final chunk
-    if buf:
-        yield bytes(buf), time_offset
-
-
-def bytes_to_waveform(raw_bytes, sample_rate):
-    waveform, sr = decode_with_ffmpeg(raw_bytes, sample_rate)
-    if sr != sample_rate:
-        waveform = torchaudio.functional.resample(waveform, sr, sample_rate)
-    return waveform.squeeze().numpy()
-
-
-def match_speaker(diar_timeline, start, end):
-    overlaps = []
-    for d in diar_timeline:
-        latest_start = max(start, d["start"])
-        earliest_end = min(end, d["end"])
-        overlap = max(0.0, earliest_end - latest_start)
-        if overlap > 0:
-            overlaps.append((overlap, d["speaker"]))
-    return max(overlaps, default=(0, "UNKNOWN"))[1]
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from bson import ObjectId
+
+from scribe_agent.attribution import UNKNOWN_SPEAKER, attribute_speakers
+from scribe_agent.batching import batcher
+from scribe_agent.checkpoints import claim
+from scribe_agent.decoding import transcribe_once
+from scribe_agent.diarization import SpeakerClusterer, diarize_window
+from scribe_agent.events import publish_event
+from scribe_agent.metrics import REAL_TIME_FACTOR, STAGE_SECONDS
+from scribe_agent.models import registry
+from scribe_agent.pcm import read_windows
+from scribe_agent.refinement import refiner
+from scribe_agent.segments import clear_segments, store_segments
+from scribe_agent.vad import VAD_ENABLED, speech_chunks
+
+
+@contextmanager
+def _timed(stage, timings):
+    if timings is None:
+        with STAGE_SECONDS.labels(stage).time():
+            yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+
+
+def analyze_window(waveform_np, sample_rate, whisper_model=None, timings=None):
+    """
+    Runs diarization and transcription on a single window of audio.
+
+    This step does not depend on the rest of the meeting, so windows can be
+    analyzed in any order or in other processes. Speakers are still labelled
+    with the window's local labels; `finish_window` maps them onto the meeting.
+    Stage times go into `timings` instead of the metrics when it is given, for
+    processes whose metrics are not exported.
+    """
+
+    # Run diarization
+    with _timed("diarization", timings):
+        turns, embeddings = diarize_window(waveform_np, sample_rate)
+    logging.info("diarization finished")
+
+    # Run transcription
+    if whisper_model is None:
+        whisper_model = registry.whisper()
+
+    with _timed("whisper", timings):
+        language, segments = transcribe_once(whisper_model, waveform_np)
+
+    return turns, embeddings, language, segments
+
+
+def finish_window(offset, speakers, turns, embeddings, language, segments):
+    """
+    Labels the segments of an analyzed window with meeting-wide speakers and
+    shifts them by the window's offset. Segments with word timestamps are
+    split where the speaker changes. Windows must be finished in order.
+    """
+
+    with STAGE_SECONDS.labels("speakers").time():
+        mapping = speakers.assign(embeddings)
+        for turn in turns:
+            turn["speaker"] = mapping.get(turn["speaker"], UNKNOWN_SPEAKER)
+
+        segments = attribute_speakers(segments, turns)
+        for seg in segments:
+            seg["start"] += offset
+            seg["end"] += offset
+            seg["lang"] = language
+
+    return segments
+
+
+def observe_window(started, samples, sample_rate):
+    """
+    Records how long a window took from being handed to analysis to being
+    finished, against how much audio it holds.
+    """
+
+    elapsed = time.perf_counter() - started
+    STAGE_SECONDS.labels("window").observe(elapsed)
+    if samples:
+        REAL_TIME_FACTOR.labels("window").observe(elapsed / (samples / sample_rate))
 
 
 # MAIN PIPELINE
 async def transcribe_from_gridfs(
-    bucket, file_id, whisper_model, *, sample_rate, chunk_duration
+    bucket,
+    file_id,
+    *,
+    sample_rate,
+    chunk_duration,
+    pool=None,
+    start=0.0,
+    speakers=None,
 ):
-    results = []
+    """
+    Transcribes a stored recording and yields `(offset, end, segments)` for
+    every window, in time order, as soon as the window is finished.
 
-    async for raw_bytes, offset in stream_chunks(
-        bucket, file_id, sample_rate * chunk_duration, chunk_duration
+    Transcription begins `start` seconds into the recording, with the
+    speakers already known from before in `speakers`.
+    """
+
+    if speakers is None:
+        speakers = SpeakerClusterer()
+    windows = read_windows(
+        bucket, file_id, sample_rate * chunk_duration, sample_rate, start
+    )
+    if VAD_ENABLED:
+        windows = speech_chunks(windows, sample_rate, chunk_duration)
+
+    if pool:
+        analyze, in_flight = pool.analyze, pool.workers * 2
+    elif batcher:
+        analyze, in_flight = batcher.analyze, batcher.batch_size
+    else:
+        analyze, in_flight = analyze_in_executor, 1
+
+    async for window in transcribe_in_order(
+        windows, analyze, in_flight, sample_rate, speakers
     ):
-        logging.info(f"transcribing chunk of {len(raw_bytes)} bytes")
-        waveform_np = bytes_to_waveform(raw_bytes, sample_rate)
+        yield window
 
-        # Run diarization
-        if waveform_np.ndim == 1:
-            waveform_tensor = torch.from_numpy(waveform_np).unsqueeze(0)
-        else:
-            waveform_tensor = torch.from_numpy(waveform_np)
+    logging.info("transcription is ready")
 
-        diarization = diar_pipeline(
-            {"waveform": waveform_tensor, "sample_rate": sample_rate}
-        )
 
-        diar_segments = [
-            {"start": turn.start, "end": turn.end, "speaker": speaker}
-            for turn, _, speaker in diarization.itertracks(yield_label=True)
-        ]
-
-        logging.info("diarization finished")
-
-        # Run transcription
-        segments, info = whisper_model.transcribe(waveform_np, task="translate")
-        text_segments, _ = whisper_model.transcribe(waveform_np, task="transcribe")
-
-        for seg, text in zip(segments, text_segments):
-            speaker = match_speaker(diar_segments, seg.start, seg.end)
-            results.append(
-                {
-                    "start": offset + seg.start,
-                    "end": offset + seg.end,
-                    "trans": seg.text.strip(),
-                    "text": text.text.strip(),
-                    "lang": info.language,
-                    "speaker": speaker,
-                }
+async def analyze_in_executor(waveform_np, sample_rate):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, analyze_window, waveform_np, sample_rate)
+
+
+async def transcribe_in_order(windows, analyze, in_flight, sample_rate, speakers):
+    """
+    Analyzes up to `in_flight` windows concurrently with the `analyze`
+    coroutine, finishes them in time order and yields the offset, the end and
+    the segments of each.
+    """
+
+    pending = deque()
+    started = time.perf_counter()
+    audio_end = 0.0
+
+    async def finish_oldest():
+        offset, task, submitted, samples = pending.popleft()
+        analysis = await task
+        segments = finish_window(offset, speakers, *analysis)
+        observe_window(submitted, samples, sample_rate)
+        return offset, offset + samples / sample_rate, segments
+
+    async for waveform_np, offset in windows:
+        logging.info(f"transcribing chunk of {len(waveform_np)} samples")
+
+        # windows are views into a reused buffer, keep a copy while other
+        # windows are read
+        if in_flight > 1:
+            waveform_np = waveform_np.copy()
+
+        audio_end = offset + len(waveform_np) / sample_rate
+        pending.append(
+            (
+                offset,
+                asyncio.ensure_future(analyze(waveform_np, sample_rate)),
+                time.perf_counter(),
+                len(waveform_np),
             )
+        )
+        if len(pending) >= in_flight:
+            yield await finish_oldest()
 
-    logging.info("transcription is ready")
-    return results
-
-
-def decode_with_ffmpeg(raw_bytes, sample_rate=16000):
-    process = subprocess.Popen(
-        [
-            "ffmpeg",
-            "-f",
-            "s16le",  # Format: 16-bit signed PCM
-            "-ac",
-            "1",  # Mono
-            "-ar",
-            str(sample_rate),  # Sampling rate
-            "-i",
-            "pipe:0",
-            "-f",
-            "wav",
-            "pipe:1",
-        ],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.DEVNULL,
+    while pending:
+        yield await finish_oldest()
+
+    if audio_end:
+        REAL_TIME_FACTOR.labels("recording").observe(
+            (time.perf_counter() - started) / audio_end
+        )
+
+
+async def transcribe_meeting(
+    db,
+    bucket,
+    meeting_id,
+    file_id,
+    *,
+    sample_rate,
+    chunk_duration,
+    pool=None,
+    channel=None,
+):
+    """
+    Transcribes a finished recording and stores its segments, window by
+    window, as they are produced. Every stored window is announced on the
+    events exchange when a channel is given.
+
+    Progress is checkpointed after every window, so a transcription that was
+    interrupted continues after its last stored window. Returns False,
+    without doing anything, while another process holds the meeting's
+    transcription or once it is transcribed. With refinement on, the
+    finished draft is scheduled for refinement.
+    """
+
+    checkpoint = await claim(db, meeting_id, file_id, sample_rate, chunk_duration)
+    if checkpoint is None:
+        logging.info(f"meeting {meeting_id} is transcribed already or elsewhere")
+        return False
+
+    # windows past the checkpoint may have been stored before the crash, and
+    # windows are not cut at the same places when reading starts elsewhere
+    await clear_segments(db, meeting_id, since=checkpoint.offset)
+    if checkpoint.offset:
+        logging.info(f"resuming meeting {meeting_id} at {checkpoint.offset:.1f}s")
+
+    renewal = asyncio.create_task(checkpoint.renew_periodically())
+    speakers = SpeakerClusterer.from_state(checkpoint.speakers)
+    try:
+        with refiner.draft() if refiner else nullcontext():
+            async for offset, end, segments in transcribe_from_gridfs(
+                bucket,
+                file_id,
+                sample_rate=sample_rate,
+                chunk_duration=chunk_duration,
+                pool=pool,
+                start=checkpoint.offset,
+                speakers=speakers,
+            ):
+                if renewal.done():
+                    # the lease was lost, raise why
+                    renewal.result()
+
+                with STAGE_SECONDS.labels("store").time():
+                    await store_segments(db, meeting_id, segments, offset)
+                    await checkpoint.save(end, speakers)
+                if segments:
+                    await publish_event(
+                        channel, "segments.added", meeting_id, segments=segments
+                    )
+
+        await checkpoint.complete()
+    except BaseException:
+        await checkpoint.release()
+        raise
+    finally:
+        renewal.cancel()
+
+    await publish_event(channel, "transcription.ready", meeting_id)
+    if refiner:
+        refiner.schedule(
+            {
+                "meeting_id": str(meeting_id),
+                "file_id": str(file_id),
+                "sample_rate": sample_rate,
+                "chunk_duration": chunk_duration,
+            }
+        )
+    return True
+
+
+async def transcribe_job(db, bucket, job, *, pool=None, channel=None):
+    """
+    Runs `transcribe_meeting` for a job as it is queued for workers.
+    """
+
+    return await transcribe_meeting(
+        db,
+        bucket,
+        job["meeting_id"],
+        ObjectId(job["file_id"]),
+        sample_rate=job["sample_rate"],
+        chunk_duration=job["chunk_duration"],
+        pool=pool,
+        channel=channel,
     )
-    wav_bytes, _ = process.communicate(input=raw_bytes)
-    return torchaudio.load(BytesIO(wav_bytes))  # waveform, sr
@@ -0,0 +1,214 @@
+import logging
+import os
+
+import numpy as np
+
+# set to 0 to transcribe fixed windows, silence included
+VAD_ENABLED = os.environ.get("SCRIBE_VAD", "1") != "0"
+
+# frames quieter than this, in dBFS, are never speech
+VAD_THRESHOLD_DB = float(os.environ.get("SCRIBE_VAD_THRESHOLD_DB", "-45"))
+
+FRAME_DURATION = 0.03
+
+# frames louder than the noise floor by this margin are speech
+NOISE_MARGIN_DB = 10.0
+
+# the threshold never goes above this, so loud rooms do not hide speech
+MAX_THRESHOLD_DB = -25.0
+
+# silences shorter than this are bridged, speech shorter than this is dropped
+MIN_SILENCE = 0.3
+MIN_SPEECH = 0.25
+
+# audio kept around speech so words are not clipped
+SPEECH_PAD = 0.2
+
+# how far back from the chunk limit a cut point is searched for
+CUT_SEARCH = 5.0
+
+
+def speech_mask(waveform_np, frame_size):
+    """
+    Classifies every frame of a waveform as speech or silence, from its energy
+    relative to the noise floor of the waveform.
+    """
+
+    frames = len(waveform_np) // frame_size
+    if frames == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.float32)
+
+    framed = waveform_np[: frames * frame_size].reshape(frames, frame_size)
+    energy = 10.0 * np.log10(np.einsum("ij,ij->i", framed, framed) / frame_size + 1e-10)
+
+    noise_floor = np.percentile(energy, 10)
+    threshold = min(
+        max(VAD_THRESHOLD_DB, noise_floor + NOISE_MARGIN_DB), MAX_THRESHOLD_DB
+    )
+    mask = energy > threshold
+
+    _fill_runs(mask, False, int(MIN_SILENCE / FRAME_DURATION))
+    _fill_runs(mask, True, int(MIN_SPEECH / FRAME_DURATION))
+
+    return mask, energy
+
+
+def _fill_runs(mask, value, min_length):
+    """
+    Flips interior runs of `value` shorter than `min_length` frames.
+    """
+
+    if min_length <= 1 or len(mask) == 0:
+        return
+
+    edges = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], edges, [len(mask)]))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if mask[start] == value and end - start < min_length:
+            # silences at the edges may continue in the next buffer
+            if not value and (start == 0 or end == len(mask)):
+                continue
+            mask[start:end] = not value
+
+
+def _runs(mask):
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+class SpeechChunker:
+    """
+    Cuts a stream of samples into chunks of at most `max_duration` seconds.
+
+    Chunks start shortly before the first speech, end shortly after the last
+    speech, and are cut in the longest silence near the limit instead of at a
+    fixed offset. Stretches without speech are dropped. Every chunk comes with
+    its offset in the recording, so timestamps still map back to meeting time.
+    """
+
+    def __init__(self, sample_rate, max_duration, start=0.0):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * FRAME_DURATION)
+        self.max_samples = int(sample_rate * max_duration)
+        self.pad = int(sample_rate * SPEECH_PAD)
+
+        self.dropped = 0
+
+        self._buffer = np.empty(self.max_samples, dtype=np.float32)
+        self._filled = 0
+        self._checked = 0
+        # samples are counted from the start of the recording, for chunkers
+        # that pick a recording up in the middle
+        self._start = round(start * sample_rate)
+        self._position = self._start
+
+    def feed(self, samples):
+        """
+        Adds samples to the chunker and yields the `(waveform, offset)` chunks
+        that are complete. Waveforms are views into the chunker's buffer and
+        have to be consumed or copied before the chunker is used again.
+        """
+
+        while len(samples):
+            size = min(len(samples), self.max_samples - self._filled)
+            self._buffer[self._filled : self._filled + size] = samples[:size]
+            self._filled += size
+            samples = samples[size:]
+
+            # re-examining the buffer on every small write is wasted work
+            full = self._filled == self.max_samples
+            if full or self._filled - self._checked >= self.sample_rate:
+                yield from self._drain(final=False)
+
+    def flush(self):
+        yield from self._drain(final=True)
+
+        total = (self._position - self._start) / self.sample_rate
+        logging.info(f"vad dropped {self.dropped:.1f}s of {total:.1f}s as silence")
+
+    def _drain(self, final):
+        while self._filled:
+            mask, energy = speech_mask(self._buffer[: self._filled], self.frame_size)
+            self._checked = self._filled
+
+            speech = np.flatnonzero(mask)
+            if len(speech) == 0:
+                # keep a little audio in case speech starts right after it
+                keep = 0 if final else min(self.pad, self._filled)
+                self._shift(self._filled - keep, dropped=True)
+                return
+
+            first = max(0, int(speech[0]) * self.frame_size - self.pad)
+            if first > 0:
+                self._shift(first, dropped=True)
+                continue
+
+            if self._filled < self.max_samples and not final:
+                return
+
+            cut = self._filled
+            if self._filled == self.max_samples and not final:
+                cut = self._cut_point(mask, energy)
+
+            spoken = speech[speech * self.frame_size < cut]
+            end = min(cut, (int(spoken[-1]) + 1) * self.frame_size + self.pad)
+
+            yield self._buffer[:end], self._position / self.sample_rate
+            self.dropped += (cut - end) / self.sample_rate
+            self._shift(cut)
+
+    def _cut_point(self, mask, energy):
+        """
+        Picks the middle of the longest silence in the last `CUT_SEARCH`
+        seconds of the buffer, then the latest silence anywhere in it, and
+        only cuts through speech, at its quietest frame, if there is none.
+        """
+
+        search_from = max(
+            1, len(mask) - int(CUT_SEARCH * self.sample_rate / self.frame_size)
+        )
+        silences = _runs(~mask)
+        silences = silences[silences[:, 0] > np.argmax(mask)]
+
+        recent = silences[silences[:, 1] > search_from]
+        if len(recent):
+            longest = np.argmax(recent[:, 1] - np.maximum(recent[:, 0], search_from))
+            frame = (max(recent[longest, 0], search_from) + recent[longest, 1]) // 2
+        elif len(silences):
+            frame = (silences[-1, 0] + silences[-1, 1]) // 2
+        else:
+            frame = search_from + np.argmin(energy[search_from:])
+
+        return max(int(frame) * self.frame_size, self.frame_size)
+
+    def _shift(self, size, dropped=False):
+        size = int(size)
+        if dropped:
+            self.dropped += size / self.sample_rate
+
+        remaining = self._filled - size
+        self._buffer[:remaining] = self._buffer[size : self._filled]
+        self._filled = remaining
+        self._checked = 0
+        self._position += size
+
+
+async def speech_chunks(windows, sample_rate, max_duration):
+    """
+    Re-chunks the `(waveform, offset)` windows of a recording around speech.
+    Windows have to be contiguous; the chunks are offset from the first one,
+    so recordings read from the middle keep their meeting time.
+    """
+
+    chunker = None
+    async for waveform_np, offset in windows:
+        if chunker is None:
+            chunker = SpeechChunker(sample_rate, max_duration, start=offset)
+        for chunk in chunker.feed(waveform_np):
+            yield chunk
+
+    if chunker is None:
+        return
+
+    for chunk in chunker.flush():
+        yield chunk
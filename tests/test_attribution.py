@@ -0,0 +1,135 @@
+from scribe_agent.attribution import UNKNOWN_SPEAKER, attribute_speakers
+
+
+def _turn(speaker, start, end):
+    return {"speaker": speaker, "start": start, "end": end}
+
+
+def _segment(words, **fields):
+    """
+    Builds a segment spanning `(text, start, end)` words, with the leading
+    spaces Whisper puts on words.
+    """
+
+    return {
+        "start": words[0][1],
+        "end": words[-1][2],
+        "text": "".join(f" {text}" for text, _, _ in words).strip(),
+        "words": [{"word": f" {text}", "start": s, "end": e} for text, s, e in words],
+        **fields,
+    }
+
+
+WORDS = [
+    ("one", 0.0, 0.5),
+    ("two", 0.5, 1.0),
+    ("three", 1.0, 1.5),
+    ("four", 2.0, 2.5),
+    ("five", 2.5, 3.0),
+    ("six", 3.0, 4.0),
+]
+
+
+def test_segment_without_words_takes_the_most_overlapping_speaker():
+    segments = [
+        {"start": 0.0, "end": 2.0, "text": "a"},
+        {"start": 2.0, "end": 3.0, "text": "b"},
+        {"start": 5.0, "end": 6.0, "text": "c"},
+    ]
+    turns = [_turn("B", 1.5, 3.0), _turn("A", 0.0, 1.5)]
+
+    attributed = attribute_speakers(segments, turns)
+
+    assert [seg["speaker"] for seg in attributed] == ["A", "B", UNKNOWN_SPEAKER]
+
+
+def test_segment_is_split_where_the_speaker_changes():
+    turns = [_turn("A", 0.0, 1.8), _turn("B", 1.8, 4.0)]
+
+    attributed = attribute_speakers([_segment(WORDS)], turns)
+
+    assert [(s["speaker"], s["start"], s["end"], s["text"]) for s in attributed] == [
+        ("A", 0.0, 1.5, "one two three"),
+        ("B", 2.0, 4.0, "four five six"),
+    ]
+    assert all("words" not in seg for seg in attributed)
+
+
+def test_words_without_a_turn_take_the_speaker_before_them():
+    # "three" falls in the gap between both turns
+    turns = [_turn("A", 0.0, 1.0), _turn("B", 2.0, 4.0)]
+
+    attributed = attribute_speakers([_segment(WORDS)], turns)
+
+    assert [(s["speaker"], s["text"]) for s in attributed] == [
+        ("A", "one two three"),
+        ("B", "four five six"),
+    ]
+
+
+def test_leading_words_without_a_turn_take_the_first_known_speaker():
+    turns = [_turn("B", 1.0, 4.0)]
+
+    attributed = attribute_speakers([_segment(WORDS)], turns)
+
+    assert len(attributed) == 1
+    assert attributed[0]["speaker"] == "B"
+
+
+def test_segment_without_any_turn_is_unknown():
+    attributed = attribute_speakers([_segment(WORDS)], [])
+
+    assert [seg["speaker"] for seg in attributed] == [UNKNOWN_SPEAKER]
+
+
+def test_short_runs_are_merged():
+    # a single word of B in the middle, and a single word of B at the start
+    middle = [_turn("A", 0.0, 2.0), _turn("B", 2.0, 2.5), _turn("A", 2.5, 4.0)]
+    first = [_turn("B", 0.0, 0.5), _turn("A", 0.5, 4.0)]
+
+    for turns in (middle, first):
+        attributed = attribute_speakers([_segment(WORDS)], turns)
+
+        assert [(s["speaker"], s["start"], s["end"]) for s in attributed] == [
+            ("A", 0.0, 4.0)
+        ]
+        assert attributed[0]["text"] == "one two three four five six"
+
+
+def test_zero_length_words_count_where_they_are():
+    words = [
+        ("one", 0.0, 0.5),
+        ("two", 0.5, 1.0),
+        ("three", 2.2, 2.2),
+        ("four", 2.5, 3.0),
+    ]
+    turns = [_turn("A", 0.0, 2.0), _turn("B", 2.0, 3.0)]
+
+    attributed = attribute_speakers([_segment(words)], turns)
+
+    assert [(s["speaker"], s["text"]) for s in attributed] == [
+        ("A", "one two"),
+        ("B", "three four"),
+    ]
+
+
+def test_translation_that_is_the_text_is_split_along():
+    turns = [_turn("A", 0.0, 1.8), _turn("B", 1.8, 4.0)]
+    segment = _segment(WORDS, trans="one two three four five six", lang="en")
+
+    attributed = attribute_speakers([segment], turns)
+
+    assert [seg["trans"] for seg in attributed] == ["one two three", "four five six"]
+    assert all(seg["lang"] == "en" for seg in attributed)
+
+
+def test_other_translation_goes_with_the_longest_run():
+    turns = [_turn("A", 0.0, 1.0), _turn("B", 1.0, 4.0)]
+    segment = _segment(WORDS, trans="un deux trois quatre cinq six")
+
+    attributed = attribute_speakers([segment], turns)
+
+    assert [(s["speaker"], s["trans"]) for s in attributed] == [
+        ("A", ""),
+        ("B", "un deux trois quatre cinq six"),
+    ]
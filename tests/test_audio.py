@@ -0,0 +1,27 @@
+from scribe.meetings.audio import negotiate
+
+FIREFOX = (
+    "audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,application/ogg;q=0.7,"
+    "video/*;q=0.6,*/*;q=0.5"
+)
+
+
+def test_stored_format_wins_over_wildcards():
+    assert negotiate(FIREFOX, "audio/flac") == "audio/flac"
+    assert negotiate("*/*", "audio/flac") == "audio/flac"
+    assert negotiate(None, "audio/flac") == "audio/flac"
+
+
+def test_stored_format_outranked_by_named_format():
+    assert negotiate("audio/flac;q=0.5, audio/wav", "audio/flac") == "audio/wav"
+    assert negotiate("audio/flac, audio/wav", "audio/flac") == "audio/flac"
+
+
+def test_stored_format_excluded():
+    assert negotiate("audio/wav", "audio/flac") == "audio/wav"
+    assert negotiate("audio/flac;q=0, audio/*", "audio/flac") == "audio/wav"
+    assert negotiate("audio/x-flac;q=0, audio/opus", "audio/flac") == "audio/ogg"
+
+
+def test_nothing_acceptable():
+    assert negotiate("text/html", "audio/flac") is None
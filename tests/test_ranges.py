@@ -0,0 +1,135 @@
+import asyncio
+import re
+
+import pytest
+
+from scribe.meetings.ranges import (
+    RangeNotSatisfiable,
+    etag_matches,
+    if_range_matches,
+    parse_ranges,
+    range_response,
+    read_range,
+)
+
+ETAG = '"abc-100-audio-flac"'
+
+
+class FakeGridOut:
+    """
+    Serves a file in chunks the way motor's GridOut does: `readchunk` returns
+    the rest of the chunk the read position is in.
+    """
+
+    def __init__(self, data, chunk_size=16):
+        self.data = data
+        self.length = len(data)
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.reads = 0
+
+    def seek(self, position):
+        self.position = position
+
+    async def readchunk(self):
+        end = (self.position // self.chunk_size + 1) * self.chunk_size
+        chunk = self.data[self.position : end]
+        self.position += len(chunk)
+        self.reads += 1
+        return chunk
+
+
+def _collect(iterator):
+    async def collect():
+        return b"".join([data async for data in iterator])
+
+    return asyncio.run(collect())
+
+
+def test_parse_ranges_forms():
+    assert parse_ranges("bytes=0-9", 100) == [(0, 9)]
+    assert parse_ranges("bytes=90-", 100) == [(90, 99)]
+    assert parse_ranges("bytes=-10", 100) == [(90, 99)]
+    assert parse_ranges("bytes=-500", 100) == [(0, 99)]
+    assert parse_ranges("bytes=95-200", 100) == [(95, 99)]
+
+
+def test_parse_ranges_merges_overlapping_and_adjacent():
+    assert parse_ranges("bytes=50-60,0-9,5-20", 100) == [(0, 20), (50, 60)]
+    assert parse_ranges("bytes=0-9,10-19", 100) == [(0, 19)]
+    assert parse_ranges("bytes=-10,85-", 100) == [(85, 99)]
+
+
+def test_parse_ranges_ignored():
+    assert parse_ranges(None, 100) is None
+    assert parse_ranges("items=0-9", 100) is None
+    assert parse_ranges("bytes=", 100) is None
+    assert parse_ranges("bytes=5", 100) is None
+    assert parse_ranges("bytes=a-b", 100) is None
+    assert parse_ranges("bytes=9-5", 100) is None
+
+
+def test_parse_ranges_unsatisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_ranges("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_ranges("bytes=-0", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_ranges("bytes=0-", 0)
+
+    # satisfiable as long as one range overlaps the file
+    assert parse_ranges("bytes=200-300,0-0", 100) == [(0, 0)]
+
+
+def test_etag_matches():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", W/{ETAG}', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches('"other"', ETAG)
+    assert not etag_matches(None, ETAG)
+
+
+def test_if_range_matches():
+    assert if_range_matches(None, ETAG)
+    assert if_range_matches(f" {ETAG} ", ETAG)
+    assert not if_range_matches('"other"', ETAG)
+    assert not if_range_matches(f"W/{ETAG}", ETAG)
+    assert not if_range_matches("Wed, 21 Oct 2015 07:28:00 GMT", ETAG)
+
+
+def test_read_range_fetches_only_needed_chunks():
+    grid_out = FakeGridOut(bytes(range(100)), chunk_size=16)
+
+    assert _collect(read_range(grid_out, 20, 40)) == bytes(range(20, 41))
+    assert grid_out.reads == 2
+
+    assert _collect(read_range(grid_out, 95, 99)) == bytes(range(95, 100))
+
+
+def test_single_range_response():
+    grid_out = FakeGridOut(bytes(range(100)))
+    response = range_response(grid_out, [(10, 19)], "audio/flac", {})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert response.headers["content-length"] == "10"
+    assert _collect(response.body_iterator) == bytes(range(10, 20))
+
+
+def test_multipart_range_response():
+    grid_out = FakeGridOut(bytes(range(100)))
+    response = range_response(grid_out, [(0, 4), (50, 59)], "audio/flac", {})
+    body = _collect(response.body_iterator)
+
+    boundary = re.search(r"boundary=(\w+)", response.headers["content-type"]).group(1)
+    assert response.status_code == 206
+    assert response.headers["content-length"] == str(len(body))
+    assert body.endswith(f"\r\n--{boundary}--\r\n".encode())
+
+    parts = body.split(f"--{boundary}".encode())[1:-1]
+    assert len(parts) == 2
+    for part, (start, end) in zip(parts, [(0, 4), (50, 59)]):
+        head, _, content = part.partition(b"\r\n\r\n")
+        assert f"Content-Range: bytes {start}-{end}/100".encode() in head
+        assert b"Content-Type: audio/flac" in head
+        assert content.removesuffix(b"\r\n") == bytes(range(start, end + 1))
@@ -0,0 +1,113 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from scribe_agent.seekindex import (
+    INDEX_INTERVAL,
+    OPUS_GRANULE_RATE,
+    FlacIndexer,
+    OggOpusIndexer,
+    SeekIndexer,
+)
+
+SAMPLE_RATE = 16000
+DURATION = 10
+
+
+def _encode(**kwargs) -> bytes:
+    # noise compresses badly, so frames are full of bytes that look like
+    # sync codes
+    rng = np.random.default_rng(0)
+    waveform = rng.normal(0, 0.1, SAMPLE_RATE * DURATION).astype(np.float32)
+
+    buffer = io.BytesIO()
+    sf.write(buffer, waveform, SAMPLE_RATE, **kwargs)
+    return buffer.getvalue()
+
+
+def _index(indexer, data):
+    # pieces of uneven sizes, so headers and frames get split across feeds
+    pos = 0
+    for size in [1, 3, 7, 50, 777, 4096, 13] * 1000:
+        if pos >= len(data):
+            break
+        indexer.feed(data[pos : pos + size])
+        pos += size
+
+    return indexer
+
+
+def _ogg_pages(data):
+    pages = []
+    pos = 0
+    while pos < len(data):
+        assert data[pos : pos + 4] == b"OggS"
+        segments = data[pos + 26]
+        size = 27 + segments + sum(data[pos + 27 : pos + 27 + segments])
+        (granule,) = struct.unpack_from("<q", data, pos + 6)
+        pages.append((pos, data[pos + 5], granule))
+        pos += size
+
+    return pages
+
+
+def test_indexer_needs_a_format():
+    with pytest.raises(TypeError):
+        SeekIndexer(SAMPLE_RATE)
+
+
+def test_flac_index():
+    data = _encode(format="FLAC", subtype="PCM_16")
+    indexer = _index(FlacIndexer(SAMPLE_RATE), data)
+
+    assert data[:4] == b"fLaC"
+    assert indexer.header_size > 4
+    assert indexer.index[0] == [0.0, indexer.header_size]
+    assert indexer.duration == pytest.approx(DURATION)
+
+    # STREAMINFO comes first, with the minimum and maximum block size
+    block_size = int.from_bytes(data[8:10], "big")
+    assert int.from_bytes(data[10:12], "big") == block_size
+    for (seconds, _), (next_seconds, _) in zip(indexer.index, indexer.index[1:]):
+        assert next_seconds - seconds >= INDEX_INTERVAL
+
+    for seconds, offset in indexer.index:
+        # a fixed block size stream, numbered by frame; small frame numbers
+        # take one byte
+        assert data[offset : offset + 2] == b"\xff\xf8"
+        assert data[offset + 4] * block_size == round(seconds * SAMPLE_RATE)
+
+    whole = FlacIndexer(SAMPLE_RATE)
+    whole.feed(data)
+    assert whole.index == indexer.index
+
+
+def test_ogg_opus_index():
+    data = _encode(format="OGG", subtype="OPUS")
+    indexer = _index(OggOpusIndexer(SAMPLE_RATE), data)
+    pages = _ogg_pages(data)
+
+    # the identification and comment headers
+    assert [granule for _, _, granule in pages[:2]] == [0, 0]
+    assert indexer.header_size == pages[2][0]
+    assert indexer.index[0] == [0.0, indexer.header_size]
+    assert indexer.duration == pytest.approx(DURATION, abs=0.02)
+
+    head = 27 + data[26]
+    assert data[head : head + 8] == b"OpusHead"
+    pre_skip = int.from_bytes(data[head + 10 : head + 12], "little")
+    starts = {
+        offset: max(previous[2] - pre_skip, 0) / OPUS_GRANULE_RATE
+        for previous, (offset, header_type, _) in zip(pages, pages[1:])
+        if not header_type & 0x01
+    }
+    for seconds, offset in indexer.index:
+        assert offset in starts
+        assert seconds == pytest.approx(starts[offset], abs=0.001)
+
+    whole = OggOpusIndexer(SAMPLE_RATE)
+    whole.feed(data)
+    assert whole.index == indexer.index
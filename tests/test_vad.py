@@ -0,0 +1,59 @@
+import asyncio
+
+import numpy as np
+
+from scribe_agent.vad import speech_chunks
+
+SAMPLE_RATE = 16000
+WINDOW = 30
+
+
+def _recording(duration, speech):
+    """
+    Returns a quiet recording with a tone wherever `speech` has a
+    `(start, end)` region, in seconds.
+    """
+
+    rng = np.random.default_rng(0)
+    waveform = rng.normal(0, 1e-4, duration * SAMPLE_RATE).astype(np.float32)
+    for start, end in speech:
+        t = np.arange((end - start) * SAMPLE_RATE) / SAMPLE_RATE
+        tone = 0.3 * np.sin(2 * np.pi * 220 * t)
+        waveform[start * SAMPLE_RATE : end * SAMPLE_RATE] += tone.astype(np.float32)
+
+    return waveform
+
+
+def _chunks(waveform, start):
+    async def windows():
+        size = WINDOW * SAMPLE_RATE
+        for first in range(start * SAMPLE_RATE, len(waveform), size):
+            yield waveform[first : first + size], first / SAMPLE_RATE
+
+    async def collect():
+        return [
+            (offset, offset + len(chunk) / SAMPLE_RATE)
+            async for chunk, offset in speech_chunks(windows(), SAMPLE_RATE, WINDOW)
+        ]
+
+    return asyncio.run(collect())
+
+
+def test_chunks_keep_meeting_time_when_resumed():
+    waveform = _recording(150, [(10, 20), (70, 80), (100, 110)])
+
+    chunks = _chunks(waveform, start=60)
+
+    assert len(chunks) == 2
+    for (start, end), (speech_start, speech_end) in zip(chunks, [(70, 80), (100, 110)]):
+        assert speech_start - 0.5 <= start <= speech_start
+        assert speech_end <= end <= speech_end + 0.5
+
+
+def test_resumed_chunks_match_the_full_pass():
+    waveform = _recording(150, [(10, 20), (70, 80), (100, 110)])
+
+    full = _chunks(waveform, start=0)
+    resumed = _chunks(waveform, start=60)
+
+    assert resumed == [chunk for chunk in full if chunk[0] >= 60]